@@ -0,0 +1,102 @@
+"""Cálculos vetorizados sobre matrizes (data × local) dos dados OWID"""
+import numpy as np
+import pandas as pd
+
+
+def pivotar(df, colunas):
+    """Gera uma matriz data × local para cada coluna, com um único pivot.
+
+    As linhas cobrem todos os dias do intervalo (dias sem dados ficam NaN), de
+    modo que a posição da linha equivale ao número de dias desde a primeira data.
+    """
+    larga = df.pivot(index='date', columns='location', values=list(colunas)).sort_index().asfreq('D')
+    return {coluna: larga[coluna] for coluna in colunas}
+
+
+def cfr_media_movel(mortes, casos, janela=30, min_periods=7):
+    """CFR diária (NaN quando não há casos) e sua média móvel, para todos os locais"""
+    com_casos = casos > 0
+    cfr_diaria = mortes.where(com_casos) / casos.where(com_casos)
+    return cfr_diaria.rolling(window=janela, min_periods=min_periods).mean()
+
+
+def calcular_matrizes_comparacao(df):
+    """Matrizes usadas na comparação entre países: mortes (MM 7d, absolutas e por milhão) e CFR (MM 30d)"""
+    matrizes = pivotar(df, ['new_deaths', 'new_cases', 'new_deaths_per_million'])
+    mortes, casos = matrizes['new_deaths'], matrizes['new_cases']
+
+    return {
+        'mortes_mm7': mortes.rolling(window=7, center=True).mean(),
+        'mortes_pm_mm7': matrizes['new_deaths_per_million'].rolling(window=7, center=True).mean(),
+        'cfr_mm30': cfr_media_movel(mortes, casos) * 100
+    }
+
+
+def inicio_vacinacao_por_local(vacinados):
+    """Primeira data com people_vaccinated > 0 em cada coluna da matriz (NaT se nunca)"""
+    vacinou = (vacinados > 0).to_numpy()
+    datas = vacinados.index.to_numpy()[vacinou.argmax(axis=0)]
+    datas = np.where(vacinou.any(axis=0), datas, np.datetime64('NaT'))
+    return pd.Series(pd.DatetimeIndex(datas), index=vacinados.columns)
+
+
+def alinhar_eventos(matriz, locais, datas, dias_antes=180, dias_depois=365):
+    """Janela [-dias_antes, dias_depois] em torno de cada evento (local, data), numa coluna por evento.
+
+    Feito em uma única indexação NumPy sobre a matriz inteira, para qualquer
+    número de eventos (inclusive vários no mesmo local); eventos sem data
+    (NaT), de locais ausentes ou dias fora do período observado ficam NaN.
+    """
+    valores = matriz.to_numpy(dtype='float64')
+    n_dias = valores.shape[0]
+
+    colunas = matriz.columns.get_indexer(pd.Index(locais))
+    posicao_evento = matriz.index.get_indexer(pd.DatetimeIndex(datas))
+    posicao_evento = np.where(colunas >= 0, posicao_evento, -1)
+    dias_relativos = np.arange(-dias_antes, dias_depois + 1)
+    linhas = posicao_evento[None, :] + dias_relativos[:, None]
+
+    validos = (posicao_evento >= 0)[None, :] & (linhas >= 0) & (linhas < n_dias)
+    alinhada = np.where(validos, valores[np.clip(linhas, 0, n_dias - 1), np.clip(colunas, 0, None)[None, :]], np.nan)
+    return pd.DataFrame(alinhada, index=pd.Index(dias_relativos, name='dias_relativos'))
+
+
+def alinhar_por_evento(matriz, datas_evento, dias_antes=180, dias_depois=365):
+    """Realinha cada coluna para que a data do seu evento vire o dia 0 (um evento por local)"""
+    alinhada = alinhar_eventos(matriz, matriz.columns, datas_evento.reindex(matriz.columns), dias_antes, dias_depois)
+    alinhada.columns = matriz.columns
+    return alinhada
+
+
+def faixas_entre_locais(alinhada, locais=None):
+    """Mediana e intervalo interquartil (P25–P75) de cada dia relativo entre os locais"""
+    if locais is not None:
+        alinhada = alinhada[alinhada.columns.intersection(locais)]
+    faixas = alinhada.quantile([0.25, 0.5, 0.75], axis=1).T
+    faixas.columns = ['p25', 'mediana', 'p75']
+    return faixas
+
+
+def calcular_coorte_vacinacao(df, dias_antes=180, dias_depois=365, dias_base=90):
+    """Mortes (MM 7d) de todos os locais alinhadas ao próprio início da vacinação.
+
+    Cada série é expressa como índice em que a média dos `dias_base` dias
+    anteriores ao início da vacinação vale 100, o que permite comparar países de
+    tamanhos diferentes. As faixas consideram apenas países (sem agregados OWID_).
+    """
+    matrizes = pivotar(df, ['new_deaths', 'people_vaccinated'])
+    mortes_mm7 = matrizes['new_deaths'].rolling(window=7, center=True).mean()
+    inicios = inicio_vacinacao_por_local(matrizes['people_vaccinated'])
+
+    alinhada = alinhar_por_evento(mortes_mm7, inicios, dias_antes, dias_depois)
+    base = alinhada.loc[-dias_base:-1].mean()
+    indice = alinhada / base.where(base > 0) * 100
+
+    codigos = df.drop_duplicates('location').set_index('location')['iso_code']
+    paises = codigos[codigos.notna() & ~codigos.astype(str).str.startswith('OWID_')].index
+
+    return {
+        'indice': indice,
+        'faixas': faixas_entre_locais(indice, paises),
+        'inicios': inicios
+    }
@@ -0,0 +1,385 @@
+"""API HTTP somente leitura com os números do dashboard (JSON ou Arrow IPC)
+
+Processo leve para rodar ao lado do Streamlit: lê o snapshot apontado por
+snapshots/ATUAL (não busca dados nem cria snapshots) e responde com os mesmos
+módulos de cálculo da página (consultas.py, tabela.py).
+
+Rotas (GET; `local` pode se repetir para consultar vários locais numa requisição):
+
+    /v1/versao                                   snapshot em uso e seu manifesto resumido
+    /v1/kpis?local=Brazil&local=Japan            KPIs do topo da página (último valor válido)
+    /v1/janelas?local=Brazil&dias=90&dias=180    antes/depois do início da vacinação
+    /v1/indicadores[?local=...][&vacinados=1]    tabela de início da vacinação (paises_analise)
+    /v1/serie?local=Brazil&coluna=new_deaths     série diária (colunas escolhidas)
+    /v1/exportar[?local=...][&formato=parquet]   série + métricas derivadas da página, em CSV ou Parquet
+
+Parâmetros comuns: `inicio` e `fim` (AAAA-MM-DD; padrão: todo o período) e
+`formato` ('json', padrão, ou 'arrow'; também escolhido por
+`Accept: application/vnd.apache.arrow.stream`). Em /v1/exportar, `formato` é
+'csv' (padrão) ou 'parquet' e, sem `local`, saem todos os locais; o corpo é
+gerado e enviado em blocos, um local por vez (exportacao.py), sem passar
+pelo cache de respostas nem montar o arquivo inteiro em memória.
+
+Cada resposta leva `ETag` derivado do hash do snapshot e da consulta, e
+`Cache-Control`; um `If-None-Match` igual responde 304 sem recalcular. As
+respostas ficam num cache LRU em memória, invalidado naturalmente quando o
+snapshot muda (o hash faz parte da chave).
+
+Uso: python api.py [--host 127.0.0.1] [--porta 8502]
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pyarrow as pa
+
+from cache_compartilhado import Estatisticas
+from consultas import (
+    COLUNAS_JANELA,
+    COLUNAS_KPIS,
+    consultas_configuradas,
+    kpis_por_local,
+    resumo_janelas_por_local
+)
+from exportacao import FORMATOS as FORMATOS_EXPORTACAO
+from exportacao import gerar_exportacao, nome_arquivo
+from snapshots import DIRETORIO_SNAPSHOTS, carregar_snapshot, ler_manifesto, ler_ponteiro
+
+_LOGGER = logging.getLogger(__name__)
+
+TIPO_JSON = 'application/json; charset=utf-8'
+TIPO_ARROW = 'application/vnd.apache.arrow.stream'
+# Validade informada aos clientes; o ETag garante a revalidação barata depois disso
+MAX_AGE = 300
+# Com que frequência reler o ponteiro ATUAL
+INTERVALO_PONTEIRO = 1.0
+MAX_RESPOSTAS_EM_CACHE = 512
+DIAS_JANELAS = (90, 180)
+
+
+class ErroConsulta(ValueError):
+    """Parâmetros inválidos (responde 400) ou local inexistente (404)"""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class DadosVersao:
+    """Dados de um snapshot e os resultados derivados dele, calculados uma vez"""
+
+    def __init__(self, versao, diretorio):
+        self.versao = versao
+        self.manifesto = ler_manifesto(versao, diretorio)
+        self.df = carregar_snapshot(versao, diretorio)
+        self.consultas = consultas_configuradas(self.df, versao, diretorio)
+        self.locais = set(self.manifesto['intervalos_por_local'])
+        self.colunas = set(self.manifesto['colunas'])
+        self._trava = threading.Lock()
+        self._indicadores = None
+
+    def indicadores(self):
+        with self._trava:
+            if self._indicadores is None:
+                self._indicadores = self.consultas.indicadores_por_local().reset_index()
+            return self._indicadores
+
+
+class CacheRespostas:
+    """LRU de respostas prontas (corpo, tipo), limitado em número de entradas"""
+
+    def __init__(self, max_entradas=MAX_RESPOSTAS_EM_CACHE):
+        self.max_entradas = max_entradas
+        self.estatisticas = Estatisticas()
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            if chave not in self._dados:
+                self.estatisticas.contar('falhas')
+                return None
+            self._dados.move_to_end(chave)
+            self.estatisticas.contar('acertos')
+            return self._dados[chave]
+
+    def gravar(self, chave, resposta):
+        with self._trava:
+            self._dados[chave] = resposta
+            self.estatisticas.contar('gravacoes')
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+                self.estatisticas.contar('remocoes')
+
+
+# ========================================
+# Consultas
+# ========================================
+
+def _datas(parametros, dados):
+    try:
+        inicio = pd.Timestamp(parametros.get('inicio', [dados.manifesto['data_inicial']])[0])
+        fim = pd.Timestamp(parametros.get('fim', [dados.manifesto['data_final']])[0])
+    except ValueError as erro:
+        raise ErroConsulta(f"Data inválida: {erro}") from None
+    if inicio > fim:
+        raise ErroConsulta("'inicio' posterior a 'fim'")
+    return inicio, fim
+
+
+def _locais(parametros, dados, obrigatorio=True):
+    locais = list(dict.fromkeys(parametros.get('local', [])))
+    if not locais and obrigatorio:
+        raise ErroConsulta("Informe ao menos um 'local'")
+    desconhecidos = [local for local in locais if local not in dados.locais]
+    if desconhecidos:
+        raise ErroConsulta(f"Local(is) desconhecido(s): {', '.join(desconhecidos)}", status=404)
+    return locais
+
+
+def consultar_kpis(dados, parametros):
+    inicio, fim = _datas(parametros, dados)
+    series = dados.consultas.series(_locais(parametros, dados), inicio, fim, COLUNAS_KPIS + ['vac_coverage_pct'])
+    return kpis_por_local(series).reset_index()
+
+
+def consultar_janelas(dados, parametros):
+    inicio, fim = _datas(parametros, dados)
+    try:
+        dias = [int(valor) for valor in parametros.get('dias', DIAS_JANELAS)]
+    except ValueError:
+        raise ErroConsulta("'dias' deve ser inteiro") from None
+    series = dados.consultas.series(_locais(parametros, dados), inicio, fim, COLUNAS_JANELA + ['people_vaccinated'])
+    return pd.concat([resumo_janelas_por_local(series, quantidade) for quantidade in dias], ignore_index=True)
+
+
+def consultar_indicadores(dados, parametros):
+    indicadores = dados.indicadores()
+    locais = _locais(parametros, dados, obrigatorio=False)
+    if locais:
+        indicadores = indicadores[indicadores['location'].isin(locais)]
+    if parametros.get('vacinados', ['0'])[0] in ('1', 'true', 'sim'):
+        indicadores = indicadores[indicadores['inicio_vacinacao'].notna()]
+    return indicadores.reset_index(drop=True)
+
+
+def consultar_serie(dados, parametros):
+    inicio, fim = _datas(parametros, dados)
+    colunas = parametros.get('coluna')
+    desconhecidas = [coluna for coluna in colunas or [] if coluna not in dados.colunas]
+    if desconhecidas:
+        raise ErroConsulta(f"Coluna(s) desconhecida(s): {', '.join(desconhecidas)}")
+    return dados.consultas.series(_locais(parametros, dados), inicio, fim, colunas)
+
+
+ROTAS = {
+    '/v1/kpis': consultar_kpis,
+    '/v1/janelas': consultar_janelas,
+    '/v1/indicadores': consultar_indicadores,
+    '/v1/serie': consultar_serie
+}
+
+
+# ========================================
+# Serialização
+# ========================================
+
+def para_json(df, versao):
+    registros = df.to_json(orient='records', date_format='iso', date_unit='s', force_ascii=False)
+    return f'{{"versao": "{versao}", "linhas": {len(df)}, "dados": {registros}}}'.encode()
+
+
+def para_arrow(df, versao):
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), b'versao': versao.encode()})
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue().to_pybytes()
+
+
+# ========================================
+# Servidor
+# ========================================
+
+class _Tratador(http.server.BaseHTTPRequestHandler):
+    server_version = 'CovidAPI/1'
+
+    def _enviar(self, status, corpo=b'', tipo=TIPO_JSON, cabecalhos=None):
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        if status != 304:
+            self.send_header('Content-Type', tipo)
+            self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if status != 304 and self.command != 'HEAD':
+            self.wfile.write(corpo)
+
+    def _erro(self, status, mensagem):
+        self._enviar(status, json.dumps({'erro': mensagem}, ensure_ascii=False).encode())
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        endereco = urlparse(self.path)
+        parametros = parse_qs(endereco.query)
+        try:
+            dados = self.server.dados_atuais()
+        except FileNotFoundError:
+            self._erro(503, "Nenhum snapshot disponível")
+            return
+
+        if endereco.path == '/v1/versao':
+            resumo = {chave: dados.manifesto[chave] for chave in
+                      ('hash', 'origem', 'buscado_em', 'linhas', 'locais', 'data_inicial', 'data_final')}
+            resumo['cache_respostas'] = self.server.cache.estatisticas.como_dict()
+            self._enviar(200, json.dumps(resumo, ensure_ascii=False).encode(), cabecalhos={'Cache-Control': 'no-cache'})
+            return
+        if endereco.path == '/v1/exportar':
+            self._exportar(dados, parametros)
+            return
+        if endereco.path not in ROTAS:
+            self._erro(404, f"Rota desconhecida: {endereco.path}")
+            return
+
+        formato = parametros.pop('formato', [None])[0]
+        if formato is None:
+            formato = 'arrow' if TIPO_ARROW in self.headers.get('Accept', '') else 'json'
+        if formato not in ('json', 'arrow'):
+            self._erro(400, "formato deve ser 'json' ou 'arrow'")
+            return
+
+        # A resposta depende só da versão, da rota, dos parâmetros (em ordem canônica) e do formato
+        consulta = json.dumps([endereco.path, sorted(parametros.items()), formato])
+        etag = f'"{dados.versao[:16]}-{hashlib.sha256(consulta.encode()).hexdigest()[:16]}"'
+        cabecalhos = {'ETag': etag, 'Cache-Control': f'public, max-age={MAX_AGE}', 'X-Versao-Dados': dados.versao,
+                      'Vary': 'Accept'}
+        if etag in [valor.strip() for valor in self.headers.get('If-None-Match', '').split(',')]:
+            self._enviar(304, cabecalhos=cabecalhos)
+            return
+
+        resposta = self.server.cache.obter(etag)
+        if resposta is None:
+            try:
+                resultado = ROTAS[endereco.path](dados, parametros)
+            except ErroConsulta as erro:
+                self._erro(erro.status, str(erro))
+                return
+            except Exception:
+                _LOGGER.exception("Falha ao responder %s", self.path)
+                self._erro(500, "Erro interno")
+                return
+            resposta = ((para_arrow(resultado, dados.versao), TIPO_ARROW) if formato == 'arrow'
+                        else (para_json(resultado, dados.versao), TIPO_JSON))
+            self.server.cache.gravar(etag, resposta)
+        self._enviar(200, resposta[0], resposta[1], cabecalhos)
+
+    def _exportar(self, dados, parametros):
+        """Envia a exportação em fluxo: sem Content-Length, a conexão fecha ao fim do corpo"""
+        formato = parametros.pop('formato', ['csv'])[0]
+        if formato not in FORMATOS_EXPORTACAO:
+            self._erro(400, f"formato deve ser {' ou '.join(repr(nome) for nome in FORMATOS_EXPORTACAO)}")
+            return
+        try:
+            inicio, fim = _datas(parametros, dados)
+            locais = _locais(parametros, dados, obrigatorio=False)
+        except ErroConsulta as erro:
+            self._erro(erro.status, str(erro))
+            return
+
+        consulta = json.dumps(['/v1/exportar', sorted(parametros.items()), formato])
+        etag = f'"{dados.versao[:16]}-{hashlib.sha256(consulta.encode()).hexdigest()[:16]}"'
+        cabecalhos = {'ETag': etag, 'Cache-Control': f'public, max-age={MAX_AGE}', 'X-Versao-Dados': dados.versao}
+        if etag in [valor.strip() for valor in self.headers.get('If-None-Match', '').split(',')]:
+            self._enviar(304, cabecalhos=cabecalhos)
+            return
+
+        self.send_response(200)
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.send_header('Content-Type', FORMATOS_EXPORTACAO[formato])
+        self.send_header('Content-Disposition', f'attachment; filename="{nome_arquivo(locais, inicio, fim, formato)}"')
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        try:
+            for bloco in gerar_exportacao(dados.versao, formato, locais or None, inicio, fim, self.server.diretorio):
+                self.wfile.write(bloco)
+        except (BrokenPipeError, ConnectionResetError):
+            _LOGGER.info("Cliente desconectou durante a exportação %s", self.path)
+        except Exception:
+            # Os cabeçalhos já saíram: só resta interromper o corpo (o cliente vê a conexão cortada)
+            _LOGGER.exception("Falha durante a exportação %s", self.path)
+        self.close_connection = True
+
+    def log_message(self, formato, *args):
+        _LOGGER.info("%s %s", self.address_string(), formato % args)
+
+
+class ServidorAPI(http.server.ThreadingHTTPServer):
+    """Servidor da API; acompanha o ponteiro ATUAL e troca os dados quando o snapshot muda"""
+
+    daemon_threads = True
+
+    def __init__(self, endereco=('127.0.0.1', 8502), diretorio=DIRETORIO_SNAPSHOTS):
+        super().__init__(endereco, _Tratador)
+        self.diretorio = diretorio
+        self.cache = CacheRespostas()
+        self._dados = None
+        self._lido_em = float('-inf')
+        self._trava = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://{self.server_address[0]}:{self.server_address[1]}'
+
+    def dados_atuais(self):
+        """DadosVersao do snapshot atual (FileNotFoundError se ainda não houver snapshot)"""
+        with self._trava:
+            if time.monotonic() - self._lido_em >= INTERVALO_PONTEIRO:
+                ponteiro = ler_ponteiro(self.diretorio)
+                if ponteiro is None:
+                    raise FileNotFoundError("Sem ponteiro ATUAL")
+                if self._dados is None or self._dados.versao != ponteiro['hash']:
+                    self._dados = DadosVersao(ponteiro['hash'], self.diretorio)
+                    _LOGGER.info("API servindo o snapshot %s", ponteiro['hash'][:12])
+                self._lido_em = time.monotonic()
+            return self._dados
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8502)
+    argumentos = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    servidor = ServidorAPI((argumentos.host, argumentos.porta))
+    _LOGGER.info("API em %s (snapshots em %s)", servidor.url, servidor.diretorio)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
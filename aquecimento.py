@@ -0,0 +1,143 @@
+"""Pré-aquecimento dos caches do dashboard em segundo plano
+
+Preenche, numa thread daemon, os caches de cache_dados.py com os parâmetros da
+visão padrão da página (Mundo, todos os anos, controles nos valores iniciais).
+Como cada cálculo já cobre todos os locais de uma vez, isso também deixa
+prontos Brasil, Estados Unidos e os demais países mais consultados.
+
+Dois gatilhos:
+
+- início do servidor: `python aquecimento.py [opções do streamlit run]` dispara o
+  aquecimento e sobe o dashboard no mesmo processo (mesmos caches);
+- atualização dos dados: o dashboard chama `iniciar_aquecimento(versao_dados)`
+  após `load_data()`; a primeira sessão que vê uma versão nova dispara o
+  aquecimento do restante da página para essa versão.
+
+O aquecimento roda no máximo uma vez por versão dos dados em cada processo. Um
+visitante que chegue durante o aquecimento espera pelo cálculo em andamento
+(trava por chave do st.cache_data) em vez de repeti-lo.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+from streamlit import runtime
+
+from cache_dados import (
+    carregar_coorte_vacinacao,
+    carregar_contrafactual,
+    carregar_correlacoes,
+    carregar_estudo_eventos,
+    carregar_mapa,
+    carregar_matrizes_comparacao,
+    carregar_previsoes,
+    carregar_rt,
+    carregar_tabela,
+    load_data
+)
+from contrafactual import CENARIOS
+from correlacao import METODOS
+from epidemiologia import DESVIO_INTERVALO_SERIAL, MEDIA_INTERVALO_SERIAL
+from eventos import ler_eventos
+from mapa import METRICAS_MAPA
+
+_LOGGER = logging.getLogger(__name__)
+
+# Tempo máximo de espera pelo runtime do Streamlit quando o aquecimento é disparado no início do servidor
+ESPERA_RUNTIME = 30
+
+NOME_THREAD = 'aquecimento-caches'
+
+_trava = threading.Lock()
+_estado = {'em_andamento': False, 'versoes': set(), 'tempos': {}}
+
+
+class _SemAvisoDeContexto(logging.Filter):
+    """Descarta o aviso de "missing ScriptRunContext", esperado na thread de aquecimento (sem sessão)"""
+
+    def filter(self, record):
+        return threading.current_thread().name != NOME_THREAD
+
+
+logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(_SemAvisoDeContexto())
+
+
+def aquecer():
+    """Executa as cargas da visão padrão; retorna a versão dos dados e o tempo (s) de cada etapa"""
+    tempos = {}
+
+    def etapa(nome, funcao, *args):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos[nome] = time.perf_counter() - inicio
+        return resultado
+
+    # O aviso da busca (se houver) já foi para o log; quem o exibe é a página
+    (df_completo, df, _, _, traducao_paises, versao_dados), _ = etapa('load_data', load_data)
+
+    # Mesmos valores padrão que a página passa para cada função
+    anos = sorted(ano for ano in df['date'].dt.year.unique() if ano <= 2023)
+    origens = tuple(min(pd.Timestamp(f'{ano}-12-31'), df['date'].max()) for ano in anos)
+    cenario = next(iter(CENARIOS.values()))
+
+    etapa('rt', carregar_rt, df_completo, versao_dados, MEDIA_INTERVALO_SERIAL, DESVIO_INTERVALO_SERIAL)
+    etapa('previsoes', carregar_previsoes, df_completo, versao_dados, origens)
+    etapa('correlacoes', carregar_correlacoes, df_completo, versao_dados, next(iter(METODOS.values())))
+    etapa('contrafactual', carregar_contrafactual, df_completo, versao_dados, cenario, 0, 180)
+    etapa('mapa', carregar_mapa, df_completo, versao_dados, next(iter(METRICAS_MAPA)))
+    etapa('matrizes_comparacao', carregar_matrizes_comparacao, df, versao_dados)
+    etapa('coorte', carregar_coorte_vacinacao, df_completo, versao_dados)
+    etapa('eventos', carregar_estudo_eventos, df_completo, versao_dados, *ler_eventos())
+    etapa('tabela', carregar_tabela, df_completo, versao_dados, traducao_paises)
+
+    return versao_dados, tempos
+
+
+def _executar():
+    """Corpo da thread: espera o runtime existir, aquece e registra a versão aquecida"""
+    try:
+        limite = time.monotonic() + ESPERA_RUNTIME
+        while not runtime.exists() and time.monotonic() < limite:
+            time.sleep(0.05)
+
+        versao_dados, tempos = aquecer()
+        with _trava:
+            _estado['versoes'].add(versao_dados)
+            _estado['tempos'] = tempos
+        _LOGGER.info("Aquecimento dos caches concluído (versão %s) em %.1f s: %s", versao_dados,
+                     sum(tempos.values()), ', '.join(f'{nome} {tempo:.2f}s' for nome, tempo in tempos.items()))
+    except Exception:
+        _LOGGER.exception("Falha no aquecimento dos caches")
+    finally:
+        with _trava:
+            _estado['em_andamento'] = False
+
+
+def iniciar_aquecimento(versao_dados=None):
+    """Dispara o aquecimento em segundo plano, se ainda não feito para `versao_dados` neste processo.
+
+    Retorna True quando uma nova thread foi iniciada.
+    """
+    with _trava:
+        if _estado['em_andamento'] or versao_dados in _estado['versoes']:
+            return False
+        _estado['em_andamento'] = True
+    threading.Thread(target=_executar, name=NOME_THREAD, daemon=True).start()
+    return True
+
+
+if __name__ == '__main__':
+    from streamlit.web import cli
+
+    # Importa o próprio módulo pelo nome para que a página (que faz `from aquecimento import ...`)
+    # veja o mesmo estado, e não uma segunda cópia em __main__
+    import aquecimento
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s: %(message)s')
+    aquecimento.iniciar_aquecimento()
+    dashboard = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard.py')
+    sys.argv = ['streamlit', 'run', dashboard, *sys.argv[1:]]
+    sys.exit(cli.main())
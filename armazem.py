@@ -0,0 +1,196 @@
+"""Armazém em memória dos quadros derivados por local, com orçamento de bytes
+
+Séries por local e métricas derivadas delas (médias móveis, CFR) são
+calculadas sob demanda e guardadas aqui, compartilhadas por todas as sessões
+do processo. Cada entrada conta o próprio tamanho (memory_usage profundo do
+DataFrame); quando o total passa do orçamento, as usadas há mais tempo saem
+(LRU). Opcionalmente, as entradas removidas da memória descem para um
+diretório em Parquet e voltam de lá (mais barato que recalcular) na próxima
+consulta; o diretório também tem limite e poda LRU.
+
+As chaves são tuplas que começam pela versão dos dados, ex.:
+(versao_dados, 'metricas_local', 'Brazil'); entradas de versões antigas
+simplesmente envelhecem até sair.
+
+Configuração por variáveis de ambiente:
+
+- ARMAZEM_LIMITE_MB: orçamento em memória (padrão: 256)
+- ARMAZEM_DESCARGA: diretório para descarregar as entradas removidas (padrão: vazio, desligado)
+- ARMAZEM_DESCARGA_LIMITE_MB: limite do diretório de descarga (padrão: 1024)
+"""
+import functools
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from cache_compartilhado import AUSENTE, Estatisticas, gerar_chave
+
+_LOGGER = logging.getLogger(__name__)
+
+LIMITE_MEMORIA_MB = 256
+LIMITE_DESCARGA_MB = 1024
+
+
+def tamanho_bytes(quadro):
+    """Bytes ocupados pelo DataFrame, incluindo índice e conteúdo de colunas de texto"""
+    return int(quadro.memory_usage(deep=True, index=True).sum())
+
+
+class ArmazemQuadros:
+    """LRU de DataFrames limitado em bytes, com descarga opcional para Parquet"""
+
+    def __init__(self, limite_bytes=LIMITE_MEMORIA_MB * 1024 ** 2, diretorio_descarga=None,
+                 limite_descarga_bytes=LIMITE_DESCARGA_MB * 1024 ** 2):
+        self.limite_bytes = limite_bytes
+        self.diretorio_descarga = diretorio_descarga
+        self.limite_descarga_bytes = limite_descarga_bytes
+        self.estatisticas = Estatisticas(extras=('acertos_disco', 'descargas'))
+        self._entradas = OrderedDict()  # chave -> (quadro, bytes), da menos para a mais recente
+        self._bytes = 0
+        self._trava = threading.Lock()
+        if diretorio_descarga:
+            os.makedirs(diretorio_descarga, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio_descarga, f'{gerar_chave(chave)}.parquet')
+
+    def obter(self, chave):
+        """Quadro guardado em `chave` (da memória ou do disco) ou AUSENTE"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.estatisticas.contar('acertos')
+                return entrada[0]
+
+        if self.diretorio_descarga:
+            caminho = self._caminho(chave)
+            try:
+                quadro = pd.read_parquet(caminho)
+                os.utime(caminho)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                _LOGGER.warning("Descarga ilegível em %s; recalculando", caminho, exc_info=True)
+                self.estatisticas.contar('erros')
+            else:
+                self.estatisticas.contar('acertos_disco')
+                self._guardar(chave, quadro)
+                return quadro
+
+        self.estatisticas.contar('falhas')
+        return AUSENTE
+
+    def gravar(self, chave, quadro):
+        if not isinstance(quadro, pd.DataFrame):
+            raise TypeError(f"O armazém guarda DataFrames, não {type(quadro).__name__}")
+        self.estatisticas.contar('gravacoes')
+        self._guardar(chave, quadro)
+
+    def obter_ou_calcular(self, chave, calcular):
+        """Quadro de `chave`; na falta, `calcular()` e guarda o resultado.
+
+        O cálculo roda fora da trava: duas sessões pedindo a mesma chave ao
+        mesmo tempo podem calcular em dobro, mas nunca esperam uma pela outra.
+        """
+        quadro = self.obter(chave)
+        if quadro is AUSENTE:
+            quadro = calcular()
+            self.gravar(chave, quadro)
+        return quadro
+
+    def _guardar(self, chave, quadro):
+        tamanho = tamanho_bytes(quadro)
+        if tamanho > self.limite_bytes:
+            # Maior que o orçamento inteiro: não entra na memória (nem tira as demais)
+            self._descarregar([(chave, quadro)])
+            return
+        with self._trava:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[chave] = (quadro, tamanho)
+            self._bytes += tamanho
+            removidas = []
+            while self._bytes > self.limite_bytes:
+                chave_removida, (quadro_removido, tamanho_removido) = self._entradas.popitem(last=False)
+                self._bytes -= tamanho_removido
+                removidas.append((chave_removida, quadro_removido))
+            self.estatisticas.contar('remocoes', len(removidas))
+        self._descarregar(removidas)
+
+    def _descarregar(self, entradas):
+        """Grava em Parquet as entradas que saíram da memória (se houver diretório de descarga)"""
+        if not self.diretorio_descarga or not entradas:
+            return
+        for chave, quadro in entradas:
+            caminho = self._caminho(chave)
+            if os.path.exists(caminho):
+                continue
+            temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                quadro.to_parquet(temporario)
+                os.replace(temporario, caminho)
+            except Exception:
+                _LOGGER.warning("Falha ao descarregar entrada do armazém em %s", caminho, exc_info=True)
+                self.estatisticas.contar('erros')
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+                continue
+            self.estatisticas.contar('descargas')
+        self._podar_descarga()
+
+    def _podar_descarga(self):
+        """Remove os arquivos usados há mais tempo até o diretório caber no limite"""
+        arquivos = []
+        for entrada in os.scandir(self.diretorio_descarga):
+            if entrada.name.endswith('.parquet'):
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((info.st_mtime, info.st_size, entrada.path))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.limite_descarga_bytes:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+        if self.diretorio_descarga:
+            for entrada in os.scandir(self.diretorio_descarga):
+                if entrada.name.endswith('.parquet'):
+                    os.remove(entrada.path)
+
+    def resumo(self):
+        """Estatísticas mais a ocupação atual (memória e, se houver, disco)"""
+        with self._trava:
+            ocupacao = {'entradas': len(self._entradas), 'bytes': self._bytes, 'limite_bytes': self.limite_bytes}
+        if self.diretorio_descarga:
+            arquivos = [entrada.stat().st_size for entrada in os.scandir(self.diretorio_descarga)
+                        if entrada.name.endswith('.parquet')]
+            ocupacao.update(entradas_disco=len(arquivos), bytes_disco=sum(arquivos))
+        resumo = {**self.estatisticas.como_dict(), **ocupacao}
+        # Acerto no disco também conta: só uma falha completa leva a recalcular
+        consultas = resumo['acertos'] + resumo['acertos_disco'] + resumo['falhas']
+        resumo['taxa_acerto'] = (resumo['acertos'] + resumo['acertos_disco']) / consultas if consultas else 0.0
+        return resumo
+
+
+@functools.lru_cache(maxsize=None)
+def armazem_configurado():
+    """Armazém do processo, configurado pelas variáveis de ambiente"""
+    limite_mb = float(os.environ.get('ARMAZEM_LIMITE_MB', LIMITE_MEMORIA_MB))
+    limite_descarga_mb = float(os.environ.get('ARMAZEM_DESCARGA_LIMITE_MB', LIMITE_DESCARGA_MB))
+    return ArmazemQuadros(int(limite_mb * 1024 ** 2), os.environ.get('ARMAZEM_DESCARGA') or None,
+                          int(limite_descarga_mb * 1024 ** 2))
@@ -0,0 +1,128 @@
+"""Benchmark: API somente leitura (api.py) com um cliente HTTP local
+
+Grava um snapshot sintético num diretório temporário, sobe a API em thread e,
+só com urllib:
+
+1. confere (asserts) que as respostas batem com os cálculos da página: KPIs
+   pela regra de get_latest_valid_value, janelas de 90/180 dias pelo
+   ConsultasPandas.resumo_janelas, indicadores da tabela e JSON igual ao Arrow IPC;
+2. confere o ETag (304 com If-None-Match) e o cache de respostas;
+3. mede a latência de uma consulta a frio, repetida (cache) e revalidada (304),
+   e um lote com todos os locais contra uma requisição por local.
+Uso: python benchmarks/bench_api.py
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+from api import ServidorAPI  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from consultas import COLUNAS_KPIS, ConsultasPandas, get_latest_valid_value  # noqa: E402
+from snapshots import apontar, criar_snapshot  # noqa: E402
+
+LOCAIS = ['World', 'Brazil', 'Japan', 'Australia']
+
+
+def pedir(url, caminho, parametros=(), cabecalhos=None):
+    """(status, cabeçalhos, corpo, segundos) de um GET"""
+    pedido = urllib.request.Request(f'{url}{caminho}?{urlencode(parametros)}', headers=cabecalhos or {})
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(pedido) as resposta:
+            return resposta.status, resposta.headers, resposta.read(), time.perf_counter() - inicio
+    except urllib.error.HTTPError as erro:
+        return erro.code, erro.headers, erro.read(), time.perf_counter() - inicio
+
+
+def como_df(corpo):
+    return pd.DataFrame(json.loads(corpo)['dados'])
+
+
+def conferir(url, df):
+    consultas = ConsultasPandas(df)
+    inicio, fim = pd.Timestamp('2020-01-01'), pd.Timestamp('2023-12-31')
+    locais = [('local', local) for local in LOCAIS]
+
+    kpis = como_df(pedir(url, '/v1/kpis', locais)[2]).set_index('location')
+    for local in LOCAIS:
+        serie = consultas.serie(local, inicio, fim)
+        for coluna in COLUNAS_KPIS:
+            assert kpis.loc[local, coluna] == get_latest_valid_value(serie, coluna), (local, coluna)
+
+    janelas = como_df(pedir(url, '/v1/janelas', locais)[2])
+    for local in LOCAIS:
+        serie = consultas.serie(local, inicio, fim)
+        evento = serie.loc[serie['people_vaccinated'] > 0, 'date'].min()
+        for dias in (90, 180):
+            esperado = consultas.resumo_janelas(local, evento, dias, inicio, fim)
+            for periodo in ('antes', 'depois'):
+                linha = janelas[(janelas['location'] == local) & (janelas['janela_dias'] == dias)
+                                & (janelas['periodo'] == periodo)].iloc[0]
+                for campo, valor in esperado[periodo].items():
+                    assert np.isclose(valor, linha[campo], equal_nan=True), (local, dias, periodo, campo)
+
+    indicadores = como_df(pedir(url, '/v1/indicadores', locais)[2]).set_index('location').sort_index()
+    indicadores['inicio_vacinacao'] = pd.to_datetime(indicadores['inicio_vacinacao'])
+    pd.testing.assert_frame_equal(indicadores, consultas.indicadores_por_local().loc[sorted(LOCAIS)], check_dtype=False)
+
+    parametros = locais + [('coluna', 'new_deaths'), ('coluna', 'vac_coverage_pct'), ('inicio', '2021-01-01')]
+    via_json = como_df(pedir(url, '/v1/serie', parametros)[2])
+    via_arrow = pa.ipc.open_stream(io.BytesIO(pedir(url, '/v1/serie', parametros + [('formato', 'arrow')])[2])).read_pandas()
+    via_json['date'] = pd.to_datetime(via_json['date'])
+    pd.testing.assert_frame_equal(via_json, via_arrow, check_dtype=False)
+
+    status, cabecalhos, _, _ = pedir(url, '/v1/kpis', locais)
+    status_304 = pedir(url, '/v1/kpis', locais, {'If-None-Match': cabecalhos['ETag']})[0]
+    assert (status, status_304) == (200, 304), (status, status_304)
+    assert pedir(url, '/v1/kpis', [('local', 'Atlântida')])[0] == 404
+
+
+def main(n_locais=250):
+    with tempfile.TemporaryDirectory() as diretorio:
+        df = preparar_dados(gerar_owid_dashboard(n_locais=n_locais))
+        apontar(criar_snapshot(df, 'sintetico', diretorio=diretorio)['hash'], diretorio=diretorio)
+        todos = sorted(df['location'].unique())
+
+        with ServidorAPI(('127.0.0.1', 0), diretorio) as servidor:
+            url = servidor.url
+            _, _, _, tempo_carga = pedir(url, '/v1/versao')
+            print(f"{n_locais} locais; primeira requisição (carrega o snapshot): {tempo_carga:.2f} s")
+
+            conferir(url, df)
+            print("Conferência: KPIs, janelas 90/180 d, indicadores e JSON = Arrow batem com os cálculos da página; ETag/304 ok")
+
+            parametros = [('local', 'Brazil'), ('dias', '180')]
+            _, cabecalhos, _, frio = pedir(url, '/v1/janelas', parametros)
+            _, _, _, em_cache = pedir(url, '/v1/janelas', parametros)
+            _, _, _, revalidado = pedir(url, '/v1/janelas', parametros, {'If-None-Match': cabecalhos['ETag']})
+            print(f"\n/v1/janelas (1 local): a frio {frio * 1000:.1f} ms · em cache {em_cache * 1000:.1f} ms · "
+                  f"304 {revalidado * 1000:.1f} ms")
+
+            for rota in ('/v1/kpis', '/v1/janelas'):
+                inicio = time.perf_counter()
+                for local in todos:
+                    pedir(url, rota, [('local', local), ('fim', '2023-06-30')])
+                uma_por_local = time.perf_counter() - inicio
+                _, _, corpo, lote = pedir(url, rota, [('local', local) for local in todos] + [('fim', '2023-06-29')])
+                print(f"{rota}: {len(todos)} requisições {uma_por_local:.2f} s · lote único {lote:.2f} s "
+                      f"({json.loads(corpo)['linhas']} linhas)")
+
+            _, _, corpo, _ = pedir(url, '/v1/versao')
+            print(f"\nCache de respostas: {json.loads(corpo)['cache_respostas']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: primeiro visitante com e sem pré-aquecimento dos caches
+
+Sobe o servidor duas vezes sobre os mesmos dados sintéticos (num diretório
+temporário, sem rede): com `streamlit run dashboard.py` e com
+`python aquecimento.py`. No segundo caso o visitante chega depois do log de
+aquecimento concluído, como num deploy. Mede, para a primeira sessão, o tempo
+até o primeiro conteúdo (primeiro byte da página) e até a página completa.
+
+Antes, confere (asserts) que uma busca de dados com falha, na thread de
+aquecimento, termina em exceção comum (sem st.stop, que mataria a thread) e
+que, com um snapshot anterior, a versão segue com ele e devolve o aviso para a
+página exibir.
+Uso: python benchmarks/bench_aquecimento.py
+"""
+import os
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_dados  # noqa: E402
+from aquecimento import aquecer  # noqa: E402
+from benchmarks.cliente_streamlit import servidor, sessao  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from snapshots import apontar, criar_snapshot  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODOS = {
+    'sem aquecimento': ['-m', 'streamlit', 'run', os.path.join(RAIZ, 'dashboard.py')],
+    'com aquecimento': [os.path.join(RAIZ, 'aquecimento.py')]
+}
+
+
+def na_thread(funcao):
+    """Executa `funcao` numa thread à parte; retorna (resultado, exceção), como na thread de aquecimento"""
+    saida = {'resultado': None, 'erro': None}
+
+    def corpo():
+        try:
+            saida['resultado'] = funcao()
+        except BaseException as erro:
+            saida['erro'] = erro
+
+    thread = threading.Thread(target=corpo)
+    thread.start()
+    thread.join()
+    return saida['resultado'], saida['erro']
+
+
+def conferir_falha_de_busca():
+    inicial, url_inicial, validade = os.getcwd(), os.environ.get('OWID_URL'), cache_dados.VALIDADE_SNAPSHOT
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        os.environ['OWID_URL'] = os.path.join(diretorio, 'inexistente.csv')
+        try:
+            # Sem snapshot: a falha chega como exceção comum (registrada por _executar)
+            _, erro = na_thread(aquecer)
+            assert isinstance(erro, Exception), repr(erro)
+
+            # Com snapshot vencido: segue com ele e devolve o aviso, sem tocar no Streamlit
+            hash_anterior = apontar(criar_snapshot(cache_dados.preparar_dados(gerar_owid_dashboard(n_locais=5)),
+                                                   'sintetico')['hash'])['hash']
+            cache_dados.VALIDADE_SNAPSHOT = timedelta(0)
+            cache_dados._ultima_falha['quando'] = float('-inf')
+            (versao, aviso), erro = na_thread(cache_dados.versao_atual)
+            assert erro is None and versao == hash_anterior and hash_anterior[:12] in aviso, (erro, aviso)
+        finally:
+            cache_dados.VALIDADE_SNAPSHOT = validade
+            cache_dados._ultima_falha['quando'] = float('-inf')
+            if url_inicial is None:
+                os.environ.pop('OWID_URL', None)
+            else:
+                os.environ['OWID_URL'] = url_inicial
+            os.chdir(inicial)
+    print("Conferência: falha da busca na thread vira exceção comum ou aviso para a página\n")
+
+
+def main(n_locais=250):
+    conferir_falha_de_busca()
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerar_owid_dashboard(n_locais=n_locais).to_csv(os.path.join(diretorio, 'owid-covid-data.csv'), index=False)
+        print(f"{n_locais} locais sintéticos")
+        print(f"{'modo':>16} {'aquecimento (s)':>16} {'1º conteúdo (s)':>16} {'página completa (s)':>20}")
+
+        for nome, argumentos in MODOS.items():
+            with servidor(argumentos, diretorio) as instancia:
+                linha_log = ''
+                if nome == 'com aquecimento':
+                    linha_log = instancia.aguardar_log('Aquecimento dos caches concluído') or ''
+                duracao = linha_log.split(' em ')[-1].split(' s')[0] if linha_log else '—'
+                medidas = sessao(instancia.url)
+                print(f"{nome:>16} {duracao:>16} {medidas['primeiro_conteudo']:>16.2f} {medidas['completo']:>20.2f}")
+
+
+if __name__ == '__main__':
+    main()
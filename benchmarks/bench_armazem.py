@@ -0,0 +1,96 @@
+"""Benchmark: armazém de quadros por local (armazem.py) com orçamento de memória
+
+Com dados sintéticos de 250 locais, consulta a série e as métricas derivadas
+(médias móveis e CFR, como na página) de locais sorteados com popularidade
+de Zipf, sob orçamentos de memória diferentes, com e sem descarga em disco.
+Relata bytes em uso, remoções, taxa de acerto e o custo de uma consulta
+calculada, lida da memória e lida de volta do Parquet.
+
+Confere (assert) que o uso nunca passa do orçamento e que um quadro que
+desceu para o disco volta idêntico.
+Uso: python benchmarks/bench_armazem.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from armazem import ArmazemQuadros, tamanho_bytes  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from consultas import ConsultasPandas, metricas_derivadas  # noqa: E402
+
+CONSULTAS = 3000
+ORCAMENTOS_MB = [8, 32, 128]
+
+
+def simular(armazem, consultas, locais, sorteio, inicio, fim):
+    """Percorre os locais sorteados; retorna os segundos de cada consulta"""
+    tempos = []
+    for indice in sorteio:
+        local = locais[indice]
+        comeco = time.perf_counter()
+        serie = armazem.obter_ou_calcular(('v', 'serie_local', local), lambda: consultas.serie(local, inicio, fim))
+        armazem.obter_ou_calcular(('v', 'metricas_local', local), lambda: metricas_derivadas(serie))
+        tempos.append(time.perf_counter() - comeco)
+        assert armazem.resumo()['bytes'] <= armazem.limite_bytes
+    return np.array(tempos)
+
+
+def main(n_locais=250):
+    df = preparar_dados(gerar_owid_dashboard(n_locais=n_locais))
+    consultas = ConsultasPandas(df)
+    inicio, fim = df['date'].min(), df['date'].max()
+    locais = sorted(df['location'].unique())
+    rng = np.random.default_rng(42)
+    # Popularidade de Zipf: poucos locais muito procurados e uma cauda longa
+    pesos = 1 / np.arange(1, len(locais) + 1)
+    sorteio = rng.choice(len(locais), size=CONSULTAS, p=pesos / pesos.sum())
+
+    exemplo = consultas.serie(locais[0], inicio, fim)
+    por_local = tamanho_bytes(exemplo) + tamanho_bytes(metricas_derivadas(exemplo))
+    print(f"{n_locais} locais · ~{por_local / 1024 ** 2:.2f} MB por local (série + métricas) · "
+          f"todos os locais: ~{por_local * n_locais / 1024 ** 2:.0f} MB · {CONSULTAS} consultas (Zipf)\n")
+
+    print(f"{'orçamento':>10} {'descarga':>9} {'em uso (MB)':>12} {'quadros':>8} {'remoções':>9} "
+          f"{'acerto mem.':>12} {'acerto disco':>13} {'taxa':>6} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for orcamento in ORCAMENTOS_MB:
+        for com_descarga in (False, True):
+            with tempfile.TemporaryDirectory() as diretorio:
+                armazem = ArmazemQuadros(orcamento * 1024 ** 2, diretorio if com_descarga else None)
+                tempos = simular(armazem, consultas, locais, sorteio, inicio, fim) * 1000
+                resumo = armazem.resumo()
+                print(f"{orcamento:>7} MB {'sim' if com_descarga else 'não':>9} {resumo['bytes'] / 1024 ** 2:>12.1f} "
+                      f"{resumo['entradas']:>8} {resumo['remocoes']:>9} {resumo['acertos']:>12} "
+                      f"{resumo['acertos_disco']:>13} {resumo['taxa_acerto']:>6.0%} "
+                      f"{np.percentile(tempos, 50):>9.2f} {np.percentile(tempos, 95):>9.2f}")
+
+    # Custo de cada caminho para um local e ida e volta pelo Parquet
+    with tempfile.TemporaryDirectory() as diretorio:
+        local = locais[-1]
+        armazem = ArmazemQuadros(1024 ** 2, diretorio)
+        comeco = time.perf_counter()
+        serie = armazem.obter_ou_calcular(('v', 'serie_local', local), lambda: consultas.serie(local, inicio, fim))
+        original = armazem.obter_ou_calcular(('v', 'metricas_local', local), lambda: metricas_derivadas(serie))
+        calculado = time.perf_counter() - comeco
+        comeco = time.perf_counter()
+        armazem.obter(('v', 'metricas_local', local))
+        memoria = time.perf_counter() - comeco
+        # Enche a memória com outros locais para empurrar este para o disco
+        for outro in locais[:20]:
+            armazem.obter_ou_calcular(('v', 'serie_local', outro), lambda: consultas.serie(outro, inicio, fim))
+        comeco = time.perf_counter()
+        de_volta = armazem.obter(('v', 'metricas_local', local))
+        disco = time.perf_counter() - comeco
+        pd.testing.assert_frame_equal(original, de_volta)
+        print(f"\nUm local: calculado {calculado * 1000:.2f} ms · memória {memoria * 1000:.3f} ms · "
+              f"de volta do Parquet {disco * 1000:.2f} ms (idêntico ao original)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Benchmark: cache de resultados compartilhado entre réplicas
+
+Cada "réplica" é um processo novo que executa todas as cargas da visão padrão
+(aquecimento.aquecer, o mesmo caminho do dashboard) sobre dados sintéticos. A
+primeira réplica calcula e grava; a segunda deveria só ler. Roda com o backend
+em disco (com e sem limite apertado, para forçar remoções LRU) e com o backend
+Redis apontando para o servidor RESP em processo (benchmarks/servidor_resp.py).
+Com o limite apertado, as cargas percorrem mais dados do que cabem no cache,
+o pior caso do LRU: cada gravação remove a entrada que a réplica seguinte
+leria logo depois. Confere (asserts) também que um deploy com outro código
+não lê as entradas gravadas pela versão anterior (e que a leitura conta como
+falha), e que, com CACHE_SEGREDO, uma entrada adulterada ou assinada com outro
+segredo é descartada sem ser desserializada.
+Uso: python benchmarks/bench_cache_compartilhado.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from benchmarks.servidor_resp import ServidorRespLocal  # noqa: E402
+import cache_compartilhado  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODIGO_REPLICA = """
+import json, logging, time
+logging.disable(logging.WARNING)
+inicio = time.perf_counter()
+from aquecimento import aquecer
+from cache_compartilhado import backend_configurado
+_, tempos = aquecer()
+print(json.dumps({'total': time.perf_counter() - inicio, 'tempos': tempos, 'resumo': backend_configurado().resumo()}))
+"""
+
+
+def replica(diretorio, ambiente):
+    """Executa uma réplica num processo novo e devolve o tempo total e o resumo do backend"""
+    saida = subprocess.run([sys.executable, '-c', CODIGO_REPLICA], cwd=diretorio, capture_output=True, text=True,
+                           env={**os.environ, 'PYTHONPATH': RAIZ, **ambiente}, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def cenario(nome, diretorio, ambiente):
+    print(f"\n{nome}")
+    print(f"{'réplica':>9} {'total (s)':>10} {'acertos':>8} {'falhas':>7} {'taxa':>6} {'remoções':>9} {'ocupação (MB)':>14}")
+    for indice in (1, 2):
+        medida = replica(diretorio, ambiente)
+        resumo = medida['resumo']
+        print(f"{indice:>9} {medida['total']:>10.2f} {resumo['acertos']:>8} {resumo['falhas']:>7} "
+              f"{resumo['taxa_acerto']:>6.0%} {resumo['remocoes']:>9} {resumo['bytes'] / 1024 ** 2:>14.1f}")
+
+
+class Armadilha:
+    """Payload que marca `DESSERIALIZADOS` se algum dia chegar ao pickle.loads"""
+
+    def __reduce__(self):
+        return DESSERIALIZADOS.append, ('armadilha',)
+
+
+DESSERIALIZADOS = []
+
+
+def conferir_versao_codigo(diretorio):
+    """Mesmos parâmetros, outra versão do código: a entrada antiga não é devolvida"""
+    calculos = []
+
+    @cache_compartilhado.compartilhado
+    def carregar(versao_dados):
+        calculos.append(cache_compartilhado.versao_codigo())
+        return calculos[-1]
+
+    original = cache_compartilhado.versao_codigo
+    os.environ.update({'CACHE_COMPARTILHADO': 'disco', 'CACHE_DIRETORIO': os.path.join(diretorio, 'cache_versoes')})
+    cache_compartilhado.backend_configurado.cache_clear()
+    try:
+        assert carregar('v1') == carregar('v1') and len(calculos) == 1
+        cache_compartilhado.versao_codigo = lambda: 'f' * 64  # deploy com outro código
+        assert carregar('v1') == 'f' * 64 and len(calculos) == 2
+        cache_compartilhado.versao_codigo = original
+        assert carregar('v1') == original() and len(calculos) == 2
+
+        # Envelope de outra versão gravado na mesma chave: recalcula e conta como falha, não acerto
+        backend = cache_compartilhado.backend_configurado()
+        [arquivo] = [nome for nome in os.listdir(backend.diretorio) if nome.startswith(original()[:16])]
+        chave = arquivo[:-len('.pkl')]
+        backend.gravar(chave, ('f' * 64, chave, 'antigo'))
+        antes = backend.estatisticas.como_dict()
+        assert carregar('v1') == original() and len(calculos) == 3
+        depois = backend.estatisticas.como_dict()
+        assert depois['acertos'] == antes['acertos'] and depois['falhas'] == antes['falhas'] + 1
+    finally:
+        cache_compartilhado.versao_codigo = original
+        del os.environ['CACHE_COMPARTILHADO'], os.environ['CACHE_DIRETORIO']
+        cache_compartilhado.backend_configurado.cache_clear()
+    print("Conferência: entradas de outra versão do código não são lidas e contam como falha")
+
+
+def conferir_autenticacao(diretorio):
+    """Com CACHE_SEGREDO, entradas sem a etiqueta HMAC certa nunca chegam ao pickle.loads"""
+    calculos = []
+
+    @cache_compartilhado.compartilhado
+    def carregar(versao_dados):
+        calculos.append(versao_dados)
+        return versao_dados
+
+    os.environ.update({'CACHE_COMPARTILHADO': 'disco', 'CACHE_DIRETORIO': os.path.join(diretorio, 'cache_hmac'),
+                       'CACHE_SEGREDO': 'segredo-do-deploy'})
+    cache_compartilhado.backend_configurado.cache_clear()
+    try:
+        assert carregar('v1') == carregar('v1') and len(calculos) == 1
+        backend = cache_compartilhado.backend_configurado()
+        [arquivo] = os.listdir(backend.diretorio)
+        caminho = os.path.join(backend.diretorio, arquivo)
+        chave = arquivo[:-len('.pkl')]
+
+        invasores = (
+            cache_compartilhado.serializar(Armadilha()),  # sem etiqueta
+            cache_compartilhado.serializar(Armadilha(), b'outro-segredo'),  # assinada com outro segredo
+        )
+        for dados in invasores:
+            with open(caminho, 'wb') as saida:
+                saida.write(dados)
+            falhas = backend.estatisticas.como_dict()['falhas']
+            assert carregar('v1') == 'v1'
+            assert backend.estatisticas.como_dict()['falhas'] == falhas + 1
+        assert len(calculos) == 3 and not DESSERIALIZADOS
+
+        # A entrada regravada pelo recálculo volta a ser lida
+        assert carregar('v1') == 'v1' and len(calculos) == 3
+        assert backend.obter(chave)[2] == 'v1'
+    finally:
+        del os.environ['CACHE_COMPARTILHADO'], os.environ['CACHE_DIRETORIO'], os.environ['CACHE_SEGREDO']
+        cache_compartilhado.backend_configurado.cache_clear()
+    print("Conferência: com CACHE_SEGREDO, entradas adulteradas são descartadas sem desserializar")
+
+
+def main(n_locais=250):
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerar_owid_dashboard(n_locais=n_locais).to_csv(os.path.join(diretorio, 'owid-covid-data.csv'), index=False)
+        conferir_versao_codigo(diretorio)
+        conferir_autenticacao(diretorio)
+        print(f"{n_locais} locais sintéticos; cada réplica executa todas as cargas da visão padrão")
+
+        cenario("Disco (limite 2 GB)", diretorio, {
+            'CACHE_COMPARTILHADO': 'disco', 'CACHE_DIRETORIO': os.path.join(diretorio, 'cache_grande')
+        })
+        cenario("Disco (limite 10 MB, força remoções LRU)", diretorio, {
+            'CACHE_COMPARTILHADO': 'disco', 'CACHE_DIRETORIO': os.path.join(diretorio, 'cache_pequeno'),
+            'CACHE_LIMITE_MB': '10'
+        })
+        with ServidorRespLocal() as servidor:
+            cenario("Redis (servidor RESP em processo)", diretorio, {
+                'CACHE_COMPARTILHADO': 'redis', 'CACHE_REDIS_URL': servidor.url, 'CACHE_SEGREDO': 'segredo-do-deploy'
+            })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: consultas da página com pandas (frame em memória) e DuckDB (Parquet do snapshot)
+
+Grava um snapshot com dados sintéticos e:
+
+1. confere que os dois backends devolvem os mesmos recortes, janelas antes/depois
+   e indicadores por local (asserts; o benchmark falha se divergirem);
+2. mede, cada backend num processo novo, o pico de memória (RSS) e a latência
+   das consultas de uma visita: recorte do local, janelas de 3 e 6 meses e
+   recorte de 6 meses com duas colunas. O pandas inclui a leitura do snapshot
+   inteiro, que é o que a página faz hoje antes de filtrar.
+Uso: python benchmarks/bench_consultas.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from consultas import ConsultasDuckDB, ConsultasPandas  # noqa: E402
+from snapshots import ARQUIVO_DADOS, carregar_snapshot, criar_snapshot  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCAIS = ['World', 'Brazil', 'Japan', 'Australia']
+PERIODOS = [('2020-01-01', '2023-12-31'), ('2021-01-01', '2021-12-31'), ('2022-06-01', '2024-12-31')]
+
+CODIGO_VISITA = """
+import json, sys, time
+import pandas as pd
+from consultas import ConsultasDuckDB, ConsultasPandas
+from snapshots import carregar_snapshot
+
+def pico_rss_mb():
+    # VmHWM (e não ru_maxrss, que no Linux herda o pico do processo pai)
+    with open('/proc/self/status') as status:
+        return next(int(linha.split()[1]) for linha in status if linha.startswith('VmHWM')) / 1024
+
+backend, diretorio, hash_dados, caminho = sys.argv[1:5]
+inicio, fim = pd.Timestamp('2020-01-01'), pd.Timestamp('2023-12-31')
+tempos = []
+for repeticao in range(6):
+    comeco = time.perf_counter()
+    if repeticao == 0:
+        consultas = (ConsultasPandas(carregar_snapshot(hash_dados, diretorio)) if backend == 'pandas'
+                     else ConsultasDuckDB(caminho))
+    for local in ('Brazil', 'Japan', 'World'):
+        serie = consultas.serie(local, inicio, fim)
+        evento = serie.loc[serie['people_vaccinated'] > 0, 'date'].min()
+        consultas.resumo_janelas(local, evento, 90, inicio, fim)
+        consultas.resumo_janelas(local, evento, 180, inicio, fim)
+        consultas.serie(local, evento - pd.Timedelta(days=180), evento + pd.Timedelta(days=180), ['date', 'new_deaths'])
+    tempos.append(time.perf_counter() - comeco)
+print(json.dumps({'primeira': tempos[0], 'seguintes': sorted(tempos[1:])[len(tempos[1:]) // 2],
+                  'rss_mb': pico_rss_mb()}))
+"""
+
+
+def conferir_equivalencia(pandas_, duckdb_):
+    """Falha (AssertionError) se os backends divergirem em algum recorte, janela ou indicador"""
+    for local in LOCAIS:
+        for de, ate in PERIODOS:
+            inicio, fim = pd.Timestamp(de), pd.Timestamp(ate)
+            serie = pandas_.serie(local, inicio, fim)
+            pd.testing.assert_frame_equal(serie, duckdb_.serie(local, inicio, fim), check_dtype=False)
+            pd.testing.assert_frame_equal(pandas_.serie(local, inicio, fim, ['date', 'new_deaths']),
+                                          duckdb_.serie(local, inicio, fim, ['date', 'new_deaths']), check_dtype=False)
+
+            evento = serie.loc[serie['people_vaccinated'] > 0, 'date'].min()
+            for data in [evento, inicio + pd.Timedelta(days=30)] if pd.notna(evento) else [inicio + pd.Timedelta(days=30)]:
+                for dias in (90, 180):
+                    esperado = pandas_.resumo_janelas(local, data, dias, inicio, fim)
+                    obtido = duckdb_.resumo_janelas(local, data, dias, inicio, fim)
+                    for periodo in ('antes', 'depois'):
+                        for campo, valor in esperado[periodo].items():
+                            assert np.isclose(valor, obtido[periodo][campo], equal_nan=True), \
+                                (local, de, data, dias, periodo, campo, valor, obtido[periodo][campo])
+
+    pd.testing.assert_frame_equal(pandas_.indicadores_por_local(), duckdb_.indicadores_por_local(), check_dtype=False)
+
+
+def visita(backend, diretorio, hash_dados):
+    saida = subprocess.run([sys.executable, '-c', CODIGO_VISITA, backend, diretorio, hash_dados,
+                            os.path.join(diretorio, hash_dados, ARQUIVO_DADOS)],
+                           capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': RAIZ}, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main(n_locais=250):
+    with tempfile.TemporaryDirectory() as diretorio:
+        df = preparar_dados(gerar_owid_dashboard(n_locais=n_locais))
+        manifesto = criar_snapshot(df, 'sintetico', diretorio=diretorio)
+        del df
+        print(f"{n_locais} locais, {manifesto['linhas']:,} linhas; Parquet {manifesto['bytes'] / 1024 ** 2:.1f} MB")
+
+        conferir_equivalencia(ConsultasPandas(carregar_snapshot(manifesto['hash'], diretorio)),
+                              ConsultasDuckDB(os.path.join(diretorio, manifesto['hash'], ARQUIVO_DADOS)))
+        print(f"Equivalência pandas × DuckDB: ok ({len(LOCAIS)} locais × {len(PERIODOS)} períodos, "
+              f"janelas de 90/180 dias, indicadores de todos os locais)")
+
+        print(f"\n{'backend':>8} {'1ª visita (s)':>14} {'visitas seguintes (ms)':>23} {'pico RSS (MB)':>14}")
+        for backend in ('pandas', 'duckdb'):
+            medida = visita(backend, diretorio, manifesto['hash'])
+            print(f"{backend:>8} {medida['primeira']:>14.2f} {medida['seguintes'] * 1000:>23.1f} {medida['rss_mb']:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: simulação contrafactual no processo atual × pool de processos
+
+Com dados sintéticos:
+
+1. confere (asserts) que, para a mesma semente, simular no processo atual
+   (`processos=1`, o caminho da página) e no pool de processos dá o mesmo
+   resultado, em cada cenário, e mede o ganho do pool;
+2. roda precalcular_contrafactual.precalcular num cache compartilhado em disco
+   temporário e confere que a chamada da página (sem pool) lê do cache o
+   mesmo resultado, sem simular de novo.
+Uso: python benchmarks/bench_contrafactual.py
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_compartilhado import backend_configurado  # noqa: E402
+from cache_dados import carregar_contrafactual, preparar_dados  # noqa: E402
+from contrafactual import CENARIOS, grade_cenarios, pool_processos, preparar_componentes, simular  # noqa: E402
+from precalcular_contrafactual import precalcular  # noqa: E402
+
+REPETICOES = 3
+
+
+def medir(componentes, processos, n_simulacoes):
+    """(resultado, melhor tempo em s) de `REPETICOES` simulações"""
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = simular(componentes, n_simulacoes, processos=processos)
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, min(tempos)
+
+
+def conferir_precalculo(df, versao_dados):
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.environ.update(CACHE_COMPARTILHADO='disco', CACHE_DIRETORIO=diretorio)
+        backend_configurado.cache_clear()
+        try:
+            inicio = time.perf_counter()
+            tempos = precalcular(df, versao_dados)
+            total = time.perf_counter() - inicio
+            backend = backend_configurado()
+            assert backend.resumo()['entradas'] == len(tempos) == len(list(grade_cenarios()))
+
+            # A página chama sem pool; limpando o st.cache_data, a resposta só pode vir do backend
+            carregar_contrafactual.clear()
+            acertos = backend.estatisticas.como_dict()['acertos']
+            for cenario, atraso, horizonte in grade_cenarios():
+                pagina = carregar_contrafactual(df, versao_dados, cenario, atraso, horizonte)
+                esperado = simular(preparar_componentes(df, cenario, atraso, horizonte=horizonte), processos=1)
+                pd.testing.assert_frame_equal(pagina, esperado)
+            assert backend.estatisticas.como_dict()['acertos'] - acertos == len(tempos)
+        finally:
+            os.environ.pop('CACHE_COMPARTILHADO')
+            os.environ.pop('CACHE_DIRETORIO')
+            backend_configurado.cache_clear()
+            carregar_contrafactual.clear()
+    print(f"\nPré-cálculo: {len(tempos)} cenários no cache em {total:.1f} s; a página leu todos do cache "
+          "(iguais à simulação sem pool)")
+
+
+def main(n_locais=250, n_simulacoes=20_000):
+    logging.disable(logging.WARNING)
+    df = preparar_dados(gerar_owid_dashboard(n_locais=n_locais))
+    pool_processos(None).submit(int).result()  # sobe os processos antes de medir
+    print(f"{n_locais} locais · {n_simulacoes:,} simulações · {os.cpu_count()} CPUs\n")
+    print(f"{'cenário':<30} {'processo (s)':>13} {'pool (s)':>10} {'ganho':>7}")
+    for nome, cenario in CENARIOS.items():
+        componentes = preparar_componentes(df, cenario, atraso=60)
+        sequencial, tempo_sequencial = medir(componentes, 1, n_simulacoes)
+        paralelo, tempo_pool = medir(componentes, None, n_simulacoes)
+        pd.testing.assert_frame_equal(sequencial, paralelo)
+        print(f"{nome:<30} {tempo_sequencial:>13.2f} {tempo_pool:>10.2f} {tempo_sequencial / tempo_pool:>6.1f}x")
+    print("Conferência: pool e processo atual dão o mesmo resultado para a mesma semente")
+
+    conferir_precalculo(df, 'sintetico')
+
+
+if __name__ == '__main__':
+    main()
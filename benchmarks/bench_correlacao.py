@@ -0,0 +1,56 @@
+"""Benchmark: matrizes de correlação para ~50 métricas × 250 locais
+
+Mede o cálculo a frio (Pearson e Spearman) e a leitura de uma matriz já
+calculada, e confere o Pearson de um local contra DataFrame.corr().
+Uso: python benchmarks/bench_correlacao.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid  # noqa: E402
+from correlacao import calcular_correlacoes, matriz_local, matriz_media, metricas_numericas  # noqa: E402
+
+
+def gerar_metricas(n_locais=250, n_metricas=50, semente=3):
+    """Completa o quadro sintético com métricas derivadas ruidosas e ~15% de NaN"""
+    rng = np.random.default_rng(semente)
+    df = gerar_owid(n_locais=n_locais)
+    base = df[['new_cases', 'new_deaths', 'people_vaccinated']].to_numpy()
+    for i in range(n_metricas - 5):
+        valores = base[:, i % 3] * rng.uniform(0.5, 2) + rng.normal(0, base[:, i % 3].std(), len(df))
+        valores[rng.random(len(df)) < 0.15] = np.nan
+        df[f'metrica_{i:02d}'] = valores
+    return df
+
+
+def main():
+    df = gerar_metricas()
+    metricas = metricas_numericas(df)
+    print(f"{df['location'].nunique()} locais × {len(metricas)} métricas × {df['date'].nunique()} dias")
+
+    for metodo in ('pearson', 'spearman'):
+        inicio = time.perf_counter()
+        correlacoes = calcular_correlacoes(df, metodo)
+        print(f"{metodo:>9}: cálculo a frio em {time.perf_counter() - inicio:.2f} s")
+
+    inicio = time.perf_counter()
+    for local in correlacoes['locais'][:100]:
+        matriz_local(correlacoes, local)
+    matriz_media(correlacoes)
+    print(f"Leitura de 100 matrizes + média entre locais (resultado em cache): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    correlacoes = calcular_correlacoes(df, 'pearson')
+    local = correlacoes['locais'][0]
+    referencia = df[df['location'] == local][metricas].corr()
+    erro = np.nanmax(np.abs(matriz_local(correlacoes, local).to_numpy() - referencia.to_numpy()))
+    print(f"Diferença máxima para DataFrame.corr() em {local}: {erro:.2e}")
+    assert erro < 1e-9
+
+
+if __name__ == '__main__':
+    main()
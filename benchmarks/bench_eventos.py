@@ -0,0 +1,118 @@
+"""Benchmark: estudo de eventos (eventos.py) sobre todos os locais numa passada
+
+Com dados sintéticos e a tabela empacotada (dados/eventos.csv):
+
+1. confere (asserts) que as janelas antes/depois do início da vacinação batem
+   com resumo_janelas_por_local e que as curvas alinhadas e as faixas batem com
+   a coorte da vacinação (calcular_coorte_vacinacao);
+2. confere as janelas de uma amostra de eventos da tabela (globais e por
+   local) contra ConsultasPandas.resumo_janelas, evento a evento;
+3. confere que uma linha repetida (mesmo rótulo e local) é descartada sem erro
+   e que eventos na mesma data (variantes Alfa e Beta) ganham rótulos em
+   alturas diferentes nos gráficos;
+4. mede a passada vetorizada contra um laço de resumo_janelas por ocorrência
+   (evento × local × janela).
+Uso: python benchmarks/bench_eventos.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly.graph_objects as go  # noqa: E402
+
+from analise import calcular_coorte_vacinacao  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from consultas import ConsultasPandas, resumo_janelas_por_local  # noqa: E402
+from eventos import (  # noqa: E402
+    JANELAS_EVENTOS, ROTULO_VACINACAO, calcular_estudo_eventos, eventos_no_periodo, expandir_eventos, ler_eventos
+)
+from graficos import marcar_eventos  # noqa: E402
+
+AMOSTRA_LACO = 200
+
+
+def conferir_repetidos_e_niveis(tabela, estudo):
+    """Repetidos descartados (fica a primeira) e rótulos da mesma data em alturas distintas"""
+    locais = estudo['ocorrencias']['location'].unique()
+    inicios = pd.Series(pd.NaT, index=locais, dtype='datetime64[ns]')
+    unicas = expandir_eventos(tabela, locais, inicios)
+    repetida = pd.concat([tabela, tabela.iloc[[0]]], ignore_index=True)
+    pd.testing.assert_frame_equal(expandir_eventos(repetida, locais, inicios), unicas)
+
+    eventos = eventos_no_periodo(estudo['ocorrencias'], locais[0], pd.Timestamp('2020-12-01'), pd.Timestamp('2020-12-31'))
+    fig = marcar_eventos(go.Figure(), eventos)
+    alturas = {}
+    for anotacao in fig.layout.annotations:
+        alturas.setdefault(anotacao.x, []).append(anotacao.yshift)
+    assert any(len(deslocamentos) > 1 for deslocamentos in alturas.values()), alturas
+    assert all(len(set(deslocamentos)) == len(deslocamentos) for deslocamentos in alturas.values()), alturas
+
+
+def conferir_vacinacao(df, estudo):
+    janelas = estudo['janelas']
+    for dias in JANELAS_EVENTOS:
+        esperado = resumo_janelas_por_local(df, dias).sort_values(['location', 'periodo'], ignore_index=True)
+        obtido = janelas[(janelas['label'] == ROTULO_VACINACAO) & (janelas['janela_dias'] == dias)]
+        obtido = obtido.sort_values(['location', 'periodo'], ignore_index=True)
+        assert (obtido['location'] == esperado['location']).all() and (obtido['date'] == esperado['inicio_vacinacao']).all()
+        for coluna in ['dias', 'casos', 'mortes', 'media_mortes']:
+            assert np.allclose(obtido[coluna], esperado[coluna], equal_nan=True), (dias, coluna)
+
+    coorte = calcular_coorte_vacinacao(df)
+    curvas = estudo['curvas'][ROTULO_VACINACAO]
+    pd.testing.assert_frame_equal(curvas, coorte['indice'][curvas.columns], check_names=False)
+    pd.testing.assert_frame_equal(estudo['faixas'][ROTULO_VACINACAO], coorte['faixas'])
+
+
+def por_evento(consultas, ocorrencias, inicio, fim):
+    """Janelas evento a evento com resumo_janelas (o caminho da página antes do estudo de eventos)"""
+    linhas = []
+    for evento in ocorrencias.itertuples():
+        for dias in JANELAS_EVENTOS:
+            resumo = consultas.resumo_janelas(evento.location, evento.date, dias, inicio, fim)
+            for periodo in ('antes', 'depois'):
+                linhas.append({'location': evento.location, 'label': evento.label, 'janela_dias': dias,
+                               'periodo': periodo, **resumo[periodo]})
+    return pd.DataFrame(linhas)
+
+
+def main(n_locais=250):
+    df = preparar_dados(gerar_owid_dashboard(n_locais=n_locais))
+    tabela, _ = ler_eventos()
+    inicio, fim = df['date'].min(), df['date'].max()
+
+    comeco = time.perf_counter()
+    estudo = calcular_estudo_eventos(df, tabela)
+    vetorizado = time.perf_counter() - comeco
+    ocorrencias = estudo['ocorrencias']
+    print(f"{n_locais} locais · {len(tabela)} eventos na tabela + início da vacinação · "
+          f"{len(ocorrencias):,} ocorrências (evento × local) · {len(estudo['janelas']):,} janelas\n")
+
+    conferir_vacinacao(df, estudo)
+    print("Conferência: janelas do início da vacinação = resumo_janelas_por_local; curvas e faixas = coorte")
+    conferir_repetidos_e_niveis(tabela, estudo)
+    print("Conferência: evento repetido descartado; rótulos da mesma data em alturas diferentes")
+
+    consultas = ConsultasPandas(df)
+    amostra = ocorrencias.sample(min(AMOSTRA_LACO, len(ocorrencias)), random_state=42)
+    comeco = time.perf_counter()
+    esperado = por_evento(consultas, amostra, inicio, fim)
+    laco = (time.perf_counter() - comeco) / len(amostra) * len(ocorrencias)
+    chaves = ['location', 'label', 'janela_dias', 'periodo']
+    obtido = esperado[chaves].merge(estudo['janelas'], on=chaves, how='left')
+    for coluna in ['dias', 'casos', 'mortes', 'media_mortes']:
+        assert np.allclose(obtido[coluna], esperado[coluna], equal_nan=True), coluna
+    print(f"Conferência: {len(amostra)} ocorrências sorteadas = resumo_janelas evento a evento\n")
+
+    print(f"{'caminho':<42} {'tempo (s)':>10}")
+    print(f"{'passada vetorizada (janelas + curvas)':<42} {vetorizado:>10.2f}")
+    print(f"{'resumo_janelas por ocorrência (estimado)':<42} {laco:>10.2f}   ({laco / vetorizado:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
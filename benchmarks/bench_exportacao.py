@@ -0,0 +1,102 @@
+"""Benchmark: exportação estática (exportar_estatico.py) e reconstrução incremental
+
+Num diretório temporário com um snapshot sintético, mede:
+
+1. a exportação completa (todas as páginas dos locais do seletor);
+2. uma segunda exportação sem mudanças, que só remonta as páginas;
+3. uma exportação depois de um snapshot novo em que só os dados do Brasil
+   mudaram, conferindo (assert) que só o Brasil e o local padrão (que
+   fornece as seções comuns) são renderizados de novo, e que as seções
+   calculadas sobre todos os locais (simulação contrafactual) estão nas
+   seções comuns, refeitas a cada snapshot, e não no fragmento de cada local;
+4. uma exportação depois de editar a tabela de eventos (dados/eventos.csv,
+   restaurada ao final), conferindo que todos os locais e as seções comuns
+   são renderizados de novo e que o novo marco aparece nas páginas.
+Uso: python benchmarks/bench_exportacao.py [--processos N]
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from eventos import ARQUIVO_EVENTOS  # noqa: E402
+from exportar_estatico import LOCAL_PADRAO, exportar  # noqa: E402
+from snapshots import apontar, criar_snapshot  # noqa: E402
+
+
+MARCO_TESTE = 'Marco de teste da exportação'
+
+
+def contem(caminho, texto):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return texto in arquivo.read()
+
+
+def tamanho_mb(padrao):
+    return sum(os.path.getsize(caminho) for caminho in glob.glob(padrao)) / 1024 / 1024
+
+
+def relatar(rotulo, resumo):
+    print(f"{rotulo}: {resumo['segundos']:.1f} s · {len(resumo['renderizados'])} de {resumo['locais']} locais "
+          f"renderizados · {resumo['figuras']} figuras ({resumo['figuras_removidas']} removidas)")
+
+
+def main(n_locais=60, processos=None):
+    inicial = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        # A exportação (como o dashboard) usa o snapshot atual do diretório de trabalho
+        os.chdir(diretorio)
+        try:
+            df = preparar_dados(gerar_owid_dashboard(n_locais=n_locais))
+            apontar(criar_snapshot(df, 'sintetico')['hash'])
+
+            completo = exportar('estatico', processos)
+            relatar("Exportação completa", completo)
+            print(f"  páginas {tamanho_mb('estatico/*.html'):.2f} MB · figuras {tamanho_mb('estatico/dados/*.json'):.2f} MB")
+
+            sem_mudancas = exportar('estatico', processos)
+            relatar("Sem mudanças", sem_mudancas)
+            assert sem_mudancas['renderizados'] == [] and not sem_mudancas['comum_refeito']
+
+            brasil = df['location'] == 'Brazil'
+            df.loc[brasil, 'new_cases'] = df.loc[brasil, 'new_cases'] * 1.1
+            apontar(criar_snapshot(df, 'sintetico')['hash'])
+            um_local = exportar('estatico', processos)
+            relatar("Só o Brasil mudou", um_local)
+            assert sorted(um_local['renderizados']) == sorted(['Brasil', LOCAL_PADRAO]), um_local['renderizados']
+            assert um_local['comum_refeito']
+            with open('estatico/fragmentos/_comum.html', encoding='utf-8') as arquivo:
+                assert 'Simulação Contrafactual' in arquivo.read()
+            for fragmento in glob.glob('estatico/fragmentos/*.html'):
+                if not fragmento.endswith('_comum.html'):
+                    with open(fragmento, encoding='utf-8') as arquivo:
+                        assert 'Simulação Contrafactual' not in arquivo.read(), fragmento
+            print(f"\nIncremental: {completo['segundos'] / um_local['segundos']:.1f}x mais rápido que a exportação completa")
+
+            # Tabela de eventos editada: marcos e narrativa mudam em todas as páginas, sem snapshot novo
+            with open(ARQUIVO_EVENTOS, 'rb') as arquivo:
+                eventos_originais = arquivo.read()
+            try:
+                with open(ARQUIVO_EVENTOS, 'ab') as arquivo:
+                    arquivo.write(f'2020-06-15,,,{MARCO_TESTE},politica\n'.encode())
+                com_evento = exportar('estatico', processos)
+            finally:
+                with open(ARQUIVO_EVENTOS, 'wb') as arquivo:
+                    arquivo.write(eventos_originais)
+            relatar("Tabela de eventos editada", com_evento)
+            assert len(com_evento['renderizados']) == com_evento['locais'] and com_evento['comum_refeito']
+            assert any(contem(caminho, MARCO_TESTE) for caminho in glob.glob('estatico/dados/*.json')), \
+                "marco novo ausente das figuras exportadas"
+        finally:
+            os.chdir(inicial)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processos', type=int)
+    main(processos=parser.parse_args().processos)
@@ -0,0 +1,145 @@
+"""Benchmark: exportação em fluxo da série filtrada + métricas derivadas (exportacao.py)
+
+Grava um snapshot sintético num diretório temporário e:
+
+1. confere (asserts) que o CSV e o Parquet gerados em blocos batem com os
+   cálculos da página para alguns locais e um período (recorte da série
+   completa, média móvel de 7 dias, CFR de 30 dias e progresso da vacinação);
+2. mede tempo e pico de memória (VmHWM, num subprocesso por variante) de
+   "todos os locais, todas as datas" em fluxo contra montar tudo em memória
+   (read_parquet + métricas por local + to_csv numa string só);
+3. confere a rota /v1/exportar da API: corpo enviado em fluxo igual ao
+   gerador local e 304 com If-None-Match.
+Uso: python benchmarks/bench_exportacao_dados.py
+"""
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from api import ServidorAPI  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from consultas import ConsultasPandas, metricas_derivadas, progresso_vacinacao  # noqa: E402
+from exportacao import COLUNAS_DERIVADAS, caminho_snapshot, com_derivadas, gerar_exportacao  # noqa: E402
+from snapshots import apontar, criar_snapshot  # noqa: E402
+
+LOCAIS = ['Brazil', 'Japan', 'World']
+INICIO, FIM = pd.Timestamp('2021-01-01'), pd.Timestamp('2022-12-31')
+
+
+def esperado_pagina(consultas, local):
+    """Os mesmos cálculos dos nós serie_periodo, metricas_periodo e cfr_periodo da página"""
+    serie_local = consultas.serie(local, pd.Timestamp.min, pd.Timestamp.max)
+    metricas = metricas_derivadas(serie_local)
+    dentro = (serie_local['date'] >= INICIO) & (serie_local['date'] <= FIM)
+    df_filtrado = serie_local[dentro].reset_index(drop=True)
+    metricas_periodo = metricas[dentro.to_numpy()].reset_index(drop=True)
+    df_filtrado['media_movel_7d'] = metricas_periodo['new_deaths_mm7']
+    df_filtrado['cfr_diaria'] = metricas_periodo['cfr_diaria']
+    df_filtrado['cfr_mm30'] = metricas_periodo['cfr_mm30']
+    df_filtrado['vac_progress_pct'] = progresso_vacinacao(df_filtrado, serie_local['population'].notna().any())[0]
+    return df_filtrado
+
+
+def conferir(df, versao, diretorio):
+    consultas = ConsultasPandas(df)
+    # Os locais saem na ordem do snapshot
+    ordem = [local for local in df['location'].unique() if local in LOCAIS]
+    esperado = pd.concat([esperado_pagina(consultas, local) for local in ordem], ignore_index=True)
+    parquet = pd.read_parquet(io.BytesIO(b''.join(gerar_exportacao(versao, 'parquet', LOCAIS, INICIO, FIM, diretorio))))
+    pd.testing.assert_frame_equal(parquet, esperado, check_dtype=False)
+    csv = pd.read_csv(io.BytesIO(b''.join(gerar_exportacao(versao, 'csv', LOCAIS, INICIO, FIM, diretorio))),
+                      parse_dates=['date'])
+    for coluna in COLUNAS_DERIVADAS + ['new_deaths', 'people_vaccinated']:
+        assert np.allclose(csv[coluna], esperado[coluna], equal_nan=True), coluna
+    assert list(csv.columns) == list(esperado.columns)
+    assert (csv['location'] == esperado['location']).all()
+
+
+def pico_memoria_mb():
+    with open('/proc/self/status') as arquivo:
+        linha = next(linha for linha in arquivo if linha.startswith('VmHWM'))
+    return int(linha.split()[1]) / 1024
+
+
+def medir(variante, versao, diretorio):
+    """Roda uma variante e imprime 'segundos bytes pico_MB' (chamada num subprocesso)"""
+    inicio = time.perf_counter()
+    total = 0  # 'base': só os imports, para descontar do pico
+    if variante == 'materializado':
+        df = pd.read_parquet(caminho_snapshot(versao, diretorio))
+        completo = pd.concat([com_derivadas(serie) for _, serie in df.groupby('location', sort=False)], ignore_index=True)
+        total = len(completo.to_csv(index=False, date_format='%Y-%m-%d').encode())
+    elif variante != 'base':
+        total = sum(len(bloco) for bloco in gerar_exportacao(versao, variante, diretorio=diretorio))
+    print(time.perf_counter() - inicio, total, pico_memoria_mb())
+
+
+def em_subprocesso(variante, versao, diretorio):
+    saida = subprocess.run([sys.executable, os.path.abspath(__file__), variante, versao, diretorio],
+                           capture_output=True, text=True, check=True).stdout.split()
+    return float(saida[0]), int(saida[1]), float(saida[2])
+
+
+def conferir_api(versao, diretorio):
+    with ServidorAPI(('127.0.0.1', 0), diretorio) as servidor:
+        url = f"{servidor.url}/v1/exportar?formato=parquet&local=Brazil&local=Japan&inicio=2021-01-01"
+        inicio = time.perf_counter()
+        with urllib.request.urlopen(url) as resposta:
+            assert resposta.headers['Content-Length'] is None  # enviado em fluxo
+            primeiro = resposta.read(64 * 1024)
+            ate_primeiro = time.perf_counter() - inicio
+            corpo = primeiro + resposta.read()
+            etag = resposta.headers['ETag']
+        total = time.perf_counter() - inicio
+        assert corpo == b''.join(gerar_exportacao(versao, 'parquet', ['Brazil', 'Japan'], pd.Timestamp('2021-01-01'),
+                                                  pd.Timestamp(servidor.dados_atuais().manifesto['data_final']), diretorio))
+        try:
+            urllib.request.urlopen(urllib.request.Request(url, headers={'If-None-Match': etag}))
+            raise AssertionError("If-None-Match deveria responder 304")
+        except urllib.error.HTTPError as erro:
+            assert erro.code == 304
+    return ate_primeiro, total, len(corpo)
+
+
+def main(n_locais=500):
+    with tempfile.TemporaryDirectory() as diretorio:
+        df = preparar_dados(gerar_owid_dashboard(n_locais=n_locais))
+        versao = criar_snapshot(df, 'sintetico', diretorio=diretorio)['hash']
+        apontar(versao, diretorio=diretorio)
+        tamanho = os.path.getsize(caminho_snapshot(versao, diretorio)) / 1024 ** 2
+        print(f"{n_locais} locais · {len(df):,} linhas · snapshot de {tamanho:.1f} MB\n")
+
+        conferir(df, versao, diretorio)
+        print("Conferência: CSV e Parquet em blocos batem com os cálculos da página "
+              f"({', '.join(LOCAIS)}, {INICIO.date()} a {FIM.date()})\n")
+        del df
+
+        base = em_subprocesso('base', versao, diretorio)[2]
+        print(f"{'todos os locais':<26} {'tempo (s)':>10} {'saída (MB)':>11} {'pico RSS (MB)':>14} {'acima da base':>14}")
+        for variante, descricao in [('csv', 'CSV em blocos'), ('parquet', 'Parquet em blocos'),
+                                    ('materializado', 'CSV montado em memória')]:
+            segundos, total, pico = em_subprocesso(variante, versao, diretorio)
+            print(f"{descricao:<26} {segundos:>10.2f} {total / 1024 ** 2:>11.1f} {pico:>14.0f} {pico - base:>14.0f}")
+        print(f"(base: processo só com os imports, {base:.0f} MB)")
+
+        ate_primeiro, total, tamanho = conferir_api(versao, diretorio)
+        print(f"\n/v1/exportar (2 locais, Parquet): primeiro bloco em {ate_primeiro * 1000:.0f} ms, "
+              f"{tamanho / 1024:.0f} KB em {total * 1000:.0f} ms; igual ao gerador local; ETag/304 ok")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4:
+        medir(*sys.argv[1:])
+    else:
+        main()
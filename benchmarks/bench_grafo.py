@@ -0,0 +1,113 @@
+"""Benchmark: recomputação incremental dos cálculos da página (grafo.py)
+
+Executa a página pelo AppTest, num diretório temporário com um snapshot
+sintético, e alterna o período e o local. Para cada interação:
+
+1. confere (assert) quais nós do grafo rodaram: trocar o período não refaz o
+   recorte do local, o início da vacinação, as métricas da série completa
+   nem a tabela entre países; trocar o local não refaz a tabela;
+2. confere (assert) que as figuras saem iguais às de uma recomputação
+   completa (memória do grafo apagada antes do rerun);
+3. relata os nós poupados e o tempo que eles custam numa recomputação completa;
+4. confere (assert) que uma mudança no código do projeto (simulada trocando
+   cache_compartilhado.hash_codigo) refaz todos os nós da sessão.
+Uso: python benchmarks/bench_grafo.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+import cache_compartilhado  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from snapshots import apontar, criar_snapshot  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAVE_MEMORIA = 'grafo_pagina'
+INDEPENDENTES_DO_PERIODO = {'serie_local', 'tem_populacao', 'inicio_vacinacao', 'metricas_local', 'tabela_principais'}
+
+# (descrição, local, intervalo de anos, nós que não podem rodar)
+INTERACOES = [
+    ("período 2021-2022", 'Brasil', (2021, 2022), INDEPENDENTES_DO_PERIODO),
+    ("período 2020-2021", 'Brasil', (2020, 2021), INDEPENDENTES_DO_PERIODO),
+    ("local Japão", 'Japão', (2020, 2021), {'tabela_principais'}),
+    ("período 2020-2023", 'Japão', (2020, 2023), INDEPENDENTES_DO_PERIODO),
+]
+
+
+def figuras(app):
+    """Specs das figuras da página, na ordem"""
+    encontradas = []
+
+    def percorrer(no):
+        if getattr(no, 'type', None) == 'plotly_chart':
+            encontradas.append(no.proto.spec)
+        for filho in getattr(no, 'children', {}).values():
+            percorrer(filho)
+    percorrer(app.main)
+    return encontradas
+
+
+def executar(app, local, anos, completo=False):
+    """Rerun com `local` e `anos`; retorna (nós executados {nome: s}, figuras)"""
+    if completo:
+        app.session_state[CHAVE_MEMORIA] = {}
+    next(widget for widget in app.sidebar.selectbox if widget.label == "Selecione o País/Região").set_value(local)
+    next(widget for widget in app.sidebar.select_slider if widget.label == "Selecione o intervalo de anos").set_value(anos)
+    app.run()
+    assert not app.exception, app.exception[0].message
+    resumo = next(expansor for expansor in app.sidebar.expander if 'Recomputação' in expansor.label).caption[0].value
+    executados = {}
+    for item in resumo.split('\n')[0].removeprefix('Executados: ').split('), '):
+        if '(' in item:
+            nome, tempo = item.split(' (')
+            executados[nome] = float(tempo.rstrip(') ms')) / 1000
+    return executados, figuras(app)
+
+
+def conferir_versao_codigo(incremental, completo, local, anos):
+    """Mesma seleção, outro código: nenhum nó da memória da sessão é reaproveitado"""
+    nos_repetidos, _ = executar(incremental, local, anos)
+    assert not nos_repetidos, nos_repetidos
+    nos_completos, _ = executar(completo, local, anos, completo=True)
+    original = cache_compartilhado.hash_codigo
+    cache_compartilhado.hash_codigo = lambda raiz=cache_compartilhado.RAIZ: 'f' * 64  # módulo auxiliar editado
+    try:
+        nos_novo_codigo, _ = executar(incremental, local, anos)
+    finally:
+        cache_compartilhado.hash_codigo = original
+    assert set(nos_novo_codigo) == set(nos_completos), set(nos_completos) ^ set(nos_novo_codigo)
+    print(f"Conferência: com outro código, os {len(nos_novo_codigo)} nós da sessão rodaram de novo")
+
+
+def main(n_locais=60):
+    inicial = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            apontar(criar_snapshot(preparar_dados(gerar_owid_dashboard(n_locais=n_locais)), 'sintetico')['hash'])
+            incremental = AppTest.from_file(os.path.join(RAIZ, 'dashboard.py'), default_timeout=600).run()
+            completo = AppTest.from_file(os.path.join(RAIZ, 'dashboard.py'), default_timeout=600).run()
+            executar(incremental, 'Brasil', (2020, 2023))
+
+            print(f"{'interação':<20} {'nós (incr.)':>12} {'nós (compl.)':>13} {'ms poupados':>12}  não executados")
+            for descricao, local, anos, proibidos in INTERACOES:
+                nos_incrementais, figuras_incrementais = executar(incremental, local, anos)
+                nos_completos, figuras_completas = executar(completo, local, anos, completo=True)
+                assert not proibidos & set(nos_incrementais), (descricao, proibidos & set(nos_incrementais))
+                assert figuras_incrementais == figuras_completas, descricao
+                poupados = sorted(set(nos_completos) - set(nos_incrementais))
+                print(f"{descricao:<20} {len(nos_incrementais):>12} {len(nos_completos):>13} "
+                      f"{sum(nos_completos[nome] for nome in poupados) * 1000:>12.1f}  {', '.join(poupados)}")
+            print("\nConferência: nós independentes não rodaram e as figuras batem com a recomputação completa")
+            conferir_versao_codigo(incremental, completo, *INTERACOES[-1][1:3])
+        finally:
+            os.chdir(inicial)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: tempo de inicialização do dashboard
+
+1. Perfil de importação (`python -X importtime`) das dependências do dashboard,
+   separando o que a casca da página precisa do que é importado depois.
+2. Tempo até a primeira renderização (casca: configuração, CSS, título e
+   cabeçalho da barra lateral) e até a página completa, cada um num processo
+   novo (importações a frio) com dados sintéticos num diretório temporário.
+
+Uso: python benchmarks/bench_inicializacao.py
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD = os.path.join(RAIZ, 'dashboard.py')
+
+# Fim da casca da página em dashboard.py: tudo antes disso só depende do streamlit
+MARCADOR_CASCA = '# Dependências pesadas'
+
+MODULOS_CASCA = ['streamlit']
+MODULOS_ADIADOS = ['numpy', 'pandas', 'plotly.graph_objects', 'plotly.express', 'analise', 'contrafactual',
+                   'correlacao', 'epidemiologia', 'graficos', 'limpeza', 'mapa', 'populacao', 'previsao',
+                   'serializacao', 'tabela']
+
+PADRAO_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def perfil_importacao(modulos):
+    """Tempo cumulativo (ms) de cada módulo de primeiro nível importado por `import modulos`"""
+    codigo = '; '.join(f'import {modulo}' for modulo in modulos)
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                           cwd=RAIZ, capture_output=True, text=True, check=True).stderr
+    tempos = {}
+    for linha in saida.splitlines():
+        encontrado = PADRAO_IMPORTTIME.match(linha)
+        if encontrado and len(encontrado.group(3)) == 1:
+            tempos[encontrado.group(4)] = int(encontrado.group(2)) / 1000
+    return tempos
+
+
+def tempo_apptest(script, diretorio):
+    """Executa `script` com AppTest num processo novo e retorna o tempo total (s), importações incluídas"""
+    codigo = f"""
+import time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+teste = AppTest.from_file({script!r}, default_timeout=300).run()
+assert not teste.exception, [e.message for e in teste.exception]
+print(time.perf_counter() - inicio)
+"""
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=diretorio, capture_output=True, text=True,
+                           env={**os.environ, 'PYTHONPATH': RAIZ}, check=True).stdout
+    return float(saida.strip().splitlines()[-1])
+
+
+def main():
+    print("Perfil de importação (ms, cumulativo, primeiro nível):")
+    casca = perfil_importacao(MODULOS_CASCA)
+    completo = perfil_importacao(MODULOS_CASCA + MODULOS_ADIADOS)
+    adiadas = {modulo: tempo for modulo, tempo in completo.items() if modulo not in casca}
+    for titulo, tempos in (('casca', casca), ('adiadas', adiadas)):
+        maiores = sorted(tempos.items(), key=lambda item: -item[1])[:6]
+        print(f"  {titulo:>8}: total {sum(tempos.values()):5.0f}  |  "
+              + ', '.join(f'{modulo} {tempo:.0f}' for modulo, tempo in maiores))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerar_owid_dashboard().to_csv(os.path.join(diretorio, 'owid-covid-data.csv'), index=False)
+
+        with open(DASHBOARD, encoding='utf-8') as arquivo:
+            fonte = arquivo.read()
+        script_casca = os.path.join(diretorio, 'casca.py')
+        with open(script_casca, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(fonte[:fonte.index(MARCADOR_CASCA)])
+
+        print("\nProcesso novo (importações a frio):")
+        print(f"  primeira renderização (casca): {tempo_apptest(script_casca, diretorio):6.2f} s")
+        print(f"  página completa:               {tempo_apptest(DASHBOARD, diretorio):6.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark: mapa animado com todos os países, 2020–2023
+
+Compara uma animação ingênua (um quadro diário com o traço completo: códigos e
+valores em JSON) com os quadros semanais pré-calculados de mapa.py (apenas `z`
+em float32). Mede tempo de construção e tamanho do payload.
+Uso: python benchmarks/bench_mapa.py
+"""
+import os
+import string
+import sys
+import time
+
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid  # noqa: E402
+from mapa import METRICAS_MAPA, calcular_mapa  # noqa: E402
+from populacao import adicionar_metricas_per_capita, carregar_populacao  # noqa: E402
+from serializacao import tamanho_payload  # noqa: E402
+
+
+def gerar_paises(n_paises=230):
+    """Quadro sintético com códigos ISO de três letras"""
+    df = gerar_owid(n_locais=n_paises)
+    letras = string.ascii_uppercase
+    codigos = {f'L{i:02d}': letras[i // 26 % 26] + letras[i % 26] + 'X' for i in range(n_paises)}
+    df['iso_code'] = df['iso_code'].map(codigos)
+    return adicionar_metricas_per_capita(df, carregar_populacao(df))
+
+
+def mapa_ingenuo(df, coluna):
+    """Um quadro por dia, cada um com o traço completo (locations + z em listas)"""
+    diaria = df.pivot_table(index='date', columns='iso_code', values=coluna)
+    codigos = list(diaria.columns)
+    quadros = [
+        go.Frame(name=str(data.date()), data=[go.Choropleth(locations=codigos, z=linha.tolist())])
+        for data, linha in zip(diaria.index, diaria.to_numpy())
+    ]
+    return go.Figure(data=[go.Choropleth(locations=codigos, z=diaria.iloc[-1].tolist())], frames=quadros)
+
+
+def main():
+    df = gerar_paises()
+    print(f"{df['iso_code'].nunique()} países × {df['date'].nunique()} dias")
+    print(f"{'métrica':>22} {'versão':>12} {'quadros':>8} {'tempo (s)':>10} {'payload (MB)':>13}")
+
+    for metrica, (coluna, _) in METRICAS_MAPA.items():
+        for versao, construir in (('ingênua', lambda: mapa_ingenuo(df, coluna)),
+                                  ('semanal', lambda: calcular_mapa(df, metrica))):
+            inicio = time.perf_counter()
+            fig = construir()
+            tempo = time.perf_counter() - inicio
+            tamanho = tamanho_payload(fig) / 1024 ** 2
+            print(f"{metrica:>22} {versao:>12} {len(fig.frames):>8} {tempo:>10.2f} {tamanho:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
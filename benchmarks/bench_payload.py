@@ -0,0 +1,57 @@
+"""Benchmark: tamanho do payload de cada figura antes e depois da compactação
+
+Reproduz as figuras da visão "Mundo" 2020–2023 com dados sintéticos.
+Uso: python benchmarks/bench_payload.py
+"""
+import os
+import sys
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid  # noqa: E402
+from serializacao import compactar_figura, tamanho_payload  # noqa: E402
+
+
+def figuras_mundo(df):
+    """Figuras de séries temporais do dashboard para um único local"""
+    df_longo = df[['date', 'new_cases', 'new_deaths']].melt(id_vars='date', var_name='Métrica', value_name='Contagem')
+    fig1 = px.line(df_longo, x='date', y='Contagem', color='Métrica')
+
+    fig2 = go.Figure()
+    fig2.add_trace(go.Scatter(x=df['date'], y=df['people_vaccinated'], mode='lines'))
+    fig2.add_trace(go.Scatter(x=df['date'], y=df['total_deaths'], mode='lines', yaxis='y2'))
+    fig2.update_layout(yaxis2=dict(overlaying='y', side='right'))
+
+    fig_tendencia = go.Figure()
+    fig_tendencia.add_trace(go.Scatter(x=df['date'], y=df['new_deaths'], mode='lines', fill='tozeroy'))
+    fig_tendencia.add_trace(go.Scatter(x=df['date'], y=df['new_deaths'].rolling(7, center=True).mean(), mode='lines'))
+
+    cfr = np.where(df['new_cases'] > 0, df['new_deaths'] / df['new_cases'], np.nan)
+    fig_cfr = go.Figure()
+    fig_cfr.add_trace(go.Scatter(x=df['date'], y=cfr, mode='lines'))
+    fig_cfr.add_trace(go.Scatter(x=df['date'], y=df['people_vaccinated'] / df['people_vaccinated'].max() * 100,
+                                 mode='lines', yaxis='y2'))
+    fig_cfr.update_layout(yaxis2=dict(overlaying='y', side='right'))
+
+    return {'fig1': fig1, 'fig2': fig2, 'fig_tendencia': fig_tendencia, 'fig_cfr': fig_cfr}
+
+
+def main():
+    df = gerar_owid(n_locais=1, inicio='2020-01-01', fim='2023-12-31')
+    print(f"{'figura':>14} {'antes (KB)':>11} {'depois (KB)':>12} {'redução':>8}")
+    total_antes = total_depois = 0
+    for nome, fig in figuras_mundo(df).items():
+        antes = tamanho_payload(fig)
+        depois = tamanho_payload(compactar_figura(fig))
+        total_antes += antes
+        total_depois += depois
+        print(f"{nome:>14} {antes / 1024:>11.1f} {depois / 1024:>12.1f} {1 - depois / antes:>8.0%}")
+    print(f"{'total':>14} {total_antes / 1024:>11.1f} {total_depois / 1024:>12.1f} {1 - total_depois / total_antes:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
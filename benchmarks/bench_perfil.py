@@ -0,0 +1,127 @@
+"""Benchmark: captura de perfil sob demanda (perfil.py), sem navegador
+
+Executa a página pelo AppTest, num diretório temporário com um snapshot
+sintético, e:
+
+1. confere (asserts) que `?profile=1&token=...` grava o speedscope JSON
+   (válido: índices dentro de shared.frames, quadros do dashboard.py) e o
+   resumo das chamadas ao pandas, que a barra lateral mostra a captura e que
+   os parâmetros saem da URL (o rerun seguinte não é amostrado);
+2. confere que token errado, ou PERFIL_TOKEN não configurado, não grava nada
+   nem cria a thread de amostragem;
+3. mede o custo do caminho desligado e o tempo de um rerun com e sem captura.
+Uso: python benchmarks/bench_perfil.py
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from perfil import NOME_THREAD, captura_pedida, perfilador_configurado  # noqa: E402
+from snapshots import apontar, criar_snapshot  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = 'segredo-de-teste'
+DIRETORIO_PERFIS = 'perfis'
+
+
+def rodar(parametros=None):
+    """(app, segundos) de uma execução da página com `parametros` na URL"""
+    app = AppTest.from_file(os.path.join(RAIZ, 'dashboard.py'), default_timeout=600)
+    app.query_params.update(parametros or {})
+    inicio = time.perf_counter()
+    app.run()
+    segundos = time.perf_counter() - inicio
+    assert not app.exception, app.exception[0].message
+    return app, segundos
+
+
+def arquivos():
+    return sorted(os.listdir(DIRETORIO_PERFIS)) if os.path.isdir(DIRETORIO_PERFIS) else []
+
+
+def amostrando():
+    return any(thread.name == NOME_THREAD for thread in threading.enumerate())
+
+
+def conferir_speedscope(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        perfil = json.load(arquivo)
+    quadros = perfil['shared']['frames']
+    amostrado = perfil['profiles'][0]
+    assert amostrado['type'] == 'sampled' and amostrado['samples']
+    assert len(amostrado['samples']) == len(amostrado['weights'])
+    assert all(0 <= indice < len(quadros) for amostra in amostrado['samples'] for indice in amostra)
+    assert any(quadro['file'].endswith('dashboard.py') for quadro in quadros)
+    return len(quadros), sum(amostrado['weights'])
+
+
+def conferir_pandas(caminho):
+    with open(caminho, encoding='utf-8', newline='') as arquivo:
+        linhas = list(csv.DictReader(arquivo))
+    assert linhas and all(linha['chamada'].startswith('pandas.') for linha in linhas)
+    return linhas
+
+
+def main(n_locais=60):
+    inicial = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        os.environ['PERFIL_DIRETORIO'] = DIRETORIO_PERFIS
+        try:
+            apontar(criar_snapshot(preparar_dados(gerar_owid_dashboard(n_locais=n_locais)), 'sintetico')['hash'])
+            # Sem PERFIL_TOKEN: o parâmetro é ignorado
+            os.environ.pop('PERFIL_TOKEN', None)
+            perfilador_configurado.cache_clear()
+            rodar({'profile': '1', 'token': TOKEN})
+            assert not arquivos() and not amostrando()
+
+            os.environ['PERFIL_TOKEN'] = TOKEN
+            perfilador_configurado.cache_clear()
+            rodar()  # aquece os caches
+            sem_perfil = min(rodar()[1] for _ in range(3))
+            app, _ = rodar({'profile': '1', 'token': 'errado'})
+            assert not arquivos() and not amostrando()
+
+            app, com_perfil = rodar({'profile': '1', 'token': TOKEN})
+            assert not amostrando()
+            gravados = arquivos()
+            assert len(gravados) == 2, gravados
+            json_perfil = next(nome for nome in gravados if nome.endswith('.speedscope.json'))
+            csv_pandas = next(nome for nome in gravados if nome.endswith('.pandas.csv'))
+            n_quadros, ms = conferir_speedscope(os.path.join(DIRETORIO_PERFIS, json_perfil))
+            chamadas = conferir_pandas(os.path.join(DIRETORIO_PERFIS, csv_pandas))
+            assert any('Perfil' in expansor.label for expansor in app.sidebar.expander)
+            assert 'profile' not in app.query_params and 'token' not in app.query_params
+
+            app.run()  # próximo rerun: sem captura, o expansor continua com a última
+            assert not app.exception and arquivos() == gravados
+            assert any('Perfil' in expansor.label for expansor in app.sidebar.expander)
+
+            print(f"{n_locais} locais · captura {json_perfil.split('.')[0]}: {n_quadros} quadros distintos, "
+                  f"{ms:,.0f} ms amostrados\n")
+            print(f"{'chamada ao pandas':<44} {'origem':<22} {'ms':>8} {'%':>6}")
+            for linha in chamadas[:8]:
+                print(f"{linha['chamada'][:44]:<44} {linha['origem'][:22]:<22} {float(linha['ms']):>8.0f} {float(linha['pct']):>6.1f}")
+
+            desligado = min(timeit.repeat(lambda: captura_pedida({}), number=100_000, repeat=5)) / 100_000
+            print(f"\nCaminho desligado (sem ?profile): {desligado * 1e9:.0f} ns por rerun")
+            print(f"Rerun com caches quentes: {sem_perfil:.2f} s sem captura · {com_perfil:.2f} s com captura "
+                  f"({(com_perfil / sem_perfil - 1) * 100:+.0f}%)")
+            print("Conferência: token errado ou PERFIL_TOKEN ausente não grava nada nem inicia a amostragem")
+        finally:
+            os.chdir(inicial)
+
+
+if __name__ == '__main__':
+    main()
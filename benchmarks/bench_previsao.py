@@ -0,0 +1,47 @@
+"""Backtest da previsão: acurácia e tempo de ajuste por local
+
+Para várias origens (a cada 30 dias), prevê os próximos 14 e 28 dias de mortes
+e compara com o observado (média móvel 7d) e com a previsão ingênua (último valor).
+Uso: python benchmarks/bench_previsao.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analise import pivotar  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid  # noqa: E402
+from previsao import prever  # noqa: E402
+
+
+def main(n_locais=255):
+    mortes = pivotar(gerar_owid(n_locais=n_locais), ['new_deaths'])['new_deaths']
+    observado = mortes.rolling(window=7, min_periods=4).mean()
+    origens = list(pd.date_range('2020-04-01', '2023-11-01', freq='30D'))
+
+    inicio = time.perf_counter()
+    previsoes = prever(mortes, origens)
+    tempo = time.perf_counter() - inicio
+    ajustes = len(origens) * mortes.shape[1]
+    print(f"Ajuste: {len(origens)} origens × {mortes.shape[1]} locais em {tempo * 1000:.1f} ms "
+          f"({tempo / ajustes * 1e6:.1f} µs por local/origem)")
+
+    for horizonte in (14, 28):
+        erros_modelo, erros_ingenuo = [], []
+        for origem, previsao in previsoes.items():
+            futuro = previsao['previsao'].iloc[:horizonte]
+            real = observado.reindex(futuro.index)
+            ingenuo = observado.loc[:origem].iloc[-1]
+            erros_modelo.append((futuro - real).abs().to_numpy())
+            erros_ingenuo.append((real - ingenuo).abs().to_numpy())
+        mae_modelo = np.nanmean(np.concatenate(erros_modelo))
+        mae_ingenuo = np.nanmean(np.concatenate(erros_ingenuo))
+        print(f"Horizonte {horizonte:>2} dias: MAE modelo = {mae_modelo:.2f}, MAE ingênuo = {mae_ingenuo:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: tamanho do JSON e tempo de montagem das figuras por modo de renderização
+
+Antes de medir, confere (asserts) que o modo automático abaixo do limiar devolve
+a própria figura e que a conversão para WebGL mantém os preenchimentos, troca
+line.shape='spline' por 'linear' e deixa em SVG o traço sem equivalente.
+Cada modo é montado uma vez antes da medição (validadores do plotly carregados).
+
+Uso: python benchmarks/bench_renderizacao.py
+"""
+import os
+import sys
+import time
+
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid  # noqa: E402
+from graficos import LIMIAR_WEBGL, MODOS_RENDERIZACAO, aplicar_modo_renderizacao  # noqa: E402
+
+
+def montar_figura(df):
+    """Uma linha com área por local, como em fig_tendencia"""
+    fig = go.Figure()
+    for local, df_local in df.groupby('location'):
+        fig.add_trace(go.Scatter(
+            x=df_local['date'], y=df_local['new_deaths'],
+            mode='lines', name=local,
+            fill='tozeroy'
+        ))
+    fig.add_shape(type="line", x0='2021-01-01', x1='2021-01-01', y0=0, y1=1, yref="paper")
+    return fig
+
+
+def conferir_conversao():
+    """Asserts da troca Scatter -> Scattergl"""
+    pequena = montar_figura(gerar_owid(n_locais=1))
+    assert aplicar_modo_renderizacao(pequena, 'auto') is pequena
+
+    x = list(range(LIMIAR_WEBGL + 1))
+    fig = go.Figure([
+        go.Scatter(x=x, y=x, mode='lines', fill='tozeroy', line=dict(shape='spline', smoothing=0.8)),
+        go.Scatter(x=x, y=x, mode='lines', fill='tonexty', line=dict(shape='hv')),
+        go.Scatter(x=x, y=x, mode='lines', stackgroup='pilha')
+    ])
+    suave, degrau, empilhado = aplicar_modo_renderizacao(fig, 'auto').data
+    assert suave.type == 'scattergl' and suave.fill == 'tozeroy' and suave.line.shape == 'linear'
+    assert degrau.type == 'scattergl' and degrau.fill == 'tonexty' and degrau.line.shape == 'hv'
+    assert empilhado.type == 'scatter' and empilhado.stackgroup == 'pilha'
+
+
+def main(repeticoes=5):
+    conferir_conversao()
+    for modo in MODOS_RENDERIZACAO.values():
+        aplicar_modo_renderizacao(montar_figura(gerar_owid(n_locais=5)), modo).to_json()
+
+    print(f"{'locais':>7} {'pontos':>8} {'modo':>11} {'montagem (ms)':>14} {'JSON (KB)':>10}")
+    for n_locais in (1, 5, 20, 50):
+        df = gerar_owid(n_locais=n_locais)
+        for nome, modo in MODOS_RENDERIZACAO.items():
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                fig = aplicar_modo_renderizacao(montar_figura(df), modo)
+                payload = fig.to_json()
+            tempo_ms = (time.perf_counter() - inicio) / repeticoes * 1000
+            print(f"{n_locais:>7} {len(df):>8} {nome:>11} {tempo_ms:>14.1f} {len(payload) / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark e verificação do estimador de Rt
+
+1. Verifica a estimativa contra uma série sintética gerada pela equação de
+   renovação com R conhecido (1.3 e depois 0.8).
+2. Mede o tempo de estimar Rt para todas as entidades do OWID (~255 locais, 2020–2023).
+
+Uso: python benchmarks/bench_rt.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analise import pivotar  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid  # noqa: E402
+from epidemiologia import estimar_rt, intervalo_serial_discreto  # noqa: E402
+
+
+def serie_renovacao(r_verdadeiro, pesos, semente_inicial=50.0):
+    """Incidência determinística I_t = R_t · Σ w_s · I_{t-s}"""
+    incidencia = np.zeros(len(r_verdadeiro))
+    incidencia[:10] = semente_inicial
+    for t in range(10, len(incidencia)):
+        s = np.arange(1, min(len(pesos), t + 1))
+        incidencia[t] = r_verdadeiro[t] * (pesos[s] * incidencia[t - s]).sum()
+    return incidencia
+
+
+def verificar_correcao():
+    pesos = intervalo_serial_discreto()
+    dias = 200
+    r_verdadeiro = np.where(np.arange(dias) < 100, 1.3, 0.8)
+    incidencia = pd.DataFrame(
+        {'sintetico': serie_renovacao(r_verdadeiro, pesos)},
+        index=pd.date_range('2020-01-01', periods=dias)
+    )
+    resultado = estimar_rt(incidencia)
+
+    # Ignora o aquecimento e a janela que atravessa a mudança de R
+    avaliados = np.r_[30:100, 107:dias]
+    erro = np.abs(resultado['rt']['sintetico'].to_numpy()[avaliados] - r_verdadeiro[avaliados])
+    dentro_ic = (
+        (resultado['rt_inf']['sintetico'].to_numpy()[avaliados] <= r_verdadeiro[avaliados])
+        & (r_verdadeiro[avaliados] <= resultado['rt_sup']['sintetico'].to_numpy()[avaliados])
+    )
+    print(f"Série sintética: erro absoluto máximo = {erro.max():.4f}, R verdadeiro dentro do IC 95% em {dentro_ic.mean():.0%} dos dias")
+    assert erro.max() < 0.02, 'Rt estimado se afastou do valor conhecido'
+    assert dentro_ic.all(), 'R verdadeiro fora do intervalo de credibilidade'
+
+
+def medir_todos_locais(n_locais=255, repeticoes=3):
+    casos = pivotar(gerar_owid(n_locais=n_locais), ['new_cases'])['new_cases']
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        estimar_rt(casos)
+    tempo = (time.perf_counter() - inicio) / repeticoes
+    print(f"Todos os locais: {casos.shape[1]} locais × {casos.shape[0]} dias em {tempo * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    verificar_correcao()
+    medir_todos_locais()
@@ -0,0 +1,80 @@
+"""Benchmark: carga pelo snapshot (Parquet) versus CSV bruto + processamento
+
+Com dados sintéticos de 250 locais, mede o caminho anterior (ler o CSV e
+processar a cada processo novo), a criação de um snapshot (hash de conteúdo,
+Parquet e manifesto), a leitura do snapshot e a troca do ponteiro ATUAL
+usada na reversão. Confere (asserts) que reversões seguidas andam para trás
+no histórico (A→B→C: C → B → A) e que uma linha truncada no histórico é ignorada.
+Uso: python benchmarks/bench_snapshots.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from cache_dados import preparar_dados  # noqa: E402
+from snapshots import (  # noqa: E402
+    ARQUIVO_HISTORICO, apontar, carregar_snapshot, criar_snapshot, hash_conteudo, historico, reverter
+)
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def conferir_reversoes(df, csv, hash_a, hash_b, destino):
+    """A→B→C publicados: reverter volta a B, depois a A, e então não há mais para onde voltar"""
+    hash_c = criar_snapshot(df.iloc[:-500], csv, diretorio=destino)['hash']
+    for hash_dados in (hash_a, hash_b, hash_c):
+        apontar(hash_dados, diretorio=destino)
+    assert reverter(diretorio=destino)['hash'] == hash_b
+    assert reverter(diretorio=destino)['hash'] == hash_a
+    try:
+        reverter(diretorio=destino)
+        raise AssertionError("Não deveria haver snapshot anterior a A")
+    except FileNotFoundError:
+        pass
+    # Uma linha pela metade (histórico anexado por versões antigas) não impede a leitura
+    with open(os.path.join(destino, ARQUIVO_HISTORICO), 'a', encoding='utf-8') as arquivo:
+        arquivo.write('{"hash": "abc')
+    trocas = len(historico(destino))
+    apontar(hash_c, diretorio=destino)
+    assert len(historico(destino)) == trocas + 1 and reverter(diretorio=destino)['hash'] == hash_a
+
+
+def main(n_locais=250):
+    with tempfile.TemporaryDirectory() as diretorio:
+        csv = os.path.join(diretorio, 'owid-covid-data.csv')
+        gerar_owid_dashboard(n_locais=n_locais).to_csv(csv, index=False)
+        destino = os.path.join(diretorio, 'snapshots')
+
+        df, tempo_csv = cronometrar(lambda: preparar_dados(pd.read_csv(csv)))
+        _, tempo_hash = cronometrar(lambda: hash_conteudo(df))
+        manifesto, tempo_criacao = cronometrar(lambda: criar_snapshot(df, csv, diretorio=destino))
+        _, tempo_leitura = cronometrar(lambda: carregar_snapshot(manifesto['hash'], destino))
+
+        # Um segundo snapshot para medir a reversão (troca atômica do ponteiro)
+        anterior = criar_snapshot(df.iloc[:-1000], csv, diretorio=destino)
+        apontar(anterior['hash'], diretorio=destino)
+        apontar(manifesto['hash'], diretorio=destino)
+        _, tempo_reversao = cronometrar(lambda: reverter(diretorio=destino))
+        conferir_reversoes(df, csv, anterior['hash'], manifesto['hash'], destino)
+
+        print(f"{n_locais} locais, {len(df):,} linhas; Parquet {manifesto['bytes'] / 1024 ** 2:.1f} MB "
+              f"vs CSV {os.path.getsize(csv) / 1024 ** 2:.1f} MB")
+        print(f"  CSV + processamento (caminho anterior): {tempo_csv:7.2f} s")
+        print(f"  hash de conteúdo:                       {tempo_hash:7.2f} s")
+        print(f"  criação do snapshot (Parquet + manifesto): {tempo_criacao:4.2f} s")
+        print(f"  leitura do snapshot:                    {tempo_leitura:7.2f} s")
+        print(f"  reversão (troca do ponteiro):           {tempo_reversao * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark: tabela comparativa com ordenação, filtro e paginação no servidor
+
+Para quantidades crescentes de locais, mede a montagem da tabela (uma vez por
+versão dos dados) e o custo de uma interação (filtro + ordenação + página +
+estilo), comparando com o estilo por linha sobre a tabela inteira.
+Uso: python benchmarks/bench_tabela.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import gerar_owid  # noqa: E402
+from populacao import adicionar_metricas_per_capita, carregar_populacao  # noqa: E402
+from tabela import COLUNAS_TABELA, calcular_tabela, estilizar_pagina, filtrar, pagina_tabela  # noqa: E402
+
+
+def estilo_por_linha(dados):
+    """Abordagem anterior: uma chamada Python por linha, sobre a tabela inteira"""
+    def destacar(linha):
+        return ['background-color: #ffcccc' if linha['País'] == 'Local 000' else ''] * len(linha)
+    return dados[COLUNAS_TABELA].style.apply(destacar, axis=1).to_html()
+
+
+def medir(funcao, repeticoes=20):
+    """Mediana do tempo de `repeticoes` execuções, em ms"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return np.median(tempos) * 1000
+
+
+def main():
+    print(f"{'locais':>7} {'montagem (s)':>13} {'interação (ms)':>15} {'por linha (ms)':>15}")
+    for n_locais in (50, 250, 1000):
+        df = gerar_owid(n_locais=n_locais, inicio='2020-01-01', fim='2022-12-31')
+        df = adicionar_metricas_per_capita(df, carregar_populacao(df))
+
+        inicio = time.perf_counter()
+        tabela = calcular_tabela(df)
+        montagem = time.perf_counter() - inicio
+
+        def interagir():
+            mascara = filtrar(tabela['dados'], 'local', somente_paises=True, somente_vacinados=True)
+            pagina, _ = pagina_tabela(tabela, 'Mortes/Milhão', False, mascara, pagina=2, tamanho_pagina=25)
+            estilizar_pagina(pagina, destacados=['Local 001']).to_html()
+
+        print(f"{n_locais:>7} {montagem:>13.2f} {medir(interagir):>15.1f} "
+              f"{medir(lambda: estilo_por_linha(tabela['dados']), 5):>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
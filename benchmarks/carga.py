@@ -0,0 +1,183 @@
+"""Teste de carga: N sessões simultâneas trocando país e período num processo do dashboard
+
+Sobe um substituto local do OWID (benchmarks/servidor_owid.py, dados
+sintéticos) e um servidor do dashboard apontado para ele por OWID_URL, num
+diretório temporário. Para cada nível de concorrência, N usuários abrem a
+página e, até o fim do intervalo, alternam pausas (exponenciais, média
+`--pausa`) com interações na barra lateral seguindo MIX_ACOES: trocar o país
+(com mais peso para os mais procurados), trocar o período ou os dois. Cada
+interação é um rerun completo do script.
+
+Relata por nível: reruns concluídos, vazão, latência dos reruns (p50/p95/p99),
+reruns com exceção, CPU e pico de RSS do processo do dashboard e CPU do
+próprio cliente (para perceber quando o gerador de carga vira o gargalo).
+
+Uso:
+    python benchmarks/carga.py                           # níveis 1,2,4,8,16; 30 s cada
+    python benchmarks/carga.py --niveis 1,4,16 --duracao 60 --pausa 2
+    python benchmarks/carga.py --url http://host:8501 --pid 1234   # app já em execução
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from benchmarks.cliente_streamlit import SessaoInterativa, servidor  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_owid_dashboard  # noqa: E402
+from benchmarks.servidor_owid import ServidorOWIDLocal  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROTULO_LOCAL = "Selecione o País/Região"
+ROTULO_PERIODO = "Selecione o intervalo de anos"
+
+# Proporção de cada tipo de interação
+MIX_ACOES = {'local': 0.6, 'periodo': 0.25, 'ambos': 0.15}
+# Peso de cada país na escolha (os demais valem 1)
+PESOS_LOCAIS = {'Mundo': 5, 'Brasil': 5, 'Estados Unidos': 3, 'Índia': 2, 'Reino Unido': 2}
+
+TICKS_POR_SEGUNDO = os.sysconf('SC_CLK_TCK')
+
+
+def tempo_cpu(pid):
+    """Segundos de CPU (usuário + sistema) já gastos pelo processo, lidos de /proc"""
+    with open(f'/proc/{pid}/stat') as arquivo:
+        campos = arquivo.read().rsplit(')', 1)[1].split()
+    return (int(campos[11]) + int(campos[12])) / TICKS_POR_SEGUNDO
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as arquivo:
+        return next(int(linha.split()[1]) for linha in arquivo if linha.startswith('VmRSS')) / 1024
+
+
+class MonitorProcesso:
+    """Amostra CPU e RSS de um processo numa thread; `medir()` devolve os valores do intervalo e reinicia"""
+
+    def __init__(self, pid, intervalo=0.2):
+        self.pid = pid
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._reiniciar()
+        threading.Thread(target=self._amostrar, daemon=True).start()
+
+    def _reiniciar(self):
+        self._inicio = (time.monotonic(), tempo_cpu(self.pid))
+        self._pico_rss = rss_mb(self.pid)
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self._pico_rss = max(self._pico_rss, rss_mb(self.pid))
+            except FileNotFoundError:
+                return
+
+    def medir(self):
+        """{'cpu_pct', 'rss_pico_mb'} desde a última medição (CPU em % de um núcleo)"""
+        relogio, cpu = self._inicio
+        medida = {'cpu_pct': 100 * (tempo_cpu(self.pid) - cpu) / (time.monotonic() - relogio),
+                  'rss_pico_mb': self._pico_rss}
+        self._reiniciar()
+        return medida
+
+    def parar(self):
+        self._parar.set()
+
+
+def escolher_interacao(rng, widgets):
+    """Novos valores de widgets para uma interação sorteada segundo MIX_ACOES"""
+    acao = rng.choices(list(MIX_ACOES), weights=list(MIX_ACOES.values()))[0]
+    estados = {}
+    if acao in ('local', 'ambos'):
+        locais = widgets[ROTULO_LOCAL]['opcoes']
+        estados[ROTULO_LOCAL] = rng.choices(locais, weights=[PESOS_LOCAIS.get(local, 1) for local in locais])[0]
+    if acao in ('periodo', 'ambos'):
+        anos = widgets[ROTULO_PERIODO]['opcoes']
+        inicio, fim = sorted(rng.sample(range(len(anos)), 2)) if len(anos) > 1 else (0, 0)
+        estados[ROTULO_PERIODO] = [anos[inicio], anos[fim]]
+    return estados
+
+
+async def usuario(url, limite, rng, pausa, resultados):
+    """Abre a página e interage até `limite` (time.monotonic); acumula as medidas em `resultados`"""
+    async with SessaoInterativa(url) as sessao:
+        medida = await sessao.executar()
+        resultados['cargas_iniciais'].append(medida['duracao'])
+        estados = {}
+        while True:
+            await asyncio.sleep(rng.expovariate(1 / pausa) if pausa > 0 else 0)
+            if time.monotonic() >= limite:
+                return
+            # Cada interação reenvia o estado acumulado, como o navegador faz
+            estados.update(escolher_interacao(rng, sessao.widgets))
+            medida = await sessao.executar(estados)
+            resultados['latencias'].append(medida['duracao'])
+            resultados['excecoes'] += medida['excecoes'] > 0
+
+
+async def nivel(url, sessoes, duracao, pausa, semente):
+    resultados = {'latencias': [], 'cargas_iniciais': [], 'excecoes': 0}
+    limite = time.monotonic() + duracao
+    await asyncio.gather(*[usuario(url, limite, random.Random(semente + indice), pausa, resultados)
+                           for indice in range(sessoes)])
+    return resultados
+
+
+def executar_niveis(url, pid, niveis, duracao, pausa, semente=42):
+    monitor = MonitorProcesso(pid) if pid else None
+    cliente = MonitorProcesso(os.getpid())
+    print(f"{'sessões':>8} {'reruns':>7} {'vazão (/s)':>11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'exceções':>9} {'carga inicial p50 (s)':>22} {'CPU app (%)':>12} {'RSS app (MB)':>13} {'CPU cliente (%)':>16}")
+    for sessoes in niveis:
+        inicio = time.monotonic()
+        resultados = asyncio.run(nivel(url, sessoes, duracao, pausa, semente))
+        decorrido = time.monotonic() - inicio
+        servidor_medida = monitor.medir() if monitor else {'cpu_pct': float('nan'), 'rss_pico_mb': float('nan')}
+        cliente_medida = cliente.medir()
+
+        latencias = np.array(resultados['latencias']) * 1000
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99]) if len(latencias) else (float('nan'),) * 3
+        print(f"{sessoes:>8} {len(latencias):>7} {len(latencias) / decorrido:>11.2f} {p50:>9.0f} {p95:>9.0f} {p99:>9.0f} "
+              f"{resultados['excecoes']:>9} {np.median(resultados['cargas_iniciais']):>22.2f} "
+              f"{servidor_medida['cpu_pct']:>12.0f} {servidor_medida['rss_pico_mb']:>13.0f} {cliente_medida['cpu_pct']:>16.0f}")
+    if monitor:
+        monitor.parar()
+    cliente.parar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--niveis', default='1,2,4,8,16', help="sessões simultâneas em cada nível (separadas por vírgula)")
+    parser.add_argument('--duracao', type=float, default=30, help="segundos de interação por nível")
+    parser.add_argument('--pausa', type=float, default=1.0, help="pausa média entre interações de um usuário (s)")
+    parser.add_argument('--locais', type=int, default=250, help="locais nos dados sintéticos do substituto do OWID")
+    parser.add_argument('--url', help="dashboard já em execução (não sobe servidor nem substituto do OWID)")
+    parser.add_argument('--pid', type=int, help="PID do dashboard em --url, para medir CPU e RSS")
+    argumentos = parser.parse_args()
+    niveis = [int(valor) for valor in argumentos.niveis.split(',')]
+
+    if argumentos.url:
+        executar_niveis(argumentos.url, argumentos.pid, niveis, argumentos.duracao, argumentos.pausa)
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio, \
+            ServidorOWIDLocal(gerar_owid_dashboard(n_locais=argumentos.locais)) as owid, \
+            servidor(['-m', 'streamlit', 'run', os.path.join(RAIZ, 'dashboard.py')], diretorio,
+                     env={'OWID_URL': owid.url}) as instancia:
+        # Primeira visita: busca no substituto do OWID, grava o snapshot e enche os caches
+        asyncio.run(nivel(instancia.url, 1, 0, 0, 0))
+        print(f"{argumentos.locais} locais sintéticos servidos em {owid.url} "
+              f"({owid.requisicoes} busca(s)); pausa média {argumentos.pausa} s; {argumentos.duracao:.0f} s por nível")
+        executar_niveis(instancia.url, instancia.processo.pid, niveis, argumentos.duracao, argumentos.pausa)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Servidor Streamlit em subprocesso e cliente mínimo do seu protocolo, para os benchmarks
+
+O cliente abre a mesma conexão que o navegador (WebSocket em /_stcore/stream),
+pede a execução do script e lê as mensagens protobuf até `script_finished`,
+medindo o tempo até a primeira mensagem de conteúdo e até a página completa.
+`SessaoInterativa` mantém a conexão aberta e reexecuta o script com novos
+valores de widgets, como um usuário mexendo na barra lateral.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+OPCOES_SERVIDOR = ['--server.headless', 'true', '--browser.gatherUsageStats', 'false',
+                   '--server.fileWatcherType', 'none']
+
+
+def porta_livre():
+    """Porta TCP livre em localhost"""
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+class Servidor:
+    """Processo do servidor com a saída acumulada (para aguardar mensagens de log)"""
+
+    def __init__(self, processo, porta):
+        self.processo = processo
+        self.porta = porta
+        self.url = f'http://localhost:{porta}'
+        self.linhas = []
+        self._nova_linha = threading.Condition()
+        threading.Thread(target=self._ler_saida, daemon=True).start()
+
+    def _ler_saida(self):
+        for linha in self.processo.stdout:
+            with self._nova_linha:
+                self.linhas.append(linha)
+                self._nova_linha.notify_all()
+
+    def aguardar_log(self, trecho, timeout=600):
+        """Bloqueia até uma linha da saída conter `trecho`; retorna a linha (None se esgotar o tempo)"""
+        limite = time.monotonic() + timeout
+        with self._nova_linha:
+            while True:
+                for linha in self.linhas:
+                    if trecho in linha:
+                        return linha
+                restante = limite - time.monotonic()
+                if restante <= 0 or self.processo.poll() is not None:
+                    return None
+                self._nova_linha.wait(restante)
+
+    def aguardar_pronto(self, timeout=60):
+        """Espera o endpoint de saúde responder"""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            try:
+                with urllib.request.urlopen(f'{self.url}/_stcore/health', timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.05)
+        raise TimeoutError(f"Servidor não respondeu em {timeout} s:\n{''.join(self.linhas[-20:])}")
+
+
+@contextmanager
+def servidor(argumentos, diretorio, porta=None, env=None):
+    """Sobe `python <argumentos> --server.port <porta> ...` em `diretorio` e encerra ao sair"""
+    porta = porta or porta_livre()
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ambiente = {**os.environ, 'PYTHONPATH': raiz, 'PYTHONUNBUFFERED': '1', **(env or {})}
+    processo = subprocess.Popen(
+        [sys.executable, *argumentos, '--server.port', str(porta), *OPCOES_SERVIDOR],
+        cwd=diretorio, env=ambiente, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    try:
+        instancia = Servidor(processo, porta)
+        instancia.aguardar_pronto()
+        yield instancia
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+
+
+async def _sessao(url, query_string, timeout):
+    inicio = time.perf_counter()
+    medidas = {'primeiro_conteudo': None, 'completo': None, 'mensagens': 0, 'bytes': 0}
+    endereco = url.replace('http://', 'ws://') + '/_stcore/stream'
+
+    async with websockets.connect(endereco, subprotocols=['streamlit'], max_size=None) as conexao:
+        pedido = BackMsg()
+        pedido.rerun_script.query_string = query_string
+        pedido.rerun_script.page_script_hash = ''
+        await conexao.send(pedido.SerializeToString())
+
+        while True:
+            bruto = await asyncio.wait_for(conexao.recv(), timeout)
+            mensagem = ForwardMsg()
+            mensagem.ParseFromString(bruto)
+            medidas['mensagens'] += 1
+            medidas['bytes'] += len(bruto)
+            tipo = mensagem.WhichOneof('type')
+            if tipo == 'delta' and medidas['primeiro_conteudo'] is None:
+                medidas['primeiro_conteudo'] = time.perf_counter() - inicio
+            elif tipo == 'script_finished':
+                medidas['completo'] = time.perf_counter() - inicio
+                return medidas
+
+
+def sessao(url, query_string='', timeout=600):
+    """Abre uma sessão como um navegador e mede {'primeiro_conteudo', 'completo', 'mensagens', 'bytes'} (s)"""
+    return asyncio.run(_sessao(url, query_string, timeout))
+
+
+class SessaoInterativa:
+    """Sessão assíncrona que reexecuta o script trocando valores de widgets (gerenciador de contexto)
+
+    Os widgets são descobertos pelas mensagens da primeira execução e ficam em
+    `widgets`: rótulo -> {'id', 'tipo', 'opcoes'}.
+    """
+
+    def __init__(self, url, timeout=600):
+        self.endereco = url.replace('http://', 'ws://') + '/_stcore/stream'
+        self.timeout = timeout
+        self.widgets = {}
+        self._conexao = None
+
+    async def __aenter__(self):
+        self._conexao = await websockets.connect(self.endereco, subprotocols=['streamlit'], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._conexao.close()
+
+    def _registrar_widget(self, mensagem):
+        elemento = mensagem.delta.new_element
+        tipo = elemento.WhichOneof('type')
+        if tipo in ('selectbox', 'slider', 'radio', 'multiselect', 'checkbox', 'toggle', 'number_input', 'text_input'):
+            widget = getattr(elemento, tipo)
+            self.widgets[widget.label] = {'id': widget.id, 'tipo': tipo, 'opcoes': list(getattr(widget, 'options', []))}
+
+    async def executar(self, estados=None):
+        """Reexecuta o script com `estados` ({rótulo: valor} de selectbox ou {rótulo: [valores]} de
+        select_slider) e espera o fim; retorna {'duracao', 'mensagens', 'bytes', 'excecoes'}"""
+        inicio = time.perf_counter()
+        pedido = BackMsg()
+        pedido.rerun_script.query_string = ''
+        pedido.rerun_script.page_script_hash = ''
+        for rotulo, valor in (estados or {}).items():
+            estado = WidgetState(id=self.widgets[rotulo]['id'])
+            if isinstance(valor, (list, tuple)):
+                estado.string_array_value.data.extend(str(item) for item in valor)
+            else:
+                estado.string_value = str(valor)
+            pedido.rerun_script.widget_states.widgets.append(estado)
+        await self._conexao.send(pedido.SerializeToString())
+
+        medidas = {'mensagens': 0, 'bytes': 0, 'excecoes': 0}
+        while True:
+            bruto = await asyncio.wait_for(self._conexao.recv(), self.timeout)
+            mensagem = ForwardMsg()
+            mensagem.ParseFromString(bruto)
+            medidas['mensagens'] += 1
+            medidas['bytes'] += len(bruto)
+            tipo = mensagem.WhichOneof('type')
+            if tipo == 'delta' and mensagem.delta.WhichOneof('type') == 'new_element':
+                self._registrar_widget(mensagem)
+                medidas['excecoes'] += mensagem.delta.new_element.WhichOneof('type') == 'exception'
+            elif tipo == 'script_finished':
+                medidas['duracao'] = time.perf_counter() - inicio
+                return medidas
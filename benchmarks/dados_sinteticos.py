@@ -0,0 +1,59 @@
+"""Gera um DataFrame no formato OWID para os benchmarks (sem acesso à rede)"""
+import numpy as np
+import pandas as pd
+
+
+def gerar_owid(n_locais=20, inicio='2020-01-01', fim='2023-12-31', semente=42):
+    """Cria séries diárias sintéticas de casos, mortes e vacinação por local"""
+    rng = np.random.default_rng(semente)
+    datas = pd.date_range(inicio, fim, freq='D')
+    n_dias = len(datas)
+    t = np.arange(n_dias)
+
+    quadros = []
+    for i in range(n_locais):
+        # Três ondas com picos e larguras aleatórias
+        casos = np.zeros(n_dias)
+        for _ in range(3):
+            pico = rng.uniform(0, n_dias)
+            largura = rng.uniform(20, 90)
+            altura = rng.uniform(1e3, 1e5)
+            casos += altura * np.exp(-0.5 * ((t - pico) / largura) ** 2)
+        casos = rng.poisson(casos).astype(float)
+
+        inicio_vac = int(rng.uniform(330, 420))
+        cfr = np.where(t < inicio_vac, 0.02, 0.006)
+        mortes = rng.binomial(casos.astype(np.int64), cfr).astype(float)
+
+        vacinados = np.where(t >= inicio_vac, (t - inicio_vac) * rng.uniform(1e4, 1e5), 0.0)
+
+        quadros.append(pd.DataFrame({
+            'location': f'Local {i:03d}',
+            'iso_code': f'L{i:02d}',
+            'date': datas,
+            'new_cases': casos,
+            'new_deaths': mortes,
+            'total_cases': np.cumsum(casos),
+            'total_deaths': np.cumsum(mortes),
+            'people_vaccinated': vacinados,
+            'population': rng.uniform(1e6, 3e8)
+        }))
+
+    return pd.concat(quadros, ignore_index=True)
+
+
+# Locais exibidos pelo dashboard (os primeiros locais sintéticos recebem esses nomes)
+LOCAIS_DASHBOARD = [
+    'World', 'Brazil', 'United States', 'India', 'Russia', 'United Kingdom', 'France', 'Germany',
+    'Italy', 'Spain', 'China', 'Japan', 'South Korea', 'Canada', 'Mexico', 'Argentina', 'Turkey',
+    'Indonesia', 'Saudi Arabia', 'South Africa', 'Australia'
+]
+
+
+def gerar_owid_dashboard(n_locais=40, **kwargs):
+    """Quadro sintético em que os locais principais do dashboard existem (World como OWID_WRL)"""
+    df = gerar_owid(n_locais=max(n_locais, len(LOCAIS_DASHBOARD)), **kwargs)
+    nomes = {f'Local {i:03d}': nome for i, nome in enumerate(LOCAIS_DASHBOARD)}
+    df['location'] = df['location'].map(nomes).fillna(df['location'])
+    df.loc[df['location'] == 'World', 'iso_code'] = 'OWID_WRL'
+    return df
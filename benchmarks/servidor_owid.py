@@ -0,0 +1,47 @@
+"""Servidor HTTP em processo que substitui o catálogo do OWID nos benchmarks (sem rede)
+
+Serve um CSV sintético no formato OWID em `/compact.csv`; aponte o dashboard
+para ele com a variável de ambiente OWID_URL. Conta as requisições atendidas,
+para conferir quantas vezes o dashboard buscou os dados.
+"""
+import http.server
+import threading
+
+
+class _Tratador(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/compact.csv':
+            self.send_error(404)
+            return
+        self.server.requisicoes += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(self.server.conteudo)))
+        self.end_headers()
+        self.wfile.write(self.server.conteudo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ServidorOWIDLocal(http.server.ThreadingHTTPServer):
+    """Servidor em thread própria; use como gerenciador de contexto e aponte OWID_URL para `.url`"""
+
+    daemon_threads = True
+
+    def __init__(self, df, porta=0):
+        super().__init__(('127.0.0.1', porta), _Tratador)
+        self.conteudo = df.to_csv(index=False).encode()
+        self.requisicoes = 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/compact.csv'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,145 @@
+"""Servidor RESP em processo, substituto do Redis para benchmarks (sem dependência externa)
+
+Implementa o subconjunto usado por cache_compartilhado.CacheRedis: PING, GET,
+SET (com EX), DEL, DBSIZE, FLUSHDB, SELECT e INFO, com limite de memória e
+remoção LRU (como `maxmemory-policy allkeys-lru`), contando `evicted_keys`.
+"""
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Armazem:
+    """Dicionário LRU limitado pela soma dos tamanhos de chaves e valores"""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.dados = OrderedDict()
+        self.validade = {}
+        self.bytes = 0
+        self.removidas = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.trava = threading.Lock()
+
+    def _apagar(self, chave):
+        valor = self.dados.pop(chave, None)
+        self.validade.pop(chave, None)
+        if valor is not None:
+            self.bytes -= len(chave) + len(valor)
+        return valor is not None
+
+    def obter(self, chave):
+        with self.trava:
+            if chave in self.validade and self.validade[chave] <= time.monotonic():
+                self._apagar(chave)
+            if chave not in self.dados:
+                self.falhas += 1
+                return None
+            self.dados.move_to_end(chave)
+            self.acertos += 1
+            return self.dados[chave]
+
+    def gravar(self, chave, valor, segundos=None):
+        with self.trava:
+            self._apagar(chave)
+            self.dados[chave] = valor
+            self.bytes += len(chave) + len(valor)
+            if segundos:
+                self.validade[chave] = time.monotonic() + segundos
+            while self.limite_bytes and self.bytes > self.limite_bytes and len(self.dados) > 1:
+                self._apagar(next(iter(self.dados)))
+                self.removidas += 1
+
+    def apagar(self, chaves):
+        with self.trava:
+            return sum(self._apagar(chave) for chave in chaves)
+
+    def limpar(self):
+        with self.trava:
+            self.dados.clear()
+            self.validade.clear()
+            self.bytes = 0
+
+
+class _Tratador(socketserver.StreamRequestHandler):
+    def _ler_comando(self):
+        linha = self.rfile.readline()
+        if not linha:
+            return None
+        if not linha.startswith(b'*'):
+            return linha.strip().split()
+        partes = []
+        for _ in range(int(linha[1:])):
+            tamanho = int(self.rfile.readline()[1:])
+            partes.append(self.rfile.read(tamanho + 2)[:-2])
+        return partes
+
+    def _responder(self, valor):
+        if valor is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(valor, int):
+            self.wfile.write(b':%d\r\n' % valor)
+        elif isinstance(valor, str):
+            self.wfile.write(f'+{valor}\r\n'.encode())
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(valor), valor))
+
+    def handle(self):
+        armazem = self.server.armazem
+        while True:
+            partes = self._ler_comando()
+            if partes is None:
+                return
+            nome, argumentos = partes[0].upper(), partes[1:]
+            if nome == b'PING':
+                self._responder('PONG')
+            elif nome == b'GET':
+                self._responder(armazem.obter(argumentos[0]))
+            elif nome == b'SET':
+                segundos = None
+                if len(argumentos) >= 4 and argumentos[2].upper() == b'EX':
+                    segundos = int(argumentos[3])
+                armazem.gravar(argumentos[0], argumentos[1], segundos)
+                self._responder('OK')
+            elif nome == b'DEL':
+                self._responder(armazem.apagar(argumentos))
+            elif nome == b'DBSIZE':
+                self._responder(len(armazem.dados))
+            elif nome == b'FLUSHDB':
+                armazem.limpar()
+                self._responder('OK')
+            elif nome == b'SELECT':
+                self._responder('OK')
+            elif nome == b'INFO':
+                texto = (f"# Memory\r\nused_memory:{armazem.bytes}\r\nmaxmemory:{armazem.limite_bytes}\r\n"
+                         f"# Stats\r\nkeyspace_hits:{armazem.acertos}\r\nkeyspace_misses:{armazem.falhas}\r\n"
+                         f"evicted_keys:{armazem.removidas}\r\n")
+                self._responder(texto.encode())
+            else:
+                self.wfile.write(f"-ERR comando não suportado '{nome.decode()}'\r\n".encode())
+            self.wfile.flush()
+
+
+class ServidorRespLocal(socketserver.ThreadingTCPServer):
+    """Servidor em thread própria; use como gerenciador de contexto e conecte em `.url`"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, limite_bytes=0, porta=0):
+        super().__init__(('127.0.0.1', porta), _Tratador)
+        self.armazem = _Armazem(limite_bytes)
+
+    @property
+    def url(self):
+        return f'redis://127.0.0.1:{self.server_address[1]}/0'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
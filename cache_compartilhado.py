@@ -0,0 +1,407 @@
+"""Cache de resultados compartilhado entre processos (réplicas do dashboard)
+
+O st.cache_data vale só dentro de um processo. Este módulo acrescenta uma
+segunda camada, consultada quando o cache do processo erra: o dado preparado,
+as métricas derivadas e os payloads de figuras ficam num backend comum, de
+modo que só a primeira réplica a ver uma versão dos dados paga pelo cálculo.
+
+Backends:
+
+- 'disco': um arquivo por chave num diretório (local ou volume compartilhado),
+  com remoção LRU quando o total passa do limite de bytes;
+- 'redis': qualquer servidor que fale o protocolo RESP do Redis, com um cliente
+  mínimo embutido (sem dependência extra); a remoção fica a cargo do servidor
+  (maxmemory + política LRU).
+
+As chaves são o SHA-256 do nome da função, da versão do código (hash de
+todos os .py do projeto: os módulos que fazem o cálculo, não só o envoltório
+em cache_dados.py), da versão dos dados e dos demais parâmetros (argumentos
+com prefixo `_`, como os DataFrames, ficam de fora, na mesma convenção do
+st.cache_data). Como o backend sobrevive a deploys, as chaves começam pela
+versão do código e cada valor é gravado junto com ela e com a própria chave:
+uma entrada de outra versão nunca é devolvida.
+
+Os valores são gravados com pickle, e ler um pickle executa código: quem
+consegue escrever no backend consegue executar código em todas as réplicas.
+Com CACHE_SEGREDO definido, cada valor leva na frente uma etiqueta HMAC-SHA256
+calculada com o segredo, conferida antes do pickle.loads; entradas sem a
+etiqueta certa são descartadas como falha. Sem o segredo, o backend (o
+diretório ou o servidor Redis) precisa ser privado e confiável: nenhum outro
+sistema pode ter acesso de escrita a ele.
+
+Configuração por variáveis de ambiente:
+
+- CACHE_COMPARTILHADO: 'disco', 'redis' ou vazio (desligado, padrão)
+- CACHE_DIRETORIO: diretório do backend em disco (padrão: .cache_compartilhado)
+- CACHE_LIMITE_MB: limite do backend em disco (padrão: 2048)
+- CACHE_REDIS_URL: redis://host:porta/db (padrão: redis://localhost:6379/0)
+- CACHE_TTL: validade das entradas no Redis, em segundos (padrão: sem validade)
+- CACHE_SEGREDO: segredo das etiquetas HMAC dos valores, igual em todas as
+  réplicas (padrão: vazio, sem autenticação; recomendado com Redis)
+"""
+import functools
+import glob
+import hashlib
+import hmac
+import inspect
+import logging
+import os
+import pickle
+import socket
+import threading
+from urllib.parse import urlparse
+
+_LOGGER = logging.getLogger(__name__)
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Marca de ausência (None é um valor válido em cache)
+AUSENTE = object()
+
+LIMITE_DISCO_MB = 2048
+
+TAMANHO_ETIQUETA = hashlib.sha256().digest_size
+
+
+class Estatisticas:
+    """Contadores de acertos, falhas, gravações e remoções (e `extras`), seguros entre threads"""
+
+    def __init__(self, extras=()):
+        self._trava = threading.Lock()
+        self._contadores = {'acertos': 0, 'falhas': 0, 'gravacoes': 0, 'remocoes': 0, 'erros': 0}
+        self._contadores.update(dict.fromkeys(extras, 0))
+
+    def contar(self, nome, quantidade=1):
+        with self._trava:
+            self._contadores[nome] += quantidade
+
+    def como_dict(self):
+        with self._trava:
+            contadores = dict(self._contadores)
+        consultas = contadores['acertos'] + contadores['falhas']
+        contadores['taxa_acerto'] = contadores['acertos'] / consultas if consultas else 0.0
+        return contadores
+
+
+def gerar_chave(*partes):
+    """SHA-256 (hex) da serialização das partes"""
+    return hashlib.sha256(pickle.dumps(partes, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def hash_codigo(raiz=RAIZ):
+    """SHA-256 do código do projeto (todos os .py da raiz, com os nomes dos arquivos)"""
+    resumo = hashlib.sha256()
+    for caminho in sorted(glob.glob(os.path.join(raiz, '*.py'))):
+        with open(caminho, 'rb') as arquivo:
+            resumo.update(os.path.basename(caminho).encode() + arquivo.read())
+    return resumo.hexdigest()
+
+
+def serializar(valor, segredo=None):
+    """Pickle do valor, precedido da etiqueta HMAC-SHA256 quando há `segredo`"""
+    dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+    if segredo is None:
+        return dados
+    return hmac.new(segredo, dados, 'sha256').digest() + dados
+
+
+def desserializar(dados, segredo=None):
+    """Inverso de `serializar`; AUSENTE se a etiqueta não confere (o pickle nem chega a ser lido)"""
+    if segredo is not None:
+        etiqueta, dados = dados[:TAMANHO_ETIQUETA], dados[TAMANHO_ETIQUETA:]
+        if not hmac.compare_digest(etiqueta, hmac.new(segredo, dados, 'sha256').digest()):
+            return AUSENTE
+    return pickle.loads(dados)
+
+
+@functools.lru_cache(maxsize=None)
+def versao_codigo():
+    """Versão do código deste processo, que prefixa as chaves do cache compartilhado"""
+    return hash_codigo()
+
+
+def _contar_leitura(backend, chave, valor):
+    """Conta a leitura de uma entrada existente: acerto, ou falha se a etiqueta HMAC não conferiu"""
+    if valor is AUSENTE:
+        _LOGGER.warning("Entrada %s do cache compartilhado com etiqueta HMAC inválida; descartada", chave[:24])
+        backend.estatisticas.contar('falhas')
+    else:
+        backend.estatisticas.contar('acertos')
+    return valor
+
+
+# ========================================
+# Backend em disco
+# ========================================
+
+class CacheDisco:
+    """Um arquivo por chave; a data de modificação marca o último uso e guia a remoção LRU"""
+
+    def __init__(self, diretorio, limite_bytes=LIMITE_DISCO_MB * 1024 ** 2, segredo=None):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.segredo = segredo
+        self.estatisticas = Estatisticas()
+        self._trava = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f'{chave}.pkl')
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as arquivo:
+                dados = arquivo.read()
+            os.utime(caminho)
+        except FileNotFoundError:
+            self.estatisticas.contar('falhas')
+            return AUSENTE
+        return _contar_leitura(self, chave, desserializar(dados, self.segredo))
+
+    def gravar(self, chave, valor):
+        dados = serializar(valor, self.segredo)
+        if len(dados) > self.limite_bytes:
+            return
+        caminho = self._caminho(chave)
+        temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(dados)
+        # Troca atômica: leitores de outros processos nunca veem um arquivo pela metade
+        os.replace(temporario, caminho)
+        self.estatisticas.contar('gravacoes')
+        self._podar()
+
+    def _podar(self):
+        """Remove as entradas usadas há mais tempo até o total caber no limite"""
+        with self._trava:
+            entradas = []
+            for entrada in os.scandir(self.diretorio):
+                if entrada.name.endswith('.pkl'):
+                    try:
+                        info = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    entradas.append((info.st_mtime, info.st_size, entrada.path))
+
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            for _, tamanho, caminho in sorted(entradas):
+                if total <= self.limite_bytes:
+                    break
+                try:
+                    os.remove(caminho)
+                    self.estatisticas.contar('remocoes')
+                except FileNotFoundError:
+                    pass
+                total -= tamanho
+
+    def limpar(self):
+        for entrada in os.scandir(self.diretorio):
+            if entrada.name.endswith('.pkl'):
+                os.remove(entrada.path)
+
+    def resumo(self):
+        """Estatísticas deste processo mais ocupação atual do diretório"""
+        arquivos = [entrada.stat().st_size for entrada in os.scandir(self.diretorio) if entrada.name.endswith('.pkl')]
+        return {**self.estatisticas.como_dict(), 'entradas': len(arquivos), 'bytes': sum(arquivos),
+                'limite_bytes': self.limite_bytes}
+
+
+# ========================================
+# Backend Redis (protocolo RESP)
+# ========================================
+
+class ErroResp(Exception):
+    """Resposta de erro (-ERR ...) do servidor"""
+
+
+class ClienteResp:
+    """Cliente RESP mínimo: uma conexão, comandos síncronos serializados por uma trava"""
+
+    def __init__(self, host='localhost', porta=6379, db=0, timeout=10):
+        self.endereco = (host, porta)
+        self.db = db
+        self.timeout = timeout
+        self._trava = threading.Lock()
+        self._conexao = None
+        self._leitor = None
+
+    def _conectar(self):
+        self._conexao = socket.create_connection(self.endereco, timeout=self.timeout)
+        self._leitor = self._conexao.makefile('rb')
+        if self.db:
+            self._enviar('SELECT', self.db)
+
+    def fechar(self):
+        if self._conexao is not None:
+            self._leitor.close()
+            self._conexao.close()
+            self._conexao = self._leitor = None
+
+    def _enviar(self, *partes):
+        partes = [parte if isinstance(parte, bytes) else str(parte).encode() for parte in partes]
+        pedido = [b'*%d\r\n' % len(partes)]
+        for parte in partes:
+            pedido.append(b'$%d\r\n%s\r\n' % (len(parte), parte))
+        self._conexao.sendall(b''.join(pedido))
+        return self._ler_resposta()
+
+    def _ler_resposta(self):
+        linha = self._leitor.readline()
+        if not linha:
+            raise ConnectionError("Conexão encerrada pelo servidor")
+        tipo, conteudo = linha[:1], linha[1:-2]
+        if tipo == b'+':
+            return conteudo.decode()
+        if tipo == b'-':
+            raise ErroResp(conteudo.decode())
+        if tipo == b':':
+            return int(conteudo)
+        if tipo == b'$':
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            dados = self._leitor.read(tamanho + 2)
+            return dados[:-2]
+        if tipo == b'*':
+            quantidade = int(conteudo)
+            return None if quantidade < 0 else [self._ler_resposta() for _ in range(quantidade)]
+        raise ErroResp(f"Resposta RESP inválida: {linha!r}")
+
+    def comando(self, *partes):
+        """Executa um comando; reconecta uma vez se a conexão tiver caído"""
+        with self._trava:
+            for tentativa in range(2):
+                try:
+                    if self._conexao is None:
+                        self._conectar()
+                    return self._enviar(*partes)
+                except (ConnectionError, socket.timeout, OSError):
+                    self.fechar()
+                    if tentativa:
+                        raise
+
+
+class CacheRedis:
+    """Backend sobre um servidor RESP; a remoção por memória é feita pelo próprio servidor"""
+
+    def __init__(self, url='redis://localhost:6379/0', prefixo='covid:', ttl=None, segredo=None):
+        partes = urlparse(url)
+        db = int(partes.path.strip('/') or 0)
+        self.cliente = ClienteResp(partes.hostname or 'localhost', partes.port or 6379, db)
+        self.prefixo = prefixo
+        self.ttl = ttl
+        self.segredo = segredo
+        self.estatisticas = Estatisticas()
+
+    def obter(self, chave):
+        dados = self.cliente.comando('GET', self.prefixo + chave)
+        if dados is None:
+            self.estatisticas.contar('falhas')
+            return AUSENTE
+        return _contar_leitura(self, chave, desserializar(dados, self.segredo))
+
+    def gravar(self, chave, valor):
+        dados = serializar(valor, self.segredo)
+        if self.ttl:
+            self.cliente.comando('SET', self.prefixo + chave, dados, 'EX', self.ttl)
+        else:
+            self.cliente.comando('SET', self.prefixo + chave, dados)
+        self.estatisticas.contar('gravacoes')
+
+    def limpar(self):
+        self.cliente.comando('FLUSHDB')
+
+    def info_servidor(self):
+        """Campos `chave:valor` da seção stats/memory do INFO"""
+        texto = self.cliente.comando('INFO').decode()
+        campos = {}
+        for linha in texto.splitlines():
+            if ':' in linha and not linha.startswith('#'):
+                nome, valor = linha.split(':', 1)
+                campos[nome] = valor
+        return campos
+
+    def resumo(self):
+        """Estatísticas deste processo mais as remoções e a memória informadas pelo servidor"""
+        info = self.info_servidor()
+        return {**self.estatisticas.como_dict(), 'remocoes': int(info.get('evicted_keys', 0)),
+                'bytes': int(info.get('used_memory', 0)), 'limite_bytes': int(info.get('maxmemory', 0))}
+
+
+# ========================================
+# Configuração e decorador
+# ========================================
+
+@functools.lru_cache(maxsize=None)
+def backend_configurado():
+    """Backend escolhido pelas variáveis de ambiente (None quando desligado), um por processo.
+
+    Sem CACHE_SEGREDO os valores são lidos sem autenticação (pickle): o backend
+    precisa ser privado e confiável, e com Redis isso gera um aviso no log.
+    """
+    tipo = os.environ.get('CACHE_COMPARTILHADO', '').strip().lower()
+    segredo = os.environ.get('CACHE_SEGREDO', '').encode() or None
+    if tipo == 'disco':
+        limite_mb = float(os.environ.get('CACHE_LIMITE_MB', LIMITE_DISCO_MB))
+        return CacheDisco(os.environ.get('CACHE_DIRETORIO', '.cache_compartilhado'), int(limite_mb * 1024 ** 2),
+                          segredo)
+    if tipo == 'redis':
+        if segredo is None:
+            _LOGGER.warning("Cache compartilhado no Redis sem CACHE_SEGREDO: quem escreve no servidor executa "
+                            "código nas réplicas; use um Redis privado ou defina o segredo")
+        ttl = os.environ.get('CACHE_TTL')
+        return CacheRedis(os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'), ttl=int(ttl) if ttl else None,
+                          segredo=segredo)
+    if tipo:
+        _LOGGER.warning("CACHE_COMPARTILHADO=%r desconhecido; cache compartilhado desligado", tipo)
+    return None
+
+
+def compartilhado(funcao):
+    """Decorador: consulta o backend configurado antes de calcular e grava o resultado depois.
+
+    Fica por baixo do @st.cache_data, que continua sendo a primeira camada. Falhas
+    do backend (servidor fora do ar, disco cheio) só geram um aviso no log: o
+    valor é calculado normalmente.
+    """
+    assinatura = inspect.signature(funcao)
+    identificador = (funcao.__module__, funcao.__qualname__)
+
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        backend = backend_configurado()
+        if backend is None:
+            return funcao(*args, **kwargs)
+
+        ligados = assinatura.bind(*args, **kwargs)
+        ligados.apply_defaults()
+        parametros = tuple((nome, valor) for nome, valor in ligados.arguments.items() if not nome.startswith('_'))
+        codigo = versao_codigo()
+        # Prefixo com a versão do código: entradas de deploys diferentes ficam em espaços separados
+        chave = f'{codigo[:16]}-{gerar_chave(codigo, identificador, parametros)}'
+
+        try:
+            entrada = backend.obter(chave)
+        except Exception:
+            _LOGGER.warning("Cache compartilhado indisponível na leitura de %s", funcao.__qualname__, exc_info=True)
+            backend.estatisticas.contar('erros')
+            return funcao(*args, **kwargs)
+        if entrada is not AUSENTE:
+            if isinstance(entrada, tuple) and len(entrada) == 3 and entrada[:2] == (codigo, chave):
+                return entrada[2]
+            _LOGGER.warning("Entrada do cache compartilhado de outra versão do código em %s; recalculando",
+                            funcao.__qualname__)
+            # O backend contou a leitura como acerto, mas o valor não serve: conta como falha
+            backend.estatisticas.contar('acertos', -1)
+            backend.estatisticas.contar('falhas')
+
+        valor = funcao(*args, **kwargs)
+        try:
+            backend.gravar(chave, (codigo, chave, valor))
+        except Exception:
+            _LOGGER.warning("Cache compartilhado indisponível na gravação de %s", funcao.__qualname__, exc_info=True)
+            backend.estatisticas.contar('erros')
+        return valor
+
+    return envoltorio
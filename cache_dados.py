@@ -0,0 +1,265 @@
+"""Funções de carga e cálculo em cache (st.cache_data) usadas pelo dashboard
+
+Ficam num módulo próprio, e não no script da página, para que o pré-aquecimento
+(aquecimento.py) chame exatamente as mesmas funções e preencha os mesmos caches
+que as sessões dos visitantes vão consultar.
+
+Os dados vêm sempre do snapshot atual (snapshots.py); o hash do snapshot é a
+`versao_dados` que entra na chave de todos os caches.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import streamlit as st
+
+from analise import calcular_coorte_vacinacao, calcular_matrizes_comparacao, pivotar
+from cache_compartilhado import compartilhado
+from contrafactual import preparar_componentes, simular
+from correlacao import calcular_correlacoes
+from epidemiologia import estimar_rt
+from eventos import calcular_estudo_eventos
+from limpeza import limpar_notificacoes
+from mapa import calcular_mapa
+from populacao import adicionar_metricas_per_capita, carregar_populacao
+from previsao import prever
+from snapshots import apontar, carregar_snapshot, criar_snapshot, ler_manifesto, ler_ponteiro, validar
+from tabela import calcular_tabela
+
+_LOGGER = logging.getLogger(__name__)
+
+# Idade máxima do snapshot atual antes de buscar os dados de novo
+VALIDADE_SNAPSHOT = timedelta(hours=24)
+# Após uma busca com falha, quanto tempo seguir com o snapshot atual antes de tentar de novo
+ESPERA_APOS_FALHA = 600
+# Estimativas de Rt (uma por versão dos dados e intervalo serial) mantidas na memória do processo
+MAX_ESTIMATIVAS_RT = 8
+
+# Locais do seletor da página, com o nome exibido
+TRADUCAO_PAISES = {
+    'World': 'Mundo',
+    'Brazil': 'Brasil',
+    'United States': 'Estados Unidos',
+    'India': 'Índia',
+    'Russia': 'Rússia',
+    'United Kingdom': 'Reino Unido',
+    'France': 'França',
+    'Germany': 'Alemanha',
+    'Italy': 'Itália',
+    'Spain': 'Espanha',
+    'China': 'China',
+    'Japan': 'Japão',
+    'South Korea': 'Coreia do Sul',
+    'Canada': 'Canadá',
+    'Mexico': 'México',
+    'Argentina': 'Argentina',
+    'Turkey': 'Turquia',
+    'Indonesia': 'Indonésia',
+    'Saudi Arabia': 'Arábia Saudita',
+    'South Africa': 'África do Sul',
+    'Australia': 'Austrália'
+}
+
+_trava_atualizacao = threading.Lock()
+_ultima_falha = {'quando': float('-inf')}
+
+
+def preparar_dados(df):
+    """Etapa cara da carga: padronização, limpeza das notificações e métricas por habitante"""
+    df['date'] = pd.to_datetime(df['date'])
+
+    if 'country' in df.columns and 'location' not in df.columns:
+        df['location'] = df['country']
+    if 'code' in df.columns and 'iso_code' not in df.columns:
+        df['iso_code'] = df['code']
+    
+    df['people_vaccinated'] = df['people_vaccinated'].fillna(0)
+    df['total_deaths'] = df['total_deaths'].fillna(0)
+    df['new_cases'] = df['new_cases'].fillna(0)
+    df['new_deaths'] = df['new_deaths'].fillna(0)
+
+    # Redistribui despejos semanais/fins de semana e revisões negativas (totais preservados)
+    df, cadencia = limpar_notificacoes(df)
+    df['cadencia_notificacao'] = df['location'].map(cadencia).astype('category')
+
+    # Métricas por habitante (por milhão, cobertura vacinal real, mortes/100k pós-vacinação)
+    df = adicionar_metricas_per_capita(df, carregar_populacao(df))
+
+    return df
+
+
+def buscar_dados_brutos():
+    """Lê o CSV do OWID (ou a cópia local de menos de 24 h); retorna o DataFrame, a origem e um aviso (ou None)"""
+    # OWID_URL permite apontar para um espelho ou substituto local (ex.: testes de carga)
+    url_covid = os.environ.get('OWID_URL', 'https://catalog.ourworldindata.org/garden/covid/latest/compact/compact.csv')
+    local_cache = 'owid-covid-data.csv'
+    
+    try:
+        if os.path.exists(local_cache):
+            cache_age = datetime.now().timestamp() - os.path.getmtime(local_cache)
+            if cache_age < 86400:  # 24 horas
+                return pd.read_csv(local_cache), local_cache, None
+        df = pd.read_csv(url_covid)
+        df.to_csv(local_cache, index=False)
+        return df, url_covid, None
+    except Exception as e:
+        if os.path.exists(local_cache):
+            _LOGGER.warning("Falha ao buscar %s (%s); usando a cópia local", url_covid, e)
+            return pd.read_csv(local_cache), local_cache, "⚠️ Usando dados em cache local"
+        raise
+
+
+def atualizar_snapshot(atual):
+    """Busca e processa os dados, grava o snapshot e aponta para ele se passar na validação.
+
+    Retorna o novo ponteiro e o aviso da busca (ou None).
+    """
+    buscado_em = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    df_bruto, origem, aviso = buscar_dados_brutos()
+    df = preparar_dados(df_bruto)
+    validar(df, ler_manifesto(atual['hash']) if atual else None)
+    manifesto = criar_snapshot(df, origem, buscado_em)
+    return apontar(manifesto['hash']), aviso
+
+
+def versao_atual():
+    """Hash do snapshot em uso e um aviso para a página (ou None).
+
+    Busca dados novos quando o snapshot venceu (e o ponteiro não está fixado).
+    Não chama o Streamlit: roda também na thread de aquecimento, onde st.stop
+    mataria a thread. Sem snapshot anterior, a falha da busca é repassada a quem
+    chamou.
+    """
+    def em_dia(ponteiro):
+        if ponteiro is None:
+            return False
+        idade = datetime.now(timezone.utc) - datetime.fromisoformat(ponteiro['apontado_em'])
+        return ponteiro['fixado'] or idade < VALIDADE_SNAPSHOT
+
+    atual = ler_ponteiro()
+    if em_dia(atual):
+        return atual['hash'], None
+
+    with _trava_atualizacao:
+        # Outra sessão deste processo pode ter atualizado enquanto esperávamos
+        atual = ler_ponteiro()
+        if em_dia(atual):
+            return atual['hash'], None
+        if atual is not None and time.monotonic() - _ultima_falha['quando'] < ESPERA_APOS_FALHA:
+            return atual['hash'], None
+        try:
+            ponteiro, aviso = atualizar_snapshot(atual)
+            return ponteiro['hash'], aviso
+        except Exception as e:
+            _ultima_falha['quando'] = time.monotonic()
+            if atual is None:
+                raise
+            _LOGGER.warning("Dados novos recusados ou indisponíveis (%s); mantendo o snapshot %s", e, atual['hash'][:12])
+            return atual['hash'], f"⚠️ Dados novos recusados ou indisponíveis ({e}); mantendo o snapshot {atual['hash'][:12]}"
+
+
+def lista_locais_pt(locais):
+    """Nomes exibidos no seletor para os `locais` presentes nos dados: Mundo primeiro e os demais em ordem"""
+    presentes = set(locais)
+    lista = sorted(TRADUCAO_PAISES[local] for local in TRADUCAO_PAISES if local in presentes)
+    if 'Mundo' in lista:
+        lista.remove('Mundo')
+        lista = ['Mundo'] + lista
+    return lista
+
+
+def load_data():
+    """Carrega os dados de COVID-19 do Our World in Data (snapshot atual).
+
+    Retorna os recortes de montar_dados e o aviso de versao_atual (ou None);
+    exibir o aviso, ou o erro quando não há snapshot algum, fica com a página.
+    """
+    versao_dados, aviso = versao_atual()
+    return montar_dados(versao_dados), aviso
+
+
+@st.cache_data(show_spinner=False)
+def montar_dados(versao_dados):
+    """Lê um snapshot e monta os recortes usados pela página, uma vez por snapshot"""
+    df = carregar_snapshot(versao_dados)
+
+    traducao_paises = dict(TRADUCAO_PAISES)
+    df_principais = df[df['location'].isin(list(traducao_paises))].copy()
+    df_principais['location_pt'] = df_principais['location'].map(traducao_paises)
+    world_data = df_principais[df_principais['location'] == 'World'].copy()
+    lista_paises_pt = lista_locais_pt(df_principais['location'].unique())
+
+    return df, df_principais, world_data, lista_paises_pt, traducao_paises, versao_dados
+
+
+@st.cache_data
+@compartilhado
+def carregar_matrizes_comparacao(_df, versao_dados):
+    """Matrizes (data × país) da comparação entre países, calculadas uma vez por versão dos dados"""
+    return calcular_matrizes_comparacao(_df)
+
+
+@st.cache_data
+@compartilhado
+def carregar_coorte_vacinacao(_df_completo, versao_dados):
+    """Séries de todos os locais alinhadas ao início da vacinação, uma vez por versão dos dados"""
+    return calcular_coorte_vacinacao(_df_completo)
+
+
+@st.cache_data
+@compartilhado
+def carregar_estudo_eventos(_df_completo, versao_dados, _tabela_eventos, versao_eventos):
+    """Janelas antes/depois e curvas alinhadas de todos os eventos em todos os locais, uma vez por versão
+    dos dados e da tabela de eventos"""
+    return calcular_estudo_eventos(_df_completo, _tabela_eventos)
+
+
+@st.cache_data(max_entries=MAX_ESTIMATIVAS_RT)
+@compartilhado
+def carregar_rt(_df_completo, versao_dados, media_si, desvio_si):
+    """Rt (método de Cori) de todos os locais, calculado uma vez por versão dos dados e intervalo serial"""
+    casos = pivotar(_df_completo, ['new_cases'])['new_cases']
+    return estimar_rt(casos, media_si, desvio_si)
+
+
+@st.cache_data
+@compartilhado
+def carregar_previsoes(_df_completo, versao_dados, origens):
+    """Previsões de casos e mortes de todos os locais para cada origem possível, uma vez por versão dos dados"""
+    matrizes = pivotar(_df_completo, ['new_cases', 'new_deaths'])
+    return {coluna: prever(matriz, origens) for coluna, matriz in matrizes.items()}
+
+
+@st.cache_data
+@compartilhado
+def carregar_contrafactual(_df_completo, versao_dados, cenario, atraso, horizonte, _processos=1):
+    """Simulação Monte Carlo de vidas salvas de todos os locais, uma vez por cenário e versão dos dados
+
+    Na página roda no processo do servidor, sem o pool (ver contrafactual.py);
+    precalcular_contrafactual.py passa `_processos` (fora da chave) para usar o pool."""
+    componentes = preparar_componentes(_df_completo, cenario, atraso, horizonte=horizonte)
+    return simular(componentes, processos=_processos)
+
+
+@st.cache_data
+@compartilhado
+def carregar_correlacoes(_df_completo, versao_dados, metodo):
+    """Matrizes de correlação métrica × métrica de todos os locais, uma vez por versão dos dados e método"""
+    return calcular_correlacoes(_df_completo, metodo)
+
+
+@st.cache_data
+@compartilhado
+def carregar_mapa(_df_completo, versao_dados, metrica):
+    """Mapa animado com todos os quadros semanais pré-calculados, uma vez por versão dos dados e métrica"""
+    return calcular_mapa(_df_completo, metrica)
+
+
+@st.cache_data
+@compartilhado
+def carregar_tabela(_df_completo, versao_dados, traducao_paises):
+    """Tabela comparativa de todos os locais e suas ordenações, uma vez por versão dos dados"""
+    return calcular_tabela(_df_completo, traducao_paises)
@@ -0,0 +1,325 @@
+"""Consultas da página (recortes por local e período, janelas e indicadores por local)
+
+Dois backends com a mesma interface:
+
+- ConsultasPandas: filtra o DataFrame já carregado em memória (comportamento
+  original do dashboard);
+- ConsultasDuckDB: executa as mesmas consultas em SQL, com DuckDB em processo,
+  direto sobre o Parquet do snapshot. Só as colunas pedidas são lidas
+  (projeção) e os filtros de local e data descartam grupos de linhas inteiros
+  pelas estatísticas do arquivo (predicado), sem materializar a tabela toda.
+
+Os dois devolvem os mesmos valores (conferido em benchmarks/bench_consultas.py).
+O backend é escolhido pela variável de ambiente CONSULTAS_BACKEND ('pandas',
+padrão, ou 'duckdb'); o DuckDB é opcional e, se não estiver instalado, a página
+continua com o pandas.
+"""
+import functools
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from snapshots import ARQUIVO_DADOS, DIRETORIO_SNAPSHOTS
+from tabela import DIAS_POS_VACINACAO, calcular_tabela
+
+_LOGGER = logging.getLogger(__name__)
+
+COLUNAS_JANELA = ['date', 'new_cases', 'new_deaths']
+
+# KPIs do topo da página: último valor positivo de cada coluna
+COLUNAS_KPIS = ['total_cases', 'total_deaths', 'people_vaccinated', 'cases_per_million', 'deaths_per_million']
+
+COLUNAS_INDICADORES = [
+    'inicio_vacinacao', 'mortes_antes', 'taxa_mortes_dia_pos', 'total_mortes',
+    'mortes_por_milhao', 'mortes_100k_pos', 'cobertura_pct'
+]
+
+
+def get_latest_valid_value(df, column):
+    valid_data = df[df[column].notna() & (df[column] > 0)]
+    if valid_data.empty:
+        return 0
+    return int(valid_data.iloc[-1][column])
+
+
+def kpis_por_local(series):
+    """KPIs da página para cada local de `series` (em ordem de data): os de COLUNAS_KPIS,
+    com a regra de get_latest_valid_value, e a cobertura vacinal máxima"""
+    locais = series['location']
+    kpis = pd.DataFrame(index=pd.Index(sorted(locais.unique()), name='location'))
+    for coluna in COLUNAS_KPIS:
+        positivos = series[coluna].where(series[coluna] > 0)
+        kpis[coluna] = positivos.groupby(locais).last().reindex(kpis.index).fillna(0).astype('int64')
+    kpis['vac_coverage_pct'] = series.groupby(locais)['vac_coverage_pct'].max()
+    return kpis
+
+
+def resumo_janelas_por_local(series, dias):
+    """resumo_janelas de vários locais de uma vez, em formato longo (local × período).
+
+    O evento de cada local é o início da vacinação dentro de `series` (primeira
+    data com people_vaccinated > 0), como na página; locais sem vacinação ficam de fora.
+    """
+    eventos = series[series['people_vaccinated'] > 0].groupby('location')['date'].min()
+    base = series[series['location'].isin(eventos.index)]
+    evento = base['location'].map(eventos)
+    dentro = (base['date'] >= evento - pd.Timedelta(days=dias)) & (base['date'] <= evento + pd.Timedelta(days=dias))
+    base, evento = base[dentro], evento[dentro]
+
+    periodo = pd.Series(np.where(base['date'] < evento, 'antes', 'depois'), index=base.index, name='periodo')
+    resumo = base.groupby([base['location'], periodo]).agg(
+        dias=('date', 'size'), casos=('new_cases', 'sum'), mortes=('new_deaths', 'sum'), media_mortes=('new_deaths', 'mean')
+    )
+    todos = pd.MultiIndex.from_product([eventos.index, ['antes', 'depois']], names=['location', 'periodo'])
+    resumo = resumo.reindex(todos).fillna({'dias': 0, 'casos': 0.0, 'mortes': 0.0}).reset_index()
+    resumo['dias'] = resumo['dias'].astype('int64')
+    resumo.insert(1, 'inicio_vacinacao', resumo['location'].map(eventos))
+    resumo.insert(2, 'janela_dias', dias)
+    return resumo
+
+
+def metricas_derivadas(serie):
+    """Médias móveis de mortes e CFR diária/30 dias de um local, sobre a série em ordem de data.
+
+    Calculadas na série completa do local, sem efeito de borda no início do
+    período escolhido; mesmo índice de `serie`.
+    """
+    metricas = pd.DataFrame({'date': serie['date']})
+    for coluna in ('new_deaths', 'new_deaths_per_million'):
+        metricas[f'{coluna}_mm7'] = serie[coluna].rolling(window=7, center=True).mean()
+    # Evita divisão por zero atribuindo NaN quando new_cases == 0
+    metricas['cfr_diaria'] = np.where(serie['new_cases'] > 0, serie['new_deaths'] / serie['new_cases'], np.nan)
+    metricas['cfr_mm30'] = metricas['cfr_diaria'].rolling(window=30, min_periods=7).mean()
+    return metricas
+
+
+def progresso_vacinacao(serie, tem_populacao):
+    """(percentual, rótulo) do progresso da vacinação no recorte `serie`: cobertura real
+    (% da população); sem população, relativo ao máximo do recorte"""
+    if tem_populacao:
+        return serie['vac_coverage_pct'], 'Cobertura Vacinal (%)'
+    max_vac = serie['people_vaccinated'].max()
+    if max_vac > 0:
+        return serie['people_vaccinated'] / max_vac * 100, 'Vacinação Relativa (%)'
+    return pd.Series(0.0, index=serie.index), 'Vacinação Relativa (%)'
+
+
+def _resumo(casos, mortes, dias):
+    """Totais de uma janela no formato comum aos backends"""
+    return {
+        'dias': int(dias),
+        'casos': float(casos.sum()) if dias else 0.0,
+        'mortes': float(mortes.sum()) if dias else 0.0,
+        'media_mortes': float(mortes.mean()) if dias else float('nan')
+    }
+
+
+def _arredondar_indicadores(indicadores):
+    """Mesmo arredondamento (NumPy, meio-para-par) da tabela comparativa, para os dois backends"""
+    for coluna in ['taxa_mortes_dia_pos', 'mortes_por_milhao', 'mortes_100k_pos', 'cobertura_pct']:
+        indicadores[coluna] = np.round(indicadores[coluna].to_numpy(dtype='float64'), 1)
+    return indicadores
+
+
+def _com_chaves(colunas):
+    """`colunas` com location e date na frente (necessárias para separar e ordenar os locais)"""
+    return ['location', 'date'] + [coluna for coluna in colunas if coluna not in ('location', 'date')]
+
+
+class ConsultasPandas:
+    """Consultas sobre um DataFrame em memória"""
+
+    nome = 'pandas'
+
+    def __init__(self, df):
+        self.df = df
+
+    def serie(self, local, inicio, fim, colunas=None):
+        """Linhas de `local` entre `inicio` e `fim` (inclusive), em ordem de data"""
+        df = self.df
+        recorte = df[(df['location'] == local) & (df['date'] >= inicio) & (df['date'] <= fim)]
+        if colunas is not None:
+            recorte = recorte[list(colunas)]
+        return recorte.sort_values('date').reset_index(drop=True)
+
+    def series(self, locais, inicio, fim, colunas=None):
+        """Linhas de vários locais entre `inicio` e `fim`, em ordem de local e data"""
+        df = self.df
+        recorte = df[df['location'].isin(list(locais)) & (df['date'] >= inicio) & (df['date'] <= fim)]
+        if colunas is not None:
+            recorte = recorte[_com_chaves(colunas)]
+        return recorte.sort_values(['location', 'date']).reset_index(drop=True)
+
+    def resumo_janelas(self, local, evento, dias, inicio, fim):
+        """Casos, mortes e média diária de mortes nos `dias` antes e depois de `evento`.
+
+        'antes' é [evento - dias, evento) e 'depois' é [evento, evento + dias], ambos
+        limitados ao período [inicio, fim] da página.
+        """
+        serie = self.serie(local, max(inicio, evento - pd.Timedelta(days=dias)),
+                           min(fim, evento + pd.Timedelta(days=dias)), COLUNAS_JANELA)
+        antes = serie[serie['date'] < evento]
+        depois = serie[serie['date'] >= evento]
+        return {
+            'antes': _resumo(antes['new_cases'], antes['new_deaths'], len(antes)),
+            'depois': _resumo(depois['new_cases'], depois['new_deaths'], len(depois))
+        }
+
+    def indicadores_por_local(self, dias_pos=DIAS_POS_VACINACAO):
+        """Indicadores de vacinação e mortalidade de cada local (os da tabela comparativa)"""
+        dados = calcular_tabela(self.df, dias_pos=dias_pos)['dados'].set_index('location')
+        indicadores = pd.DataFrame({
+            'inicio_vacinacao': dados['Início Vacinação'],
+            'mortes_antes': dados['Mortes Antes'],
+            'taxa_mortes_dia_pos': dados['Taxa Mortes/Dia (Pós-Vac)'],
+            'total_mortes': dados['Total Mortes'],
+            'mortes_por_milhao': dados['Mortes/Milhão'],
+            'mortes_100k_pos': dados['Mortes/100 mil (180d Pós-Vac)'],
+            'cobertura_pct': dados['Cobertura Vacinal (%)']
+        })
+        indicadores.index.name = 'location'
+        return indicadores.sort_index()
+
+
+class ConsultasDuckDB:
+    """Consultas em SQL sobre o Parquet de um snapshot, sem carregá-lo inteiro"""
+
+    nome = 'duckdb'
+
+    def __init__(self, caminho):
+        import duckdb
+        import pyarrow.parquet as pq
+
+        self.caminho = caminho
+        self._conexao = duckdb.connect()
+        self._conexao.execute(f"CREATE VIEW dados AS SELECT * FROM read_parquet('{caminho.replace(chr(39), chr(39) * 2)}')")
+        # Colunas categóricas no snapshot voltam como texto do DuckDB; o tipo é restaurado na saída
+        metadados = pq.read_schema(caminho).pandas_metadata or {}
+        self._categoricas = {coluna['name'] for coluna in metadados.get('columns', [])
+                             if coluna.get('pandas_type') == 'categorical'}
+        self._trava = threading.Lock()
+
+    def _consultar(self, sql, parametros=None):
+        # Um cursor por consulta: a conexão é compartilhada entre as sessões (threads) do Streamlit
+        with self._trava:
+            cursor = self._conexao.cursor()
+        try:
+            resultado = cursor.execute(sql, parametros).fetch_arrow_table().to_pandas()
+        finally:
+            cursor.close()
+        for coluna in self._categoricas.intersection(resultado.columns):
+            resultado[coluna] = resultado[coluna].astype('category')
+        return resultado
+
+    def serie(self, local, inicio, fim, colunas=None):
+        """Linhas de `local` entre `inicio` e `fim` (inclusive), em ordem de data"""
+        selecao = ', '.join(f'"{coluna}"' for coluna in colunas) if colunas is not None else '*'
+        return self._consultar(
+            f"SELECT {selecao} FROM dados WHERE location = ? AND date BETWEEN ? AND ? ORDER BY date",
+            [local, pd.Timestamp(inicio), pd.Timestamp(fim)]
+        )
+
+    def series(self, locais, inicio, fim, colunas=None):
+        """Linhas de vários locais entre `inicio` e `fim`, em ordem de local e data"""
+        locais = list(locais)
+        if not locais:
+            return self.serie(None, inicio, fim, colunas).iloc[:0]
+        selecao = ', '.join(f'"{coluna}"' for coluna in _com_chaves(colunas)) if colunas is not None else '*'
+        return self._consultar(
+            f"SELECT {selecao} FROM dados WHERE location IN ({', '.join('?' * len(locais))}) "
+            "AND date BETWEEN ? AND ? ORDER BY location, date",
+            [*locais, pd.Timestamp(inicio), pd.Timestamp(fim)]
+        )
+
+    def resumo_janelas(self, local, evento, dias, inicio, fim):
+        """Casos, mortes e média diária de mortes nos `dias` antes e depois de `evento`.
+
+        Mesmas janelas de ConsultasPandas.resumo_janelas, agregadas numa única consulta.
+        """
+        evento = pd.Timestamp(evento)
+        linha = self._consultar("""
+            SELECT
+                count(*) FILTER (WHERE date < $evento) AS dias_antes,
+                coalesce(sum(new_cases) FILTER (WHERE date < $evento), 0) AS casos_antes,
+                coalesce(sum(new_deaths) FILTER (WHERE date < $evento), 0) AS mortes_antes,
+                avg(new_deaths) FILTER (WHERE date < $evento) AS media_antes,
+                count(*) FILTER (WHERE date >= $evento) AS dias_depois,
+                coalesce(sum(new_cases) FILTER (WHERE date >= $evento), 0) AS casos_depois,
+                coalesce(sum(new_deaths) FILTER (WHERE date >= $evento), 0) AS mortes_depois,
+                avg(new_deaths) FILTER (WHERE date >= $evento) AS media_depois
+            FROM dados
+            WHERE location = $local AND date BETWEEN $de AND $ate
+        """, {
+            'evento': evento, 'local': local,
+            'de': max(pd.Timestamp(inicio), evento - pd.Timedelta(days=dias)),
+            'ate': min(pd.Timestamp(fim), evento + pd.Timedelta(days=dias))
+        }).iloc[0]
+        return {
+            periodo: {
+                'dias': int(linha[f'dias_{periodo}']),
+                'casos': float(linha[f'casos_{periodo}']),
+                'mortes': float(linha[f'mortes_{periodo}']),
+                'media_mortes': float(linha[f'media_{periodo}']) if pd.notna(linha[f'media_{periodo}']) else float('nan')
+            }
+            for periodo in ('antes', 'depois')
+        }
+
+    def indicadores_por_local(self, dias_pos=DIAS_POS_VACINACAO):
+        """Indicadores de vacinação e mortalidade de cada local, agregados em SQL"""
+        indicadores = self._consultar(f"""
+            WITH base AS (
+                SELECT location, date, total_deaths, deaths_per_million, deaths_per_100k_since_vac, vac_coverage_pct,
+                       min(date) FILTER (WHERE people_vaccinated > 0) OVER (PARTITION BY location) AS inicio
+                FROM dados
+            ), janela AS (
+                SELECT *, inicio IS NOT NULL AND date BETWEEN inicio AND inicio + INTERVAL {int(dias_pos)} DAY AS na_janela
+                FROM base
+            ), agregado AS (
+                SELECT
+                    location,
+                    any_value(inicio) AS inicio_vacinacao,
+                    max(total_deaths) FILTER (WHERE date < inicio) AS mortes_antes,
+                    count(total_deaths) FILTER (WHERE na_janela) AS dias_janela,
+                    max(total_deaths) FILTER (WHERE na_janela)
+                        - arg_min(total_deaths, date) FILTER (WHERE na_janela AND total_deaths IS NOT NULL) AS novas_mortes,
+                    max(total_deaths) AS total_mortes,
+                    max(deaths_per_million) AS mortes_por_milhao,
+                    max(deaths_per_100k_since_vac) FILTER (WHERE na_janela) AS mortes_100k_pos,
+                    max(vac_coverage_pct) AS cobertura_pct
+                FROM janela
+                GROUP BY location
+            )
+            SELECT
+                location,
+                inicio_vacinacao,
+                CASE WHEN inicio_vacinacao IS NOT NULL THEN coalesce(mortes_antes, 0) END AS mortes_antes,
+                CASE WHEN inicio_vacinacao IS NULL THEN NULL
+                     WHEN dias_janela > 0 THEN novas_mortes / dias_janela
+                     ELSE 0 END AS taxa_mortes_dia_pos,
+                total_mortes, mortes_por_milhao, mortes_100k_pos, cobertura_pct
+            FROM agregado
+            ORDER BY location
+        """)
+        indicadores['inicio_vacinacao'] = pd.to_datetime(indicadores['inicio_vacinacao'])
+        return _arredondar_indicadores(indicadores.set_index('location'))[COLUNAS_INDICADORES]
+
+
+@functools.lru_cache(maxsize=4)
+def _duckdb_do_snapshot(versao_dados, diretorio):
+    return ConsultasDuckDB(os.path.join(diretorio, versao_dados, ARQUIVO_DADOS))
+
+
+def consultas_configuradas(df, versao_dados, diretorio=DIRETORIO_SNAPSHOTS):
+    """Backend escolhido por CONSULTAS_BACKEND; o DuckDB lê o snapshot `versao_dados` e o pandas, `df`"""
+    tipo = os.environ.get('CONSULTAS_BACKEND', 'pandas').strip().lower()
+    if tipo == 'duckdb':
+        try:
+            return _duckdb_do_snapshot(versao_dados, diretorio)
+        except ImportError:
+            _LOGGER.warning("CONSULTAS_BACKEND=duckdb, mas o pacote duckdb não está instalado; usando pandas")
+    elif tipo != 'pandas':
+        _LOGGER.warning("CONSULTAS_BACKEND=%r desconhecido; usando pandas", tipo)
+    return ConsultasPandas(df)
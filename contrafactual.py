@@ -0,0 +1,150 @@
+"""Simulação contrafactual de vidas salvas pela vacinação, para todos os locais
+
+Cenários (dia 0 = início da vacinação de cada local):
+
+- 'cfr_constante': a taxa de mortalidade (CFR) dos `dias_antes` anteriores à
+  vacinação se mantém por todo o horizonte;
+- 'atraso': a vacinação começa `atraso` dias depois; até lá vale a CFR anterior
+  e, a partir daí, a CFR diária observada deslocada em `atraso` dias.
+
+Em ambos, as mortes contrafactuais são Σ casos_t · CFR_t. A incerteza vem de
+Monte Carlo: CFR anterior ~ Beta(mortes + 1, casos − mortes + 1) e mortes
+contrafactuais ~ Poisson.
+
+Fora do servidor, os blocos de simulações rodam em paralelo num pool de
+processos do módulo, criado na primeira simulação e reaproveitado pelas
+seguintes, com processos iniciados por forkserver (ou spawn):
+precalcular_contrafactual.py simula assim toda a GRADE de cenários da página e
+grava os resultados no cache compartilhado. No servidor do Streamlit, `carregar_contrafactual` simula no próprio
+processo (`processos=1`): um fork copiaria as threads e travas do servidor no
+meio de uma execução, e forkserver/spawn reimportariam o script da página, que
+o Streamlit instala como `__main__` durante cada execução.
+"""
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from analise import alinhar_por_evento, inicio_vacinacao_por_local, pivotar
+
+_LOGGER = logging.getLogger(__name__)
+
+CENARIOS = {
+    'CFR pré-vacinação constante': 'cfr_constante',
+    'Vacinação atrasada': 'atraso'
+}
+
+# Valores oferecidos na página: atraso (cenário 'atraso') e horizonte após o início da vacinação
+ATRASOS = tuple(range(0, 181, 15))
+HORIZONTES = (90, 180)
+
+N_SIMULACOES = 4000
+TAMANHO_BLOCO = 500
+
+
+def grade_cenarios():
+    """(cenário, atraso, horizonte) de todas as combinações que a página pode pedir"""
+    for cenario in CENARIOS.values():
+        for atraso in (ATRASOS if cenario == 'atraso' else (0,)):
+            for horizonte in HORIZONTES:
+                yield cenario, atraso, horizonte
+
+
+def preparar_componentes(df, cenario='cfr_constante', atraso=0, dias_antes=90, horizonte=180):
+    """Reduz cada local às somas que determinam as mortes contrafactuais.
+
+    As mortes contrafactuais esperadas são `fixo + cfr_antes · variavel`, em que
+    `variavel` soma os casos dos dias que herdam a CFR anterior e `fixo` soma
+    casos × CFR observada (deslocada) nos demais dias.
+    """
+    matrizes = pivotar(df, ['new_cases', 'new_deaths', 'people_vaccinated'])
+    inicios = inicio_vacinacao_por_local(matrizes['people_vaccinated'])
+
+    casos = alinhar_por_evento(matrizes['new_cases'], inicios, dias_antes, horizonte).to_numpy()
+    mortes = alinhar_por_evento(matrizes['new_deaths'], inicios, dias_antes, horizonte).to_numpy()
+    casos, mortes = np.nan_to_num(np.clip(casos, 0, None)), np.nan_to_num(np.clip(mortes, 0, None))
+
+    antes, depois = slice(0, dias_antes), slice(dias_antes, dias_antes + horizonte + 1)
+    casos_antes, mortes_antes = casos[antes].sum(axis=0), mortes[antes].sum(axis=0)
+    casos_depois, mortes_depois = casos[depois], mortes[depois]
+
+    if cenario == 'cfr_constante':
+        fixo = np.zeros(casos.shape[1])
+        variavel = casos_depois.sum(axis=0)
+    elif cenario == 'atraso':
+        # CFR diária observada; dias sem casos usam a CFR móvel de 30 dias (razão de somas)
+        casos_30 = pd.DataFrame(casos_depois).rolling(30, min_periods=1).sum().to_numpy()
+        mortes_30 = pd.DataFrame(mortes_depois).rolling(30, min_periods=1).sum().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cfr_movel = np.where(casos_30 > 0, mortes_30 / casos_30, 0.0)
+            cfr_observada = np.where(casos_depois > 0, mortes_depois / casos_depois, cfr_movel)
+
+        atraso = min(atraso, horizonte + 1)
+        cfr_deslocada = np.zeros_like(cfr_observada)
+        cfr_deslocada[atraso:] = cfr_observada[:cfr_observada.shape[0] - atraso]
+        fixo = (casos_depois[atraso:] * cfr_deslocada[atraso:]).sum(axis=0)
+        variavel = casos_depois[:atraso].sum(axis=0)
+    else:
+        raise ValueError(f"Cenário desconhecido: {cenario}")
+
+    return pd.DataFrame({
+        'casos_antes': casos_antes,
+        'mortes_antes': mortes_antes,
+        'mortes_observadas': mortes_depois.sum(axis=0),
+        'fixo': fixo,
+        'variavel': variavel
+    }, index=matrizes['new_cases'].columns)[pd.notna(inicios).to_numpy()]
+
+
+def _simular_bloco(argumentos):
+    """Simula um bloco de cenários para todos os locais (executado nos processos do pool)"""
+    componentes, n_simulacoes, semente = argumentos
+    rng = np.random.default_rng(semente)
+
+    alfa = componentes['mortes_antes'] + 1
+    beta = np.maximum(componentes['casos_antes'] - componentes['mortes_antes'], 0) + 1
+    cfr_antes = rng.beta(alfa, beta, size=(n_simulacoes, len(alfa)))
+
+    esperado = componentes['fixo'] + cfr_antes * componentes['variavel']
+    return rng.poisson(esperado).astype('float64')
+
+
+@functools.lru_cache(maxsize=None)
+def pool_processos(processos=None):
+    """Pool de processos do módulo (um por número de processos), iniciados por forkserver ou spawn"""
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context(metodo))
+
+
+def simular(componentes, n_simulacoes=N_SIMULACOES, semente=42, processos=None):
+    """Distribuição de vidas salvas por local: média e intervalo de 95%"""
+    arrays = {coluna: componentes[coluna].to_numpy() for coluna in componentes.columns}
+    tamanhos = [min(TAMANHO_BLOCO, n_simulacoes - i) for i in range(0, n_simulacoes, TAMANHO_BLOCO)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    blocos = [(arrays, tamanho, seq) for tamanho, seq in zip(tamanhos, sementes)]
+
+    if processos == 1 or len(blocos) == 1:
+        resultados = [_simular_bloco(bloco) for bloco in blocos]
+    else:
+        try:
+            resultados = list(pool_processos(processos).map(_simular_bloco, blocos))
+        except BrokenProcessPool:
+            # Um processo do pool morreu: descarta o pool (o próximo é recriado) e simula aqui mesmo
+            _LOGGER.warning("Pool de processos da simulação contrafactual quebrado; simulando no processo atual")
+            pool_processos.cache_clear()
+            resultados = [_simular_bloco(bloco) for bloco in blocos]
+
+    mortes_contrafactuais = np.concatenate(resultados)
+    vidas_salvas = mortes_contrafactuais - arrays['mortes_observadas']
+
+    return pd.DataFrame({
+        'mortes_observadas': arrays['mortes_observadas'],
+        'mortes_contrafactuais': mortes_contrafactuais.mean(axis=0),
+        'vidas_salvas': vidas_salvas.mean(axis=0),
+        'vidas_salvas_p2_5': np.percentile(vidas_salvas, 2.5, axis=0),
+        'vidas_salvas_p97_5': np.percentile(vidas_salvas, 97.5, axis=0)
+    }, index=componentes.index)
@@ -0,0 +1,117 @@
+"""Matrizes de correlação métrica × métrica para todos os locais
+
+Para cada local calcula a correlação entre todas as métricas numéricas, com
+tratamento par a par de NaN (cada par usa só os dias em que as duas métricas
+existem). O cálculo é feito em lote: para um bloco de locais, as somas de cada
+par saem de quatro produtos matriciais (L × M × T) @ (L × T × M).
+
+Spearman usa a transformação em postos de cada série sobre todos os dias com
+dado (e não re-ranqueia por par), o que é exato quando as métricas têm a
+mesma cobertura e uma aproximação próxima nos demais casos.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from populacao import COLUNAS_PER_CAPITA
+
+METODOS = {'Pearson': 'pearson', 'Spearman': 'spearman'}
+
+# Mínimo de dias em comum para a correlação de um par ser reportada
+MIN_PARES = 10
+TAMANHO_BLOCO_LOCAIS = 32
+
+COLUNAS_IGNORADAS = ['population', *COLUNAS_PER_CAPITA]
+
+
+def metricas_numericas(df, ignorar=COLUNAS_IGNORADAS):
+    """Colunas numéricas com algum dado, exceto identificadores e colunas derivadas"""
+    numericas = df.select_dtypes(include='number').columns
+    return [c for c in numericas if c not in ignorar and df[c].notna().any()]
+
+
+def montar_tensor(df, metricas):
+    """Tensor (local × data × métrica) com NaN onde não há dado"""
+    larga = df.pivot(index='date', columns='location', values=metricas).sort_index()
+    locais = larga.columns.get_level_values('location').unique()
+    larga = larga.reindex(columns=pd.MultiIndex.from_product([metricas, locais]))
+    valores = larga.to_numpy(dtype='float64').reshape(len(larga), len(metricas), len(locais))
+    # Contíguo em memória para que os produtos matriciais usem BLAS
+    return np.ascontiguousarray(valores.transpose(2, 0, 1)), list(locais)
+
+
+def padronizar(tensor):
+    """Centraliza e escala cada série (local, métrica) para reduzir erro numérico"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        media = np.nanmean(tensor, axis=1, keepdims=True)
+        desvio = np.nanstd(tensor, axis=1, keepdims=True)
+    return (tensor - media) / np.where(desvio > 0, desvio, np.nan)
+
+
+def postos(tensor):
+    """Postos (médios em empates) de cada série ao longo das datas, ignorando NaN"""
+    n_locais, n_dias, n_metricas = tensor.shape
+    plano = tensor.transpose(1, 0, 2).reshape(n_dias, n_locais * n_metricas)
+    ranqueado = pd.DataFrame(plano).rank(axis=0).to_numpy()
+    return np.ascontiguousarray(ranqueado.reshape(n_dias, n_locais, n_metricas).transpose(1, 0, 2))
+
+
+def pearson_pareado(tensor):
+    """Correlação de Pearson par a par (NaN-aware) para cada local do bloco: (L, M, M)"""
+    observado = ~np.isnan(tensor)
+    m = observado.astype('float64')
+    x = np.where(observado, tensor, 0.0)
+    mt, xt = m.transpose(0, 2, 1), x.transpose(0, 2, 1)
+
+    n = mt @ m          # dias em comum de cada par
+    s = xt @ m          # Σ x_i nos dias em que j existe
+    q = (xt ** 2) @ m   # Σ x_i² nos dias em que j existe
+    p = xt @ x          # Σ x_i x_j
+
+    s_t, q_t = s.transpose(0, 2, 1), q.transpose(0, 2, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        numerador = n * p - s * s_t
+        denominador = np.sqrt((n * q - s ** 2) * (n * q_t - s_t ** 2))
+        correlacao = numerador / denominador
+
+    correlacao[n < MIN_PARES] = np.nan
+    return np.clip(correlacao, -1, 1)
+
+
+def calcular_correlacoes(df, metodo='pearson', metricas=None):
+    """Matrizes de correlação de todos os locais.
+
+    Retorna um dicionário com 'matrizes' (array local × métrica × métrica),
+    'locais' e 'metricas'.
+    """
+    if metricas is None:
+        metricas = metricas_numericas(df)
+    tensor, locais = montar_tensor(df, metricas)
+
+    matrizes = np.empty((len(locais), len(metricas), len(metricas)))
+    for inicio in range(0, len(locais), TAMANHO_BLOCO_LOCAIS):
+        bloco = tensor[inicio:inicio + TAMANHO_BLOCO_LOCAIS]
+        bloco = postos(bloco) if metodo == 'spearman' else bloco
+        matrizes[inicio:inicio + TAMANHO_BLOCO_LOCAIS] = pearson_pareado(padronizar(bloco))
+
+    return {'matrizes': matrizes, 'locais': locais, 'metricas': metricas}
+
+
+def matriz_local(correlacoes, local):
+    """Matriz de correlação de um local como DataFrame"""
+    indice = correlacoes['locais'].index(local)
+    return pd.DataFrame(correlacoes['matrizes'][indice], index=correlacoes['metricas'], columns=correlacoes['metricas'])
+
+
+def matriz_media(correlacoes, locais=None):
+    """Correlação média entre locais (média na escala z de Fisher)"""
+    matrizes = correlacoes['matrizes']
+    if locais is not None:
+        matrizes = matrizes[[i for i, local in enumerate(correlacoes['locais']) if local in set(locais)]]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        z = np.arctanh(np.clip(matrizes, -0.999999, 0.999999))
+        media = np.tanh(np.nanmean(z, axis=0))
+    return pd.DataFrame(media, index=correlacoes['metricas'], columns=correlacoes['metricas'])
@@ -1,14 +1,17 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
-import numpy as np
-import os
 
 # Configuração da página
 st.set_page_config(layout="wide", page_title="Dashboard COVID-19", initial_sidebar_state="expanded")
 
+# Perfil sob demanda (?profile=1&token=...): amostra só este rerun. Sem o
+# parâmetro na URL, nenhuma thread é criada
+from perfil import URL_SPEEDSCOPE, captura_pedida  # noqa: E402
+
+captura_perfil = captura_pedida(st.query_params)
+for parametro in ('profile', 'token'):
+    if parametro in st.query_params:
+        del st.query_params[parametro]
+
 # CSS estilo Power BI com gradientes roxos/azuis
 st.markdown("""
 <style>
@@ -122,94 +125,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    """Carrega os dados de COVID-19 do Our World in Data"""
-    url_covid = 'https://catalog.ourworldindata.org/garden/covid/latest/compact/compact.csv'
-    local_cache = 'owid-covid-data.csv'
-    
-    try:
-        if os.path.exists(local_cache):
-            cache_age = datetime.now().timestamp() - os.path.getmtime(local_cache)
-            if cache_age < 86400:  # 24 horas
-                df = pd.read_csv(local_cache)
-            else:
-                df = pd.read_csv(url_covid)
-                df.to_csv(local_cache, index=False)
-        else:
-            df = pd.read_csv(url_covid)
-            df.to_csv(local_cache, index=False)
-    except Exception as e:
-        if os.path.exists(local_cache):
-            st.warning(f"⚠️ Usando dados em cache local")
-            df = pd.read_csv(local_cache)
-        else:
-            st.error(f"❌ Erro ao carregar dados: {str(e)}")
-            st.stop()
-    
-    df['date'] = pd.to_datetime(df['date'])
-    
-    if 'country' in df.columns and 'location' not in df.columns:
-        df['location'] = df['country']
-    if 'code' in df.columns and 'iso_code' not in df.columns:
-        df['iso_code'] = df['code']
-    
-    df['people_vaccinated'] = df['people_vaccinated'].fillna(0)
-    df['total_deaths'] = df['total_deaths'].fillna(0)
-    df['new_cases'] = df['new_cases'].fillna(0)
-    df['new_deaths'] = df['new_deaths'].fillna(0)
-
-    traducao_paises = {
-        'World': 'Mundo',
-        'Brazil': 'Brasil',
-        'United States': 'Estados Unidos',
-        'India': 'Índia',
-        'Russia': 'Rússia',
-        'United Kingdom': 'Reino Unido',
-        'France': 'França',
-        'Germany': 'Alemanha',
-        'Italy': 'Itália',
-        'Spain': 'Espanha',
-        'China': 'China',
-        'Japan': 'Japão',
-        'South Korea': 'Coreia do Sul',
-        'Canada': 'Canadá',
-        'Mexico': 'México',
-        'Argentina': 'Argentina',
-        'Turkey': 'Turquia',
-        'Indonesia': 'Indonésia',
-        'Saudi Arabia': 'Arábia Saudita',
-        'South Africa': 'África do Sul',
-        'Australia': 'Austrália'
-    }
-    
-    principais_paises = list(traducao_paises.keys())
-    df_principais = df[df['location'].isin(principais_paises)].copy()
-    df_principais['location_pt'] = df_principais['location'].map(traducao_paises)
-    world_data = df_principais[df_principais['location'] == 'World'].copy()
-    lista_paises_pt = sorted([traducao_paises[p] for p in principais_paises if p in df_principais['location'].unique()])
-    
-    if 'Mundo' in lista_paises_pt:
-        lista_paises_pt.remove('Mundo')
-        lista_paises_pt = ['Mundo'] + lista_paises_pt
-
-    return df_principais, world_data, lista_paises_pt, traducao_paises
-
-# Carregar dados
-df, world_data, lista_paises, traducao_paises = load_data()
-traducao_inversa = {v: k for k, v in traducao_paises.items()}
-
-def formatar_pais(pais):
-    """Adiciona preposição correta"""
-    if pais == 'Mundo':
-        return 'no Mundo'
-    elif pais in ['Estados Unidos', 'Emirados Árabes']:
-        return f'nos {pais}'
-    elif pais == 'Brasil':
-        return f'no {pais}'
-    else:
-        return f'na {pais}'
-
 # Título
 st.markdown("""
 <div style='text-align: center; padding: 20px;'>
@@ -225,9 +140,89 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 st.markdown("---")
+st.sidebar.header("🔍 Filtros")
+
+# Dependências pesadas (pandas, numpy, plotly e os módulos de análise) só são
+# importadas depois que a casca da página já foi enviada ao navegador
+import os  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly.graph_objects as go  # noqa: E402
+
+from aquecimento import iniciar_aquecimento  # noqa: E402
+from armazem import armazem_configurado  # noqa: E402
+from cache_compartilhado import ErroResp, backend_configurado, hash_codigo  # noqa: E402
+from cache_dados import (  # noqa: E402
+    carregar_coorte_vacinacao,
+    carregar_contrafactual,
+    carregar_correlacoes,
+    carregar_estudo_eventos,
+    carregar_mapa,
+    carregar_matrizes_comparacao,
+    carregar_previsoes,
+    carregar_rt,
+    carregar_tabela,
+    load_data
+)
+from consultas import consultas_configuradas, get_latest_valid_value, metricas_derivadas, progresso_vacinacao  # noqa: E402
+from contrafactual import ATRASOS, CENARIOS, HORIZONTES  # noqa: E402
+from correlacao import METODOS, matriz_local, matriz_media  # noqa: E402
+from epidemiologia import DESVIO_INTERVALO_SERIAL, GRADE_DESVIO_SI, GRADE_MEDIA_SI, MEDIA_INTERVALO_SERIAL  # noqa: E402
+from eventos import (  # noqa: E402
+    JANELAS_EVENTOS,
+    ROTULO_VACINACAO,
+    TIPOS_EVENTOS,
+    cronologia_markdown,
+    eventos_no_periodo,
+    ler_eventos,
+    variacao_janelas
+)
+from exportacao import FORMATOS, LIMITE_LOCAIS_PAGINA, gerar_exportacao, nome_arquivo, url_exportacao  # noqa: E402
+from grafo import Grafo, Versionado  # noqa: E402
+from graficos import (  # noqa: E402
+    MODOS_RENDERIZACAO,
+    aplicar_modo_renderizacao,
+    figura_coorte,
+    figura_matriz_correlacao,
+    figura_pequenos_multiplos,
+    figura_rt,
+    figura_sobreposicao,
+    figura_vidas_salvas,
+    marcar_evento,
+    marcar_eventos
+)
+from mapa import METRICAS_MAPA  # noqa: E402
+from previsao import HORIZONTE_MAXIMO  # noqa: E402
+from serializacao import compactar_figura  # noqa: E402
+from tabela import COLUNAS_TABELA, TAMANHOS_PAGINA, estilizar_pagina, filtrar, pagina_tabela  # noqa: E402
+
+# Carregar dados (a casca acima continua visível enquanto isso)
+with st.spinner("Carregando dados do Our World in Data..."):
+    try:
+        (df_completo, df, world_data, lista_paises, traducao_paises, versao_dados), aviso_dados = load_data()
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar dados: {str(e)}")
+        st.stop()
+if aviso_dados:
+    st.warning(aviso_dados)
+# Primeira sessão de uma versão nova dos dados aquece o restante da página em segundo plano
+iniciar_aquecimento(versao_dados)
+traducao_inversa = {v: k for k, v in traducao_paises.items()}
+
+def formatar_pais(pais):
+    """Adiciona preposição correta"""
+    if pais == 'Mundo':
+        return 'no Mundo'
+    elif pais in ['Estados Unidos', 'Emirados Árabes']:
+        return f'nos {pais}'
+    elif pais == 'Brasil':
+        return f'no {pais}'
+    else:
+        return f'na {pais}'
+
 
 # Filtros
-st.sidebar.header("🔍 Filtros")
 selected_location = st.sidebar.selectbox("Selecione o País/Região", lista_paises, index=0)
 
 min_date = df['date'].min()
@@ -246,33 +241,623 @@ end_date = pd.Timestamp(f'{selected_year_range[1]}-12-31')
 start_date = max(start_date, min_date)
 end_date = min(end_date, max_date)
 
+st.sidebar.markdown("---")
+modo_renderizacao = MODOS_RENDERIZACAO[st.sidebar.radio(
+    "Renderização dos gráficos",
+    list(MODOS_RENDERIZACAO.keys()),
+    index=0,
+    help="Automático usa WebGL quando o gráfico tem muitos pontos"
+)]
+
+por_milhao = st.sidebar.toggle(
+    "Valores por milhão de habitantes",
+    value=False,
+    help="Normaliza os gráficos pela população para comparar países de tamanhos diferentes"
+)
+
+tipos_eventos = st.sidebar.multiselect(
+    "Eventos nos gráficos",
+    list(TIPOS_EVENTOS),
+    default=list(TIPOS_EVENTOS),
+    format_func=TIPOS_EVENTOS.get,
+    help="Marcações da tabela de eventos (dados/eventos.csv) e do início da vacinação de cada local"
+)
+
+with st.sidebar.expander("⚙️ Intervalo Serial (Rt)"):
+    # Grade fixa: cada par distinto é uma estimativa de todos os locais no cache
+    media_si = st.select_slider("Média (dias)", options=GRADE_MEDIA_SI, value=MEDIA_INTERVALO_SERIAL)
+    desvio_si = st.select_slider("Desvio padrão (dias)", options=GRADE_DESVIO_SI, value=DESVIO_INTERVALO_SERIAL)
+
+backend_cache = backend_configurado()
+if backend_cache is not None:
+    with st.sidebar.expander("🗄️ Cache Compartilhado"):
+        try:
+            resumo_cache = backend_cache.resumo()
+            st.caption(
+                f"Taxa de acerto: **{resumo_cache['taxa_acerto']:.0%}** "
+                f"({resumo_cache['acertos']} acertos, {resumo_cache['falhas']} falhas)  \n"
+                f"Remoções: **{resumo_cache['remocoes']}** · Ocupação: {resumo_cache['bytes'] / 1024 ** 2:,.0f} MB"
+            )
+        except (OSError, ErroResp):
+            st.caption("⚠️ Backend do cache compartilhado indisponível")
+
+armazem = armazem_configurado()
+with st.sidebar.expander("🧠 Armazém de Quadros por Local"):
+    resumo_armazem = armazem.resumo()
+    st.caption(
+        f"Uso: **{resumo_armazem['bytes'] / 1024 ** 2:,.1f}** de {resumo_armazem['limite_bytes'] / 1024 ** 2:,.0f} MB "
+        f"({resumo_armazem['entradas']} quadros)  \n"
+        f"Taxa de acerto: **{resumo_armazem['taxa_acerto']:.0%}** · Remoções: {resumo_armazem['remocoes']}"
+        + (f"  \nDescarga em disco: {resumo_armazem['entradas_disco']} quadros, "
+           f"{resumo_armazem['bytes_disco'] / 1024 ** 2:,.1f} MB ({resumo_armazem['acertos_disco']} lidos de volta)"
+           if 'bytes_disco' in resumo_armazem else '')
+    )
+
+with st.sidebar.expander("📥 Exportar Dados"):
+    paises_exportacao = st.multiselect(
+        "Países/Regiões", lista_paises, default=[selected_location], max_selections=LIMITE_LOCAIS_PAGINA
+    )
+    formato_exportacao = st.radio("Formato", list(FORMATOS), horizontal=True, format_func=str.upper)
+    locais_exportacao = [traducao_inversa.get(pais, pais) for pais in paises_exportacao]
+    # Gerado só no clique; o download da página é montado inteiro na memória, daí o limite de locais
+    st.download_button(
+        "Baixar série filtrada + métricas derivadas",
+        data=lambda: b''.join(gerar_exportacao(versao_dados, formato_exportacao, locais_exportacao, start_date, end_date)),
+        file_name=nome_arquivo(locais_exportacao, start_date, end_date, formato_exportacao),
+        mime=FORMATOS[formato_exportacao],
+        on_click='ignore',
+        disabled=not paises_exportacao,
+        width='stretch'
+    )
+    st.caption(f"Colunas do snapshot mais media_movel_7d, cfr_diaria, cfr_mm30 e vac_progress_pct. "
+               f"Até {LIMITE_LOCAIS_PAGINA} locais por download; [todos os locais]"
+               f"({url_exportacao(None, start_date, end_date, formato_exportacao)}) pela API, enviados em fluxo.")
+
 st.sidebar.markdown("---")
 st.sidebar.info(f"📊 **{selected_location}**\n\n📅 {selected_year_range[0]} - {selected_year_range[1]}")
 
 # Preparar dados filtrados
 selected_location_en = traducao_inversa.get(selected_location, selected_location)
 
-if selected_location_en == 'World':
-    df_filtrado = world_data.copy()
-else:
-    df_filtrado = df[df['location'] == selected_location_en].copy()
+consultas = consultas_configuradas(df, versao_dados)
+
+# Eventos datados (tabela em dados/eventos.csv + início da vacinação): janelas antes/depois
+# e curvas alinhadas de todos os eventos em todos os locais, uma vez por versão dos dados
+tabela_eventos, versao_eventos = ler_eventos()
+estudo_eventos = carregar_estudo_eventos(df_completo, versao_dados, tabela_eventos, versao_eventos)
+
+# Cálculos da seção do local como grafo de dependências (recorte do local -> métricas
+# derivadas -> janelas -> figuras). Cada rerun executa só os nós cujas entradas mudaram
+# desde o rerun anterior da sessão: trocar o período não refaz o recorte do local, o
+# início da vacinação nem as médias móveis e a CFR, calculadas sobre a série completa.
+# Os quadros por local ficam também no armazém do processo, compartilhados entre sessões.
+# A versão é o hash de todos os .py da raiz, lido a cada rerun (não o versao_codigo, fixo
+# por processo): editar um módulo auxiliar com o servidor no ar invalida a memória da sessão
+grafo = Grafo(versao=hash_codigo())
+
+
+def taxa_mortalidade(janela):
+    """Mortes ÷ casos (%) de uma janela de resumo_janelas; 0 sem casos"""
+    return (janela['mortes'] / janela['casos'] * 100) if janela['casos'] > 0 else 0
+
+
+def reducao_pct(antes, depois):
+    """Queda percentual de `antes` para `depois` (negativa se subiu); 0 se `antes` não for positivo"""
+    return ((antes - depois) / antes * 100) if antes > 0 else 0
+
+
+@grafo.no('local', 'consultas', 'armazem', 'datas_dados', 'versao_dados')
+def serie_local(local, consultas, armazem, datas_dados, versao_dados):
+    """Série do local no período completo dos dados"""
+    return armazem.obter_ou_calcular(
+        (versao_dados, 'serie_local', local), lambda: consultas.serie(local, *datas_dados)
+    )
+
+
+@grafo.no('serie_local', 'periodo')
+def serie_periodo(serie_local, periodo):
+    datas = serie_local['date']
+    return serie_local[(datas >= periodo[0]) & (datas <= periodo[1])].reset_index(drop=True)
+
+
+@grafo.no('serie_local')
+def tem_populacao(serie_local):
+    return serie_local['population'].notna().any()
+
+
+@grafo.no('serie_local')
+def inicio_vacinacao(serie_local):
+    return serie_local.loc[serie_local['people_vaccinated'] > 0, 'date'].min()
+
+
+@grafo.no('serie_local', 'local', 'armazem', 'versao_dados')
+def metricas_local(serie_local, local, armazem, versao_dados):
+    """Médias móveis de mortes e CFR diária/30 dias, sem efeito de borda no início do período"""
+    return armazem.obter_ou_calcular((versao_dados, 'metricas_local', local), lambda: metricas_derivadas(serie_local))
+
+
+@grafo.no('metricas_local', 'periodo')
+def metricas_periodo(metricas_local, periodo):
+    datas = metricas_local['date']
+    return metricas_local[(datas >= periodo[0]) & (datas <= periodo[1])].reset_index(drop=True)
+
+
+@grafo.no('local', 'inicio_vacinacao', 'periodo', 'consultas')
+def janelas(local, inicio_vacinacao, periodo, consultas):
+    """Janelas de 3 e 6 meses antes/depois do início da vacinação, limitadas ao período"""
+    return {dias: consultas.resumo_janelas(local, inicio_vacinacao, dias, *periodo) for dias in (90, 180)}
+
+
+# Colunas absolutas ou por milhão, conforme a opção da barra lateral
+@grafo.no('tem_populacao', 'por_milhao')
+def unidades(tem_populacao, por_milhao):
+    usar_per_capita = por_milhao and tem_populacao
+    col_casos, col_mortes = ('new_cases_per_million', 'new_deaths_per_million') if usar_per_capita else ('new_cases', 'new_deaths')
+    return usar_per_capita, col_casos, col_mortes, ' (por milhão)' if usar_per_capita else ''
+
+
+@grafo.no('serie_periodo', 'unidades', 'nome_local')
+def fig_evolucao(df_filtrado, unidades, selected_location):
+    _, col_casos, col_mortes, sufixo_unidade = unidades
+    df_grafico1 = df_filtrado[['date', col_casos, col_mortes]].melt(
+        id_vars='date',
+        value_vars=[col_casos, col_mortes],
+        var_name='Métrica',
+        value_name='Contagem'
+    )
+
+    df_grafico1['Métrica'] = df_grafico1['Métrica'].map({
+        col_casos: 'Novos Casos',
+        col_mortes: 'Novas Mortes'
+    })
+
+    # plotly.express custa ~0,2 s de importação e só é usado aqui: importado no ponto de uso
+    import plotly.express as px
+
+    fig1 = px.line(
+        df_grafico1,
+        x='date',
+        y='Contagem',
+        color='Métrica',
+        title=f'Novos Casos e Mortes Diárias{sufixo_unidade} - {selected_location}',
+        labels={'date': 'Data', 'Contagem': f'Quantidade{sufixo_unidade}'},
+        color_discrete_map={'Novos Casos': '#667eea', 'Novas Mortes': '#EF553B'}
+    )
+
+    fig1.update_layout(
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(26, 26, 46, 0.8)',
+        font=dict(color='white'),
+        title_font=dict(size=20, color='#b794f6')
+    )
+    return fig1
+
+# Rt estimado para todos os locais na carga dos dados (entrada informada junto do gráfico)
+@grafo.no('rt', 'local', 'nome_local', 'periodo')
+def fig_rt(rt, local, nome_local, periodo):
+    if local not in rt['rt'].columns:
+        return None
+    return figura_rt(
+        rt['rt'].loc[periodo[0]:periodo[1], local],
+        rt['rt_inf'].loc[periodo[0]:periodo[1], local],
+        rt['rt_sup'].loc[periodo[0]:periodo[1], local],
+        f'Número de Reprodução Efetivo (Rt) - {nome_local}'
+    )
+
+
+@grafo.no('estudo_eventos', 'local', 'periodo', 'tipos_eventos')
+def eventos_periodo(estudo_eventos, local, periodo, tipos_eventos):
+    """Eventos do local (e globais) que caem no período, marcados nos gráficos com eixo de datas"""
+    return eventos_no_periodo(estudo_eventos['ocorrencias'], local, *periodo, tipos=tipos_eventos)
+
+
+@grafo.no('serie_periodo', 'unidades', 'nome_local', 'eventos_periodo')
+def fig_vacinacao(df_filtrado, unidades, selected_location, eventos):
+    usar_per_capita = unidades[0]
+    fig2 = go.Figure()
+
+    col_vacinados, nome_vacinados = ('vac_coverage_pct', 'Cobertura Vacinal (%)') if usar_per_capita else ('people_vaccinated', 'Pessoas Vacinadas')
+    col_total_mortes, nome_total_mortes = ('deaths_per_million', 'Mortes por Milhão') if usar_per_capita else ('total_deaths', 'Total de Mortes')
+
+    fig2.add_trace(go.Scatter(
+        x=df_filtrado['date'],
+        y=df_filtrado[col_vacinados],
+        mode='lines',
+        name=nome_vacinados,
+        line=dict(color='#2ca02c', width=2),
+        yaxis='y'
+    ))
+
+    fig2.add_trace(go.Scatter(
+        x=df_filtrado['date'],
+        y=df_filtrado[col_total_mortes],
+        mode='lines',
+        name=nome_total_mortes,
+        line=dict(color='#d62728', width=2),
+        yaxis='y2'
+    ))
+
+    fig2.update_layout(
+        title=f'Vacinação vs Mortalidade - {selected_location}',
+        xaxis=dict(title='Data', gridcolor='rgba(102, 126, 234, 0.2)'),
+        yaxis=dict(
+            title=dict(text=nome_vacinados, font=dict(color='#00CC96')),
+            tickfont=dict(color='#00CC96'),
+            gridcolor='rgba(102, 126, 234, 0.2)'
+        ),
+        yaxis2=dict(
+            title=dict(text=nome_total_mortes, font=dict(color='#EF553B')),
+            tickfont=dict(color='#EF553B'),
+            overlaying='y',
+            side='right',
+            gridcolor='rgba(239, 85, 59, 0.2)'
+        ),
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(26, 26, 46, 0.8)',
+        font=dict(color='white'),
+        title_font=dict(size=20, color='#b794f6')
+    )
+
+    return marcar_eventos(fig2, eventos)
+
+# Previsões ajustadas para todos os locais na carga dos dados, a partir do fim do período
+@grafo.no('previsoes', 'local', 'periodo')
+def previsao_local(previsoes, local, periodo):
+    """{'new_cases', 'new_deaths': quadro previsao/inf/sup por data} do local, ou None sem previsão"""
+    por_metrica = {}
+    for coluna in ('new_cases', 'new_deaths'):
+        previsao = previsoes[coluna].get(periodo[1])
+        if previsao is None or local not in previsao['previsao'].columns:
+            return None
+        por_metrica[coluna] = pd.DataFrame({chave: quadro[local] for chave, quadro in previsao.items()})
+    return por_metrica
+
+
+@grafo.no('serie_periodo', 'metricas_periodo', 'unidades', 'eventos_periodo', 'previsao_local', 'horizonte_previsao')
+def fig_tendencia(df_filtrado, metricas, unidades, eventos, previsao, horizonte_previsao):
+    usar_per_capita, _, col_mortes, sufixo_unidade = unidades
+    # Média móvel de 7 dias (calculada na série completa do local)
+    df_tendencia = df_filtrado.copy()
+    df_tendencia['media_movel_7d'] = metricas[f'{col_mortes}_mm7'].to_numpy()
+
+    fig_tendencia = go.Figure()
+
+    # Área de mortes diárias (transparente)
+    fig_tendencia.add_trace(go.Scatter(
+        x=df_tendencia['date'],
+        y=df_tendencia[col_mortes],
+        mode='lines',
+        name=f'Mortes Diárias{sufixo_unidade}',
+        line=dict(color='rgba(239, 85, 59, 0.3)', width=1),
+        fill='tozeroy',
+        fillcolor='rgba(239, 85, 59, 0.1)'
+    ))
+
+    # Linha de média móvel (destaque)
+    fig_tendencia.add_trace(go.Scatter(
+        x=df_tendencia['date'],
+        y=df_tendencia['media_movel_7d'],
+        mode='lines',
+        name='Média Móvel (7 dias)',
+        line=dict(color='#EF553B', width=3)
+    ))
+
+    if previsao is not None:
+        df_previsao = previsao['new_deaths'].iloc[:horizonte_previsao]
+        escala_previsao = 1e6 / df_filtrado['population'].iloc[-1] if usar_per_capita else 1
+
+        fig_tendencia.add_trace(go.Scatter(
+            x=df_previsao.index, y=df_previsao['sup'] * escala_previsao,
+            mode='lines', line=dict(width=0),
+            hoverinfo='skip', showlegend=False
+        ))
+        fig_tendencia.add_trace(go.Scatter(
+            x=df_previsao.index, y=df_previsao['inf'] * escala_previsao,
+            mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor='rgba(183, 148, 246, 0.25)',
+            name='Previsão (IC 95%)'
+        ))
+        fig_tendencia.add_trace(go.Scatter(
+            x=df_previsao.index, y=df_previsao['previsao'] * escala_previsao,
+            mode='lines', name=f'Previsão ({horizonte_previsao} dias)',
+            line=dict(color='#b794f6', width=3, dash='dot')
+        ))
+
+    fig_tendencia.update_layout(
+        height=400,
+        plot_bgcolor='rgb(17,17,17)',
+        paper_bgcolor='rgb(17,17,17)',
+        font=dict(color='white'),
+        xaxis=dict(title='Data', gridcolor='rgba(128,128,128,0.2)'),
+        yaxis=dict(title=f'Mortes Diárias{sufixo_unidade}', gridcolor='rgba(128,128,128,0.2)'),
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    # Início da vacinação e demais eventos do período
+    return marcar_eventos(fig_tendencia, eventos)
+
+
+@grafo.no('janelas')
+def fig_taxas_3m(janelas):
+    """Taxa de mortalidade nos 3 meses antes e depois do início da vacinação"""
+    taxa_antes, taxa_depois = taxa_mortalidade(janelas[90]['antes']), taxa_mortalidade(janelas[90]['depois'])
+    reducao_taxa = reducao_pct(taxa_antes, taxa_depois)
+    fig_comp = go.Figure()
+
+    fig_comp.add_trace(go.Bar(
+        x=['3 Meses ANTES<br>da Vacinação', '3 Meses DEPOIS<br>da Vacinação'],
+        y=[taxa_antes, taxa_depois],
+        marker=dict(
+            color=['#EF553B', '#00CC96'],
+            line=dict(color='white', width=2)
+        ),
+        text=[f'{taxa_antes:.2f}%', f'{taxa_depois:.2f}%'],
+        textposition='auto',
+        textfont=dict(size=18, color='white', family='Arial Black'),
+        hovertemplate='<b>%{x}</b><br>Taxa: %{y:.2f}%<extra></extra>'
+    ))
+
+    if reducao_taxa > 0:
+        fig_comp.add_annotation(
+            x=0.5,
+            y=max(taxa_antes, taxa_depois) * 0.6,
+            text=f"↓ REDUÇÃO DE {abs(reducao_taxa):.1f}% ↓",
+            showarrow=False,
+            font=dict(size=24, color='#00ff88', family='Arial Black'),
+            bgcolor='rgba(0,0,0,0.8)',
+            borderpad=10
+        )
+
+    fig_comp.update_layout(
+        height=500,
+        plot_bgcolor='rgba(26, 26, 46, 0.8)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=14),
+        xaxis=dict(
+            title='',
+            tickfont=dict(size=14, color='white'),
+            showgrid=False
+        ),
+        yaxis=dict(
+            title='Taxa de Mortalidade (%)',
+            gridcolor='rgba(102, 126, 234, 0.2)',
+            tickfont=dict(size=12, color='white'),
+            title_font=dict(size=16, color='#b794f6')
+        ),
+        showlegend=False,
+        margin=dict(t=40, b=40, l=60, r=40)
+    )
+    return fig_comp
+
+
+# CFR diária e média móvel de 30 dias (calculadas na série completa do local) + progresso da vacinação
+@grafo.no('serie_periodo', 'metricas_periodo', 'tem_populacao')
+def cfr_periodo(df_filtrado, metricas, tem_populacao):
+    df_cfr = df_filtrado.copy()
+    df_cfr['cfr_diaria'] = metricas['cfr_diaria'].to_numpy()
+    df_cfr['cfr_mm30'] = metricas['cfr_mm30'].to_numpy()
+
+    df_cfr['vac_progress_pct'], rotulo_vacinacao = progresso_vacinacao(df_cfr, tem_populacao)
+    return df_cfr, rotulo_vacinacao
+
+
+@grafo.no('cfr_periodo', 'eventos_periodo')
+def fig_cfr(cfr_periodo, eventos):
+    df_cfr, rotulo_vacinacao = cfr_periodo
+    fig_cfr = go.Figure()
+
+    # Linha CFR média móvel
+    fig_cfr.add_trace(go.Scatter(
+        x=df_cfr['date'], y=df_cfr['cfr_mm30'] * 100,
+        mode='lines', name='CFR Média Móvel 30d (%)',
+        line=dict(color='#f093fb', width=3)
+    ))
+
+    # Linha de progresso vacinação (eixo secundário)
+    fig_cfr.add_trace(go.Scatter(
+        x=df_cfr['date'], y=df_cfr['vac_progress_pct'],
+        mode='lines', name=rotulo_vacinacao,
+        line=dict(color='#667eea', width=2, dash='dash'),
+        yaxis='y2'
+    ))
+
+    fig_cfr.update_layout(
+        height=450,
+        plot_bgcolor='rgba(26, 26, 46, 0.75)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        xaxis=dict(title='Data', gridcolor='rgba(128,128,128,0.15)'),
+        yaxis=dict(title='CFR (%)', gridcolor='rgba(128,128,128,0.2)'),
+        yaxis2=dict(title=rotulo_vacinacao, overlaying='y', side='right', showgrid=False)
+    )
+
+    return marcar_eventos(fig_cfr, eventos)
+
+# Dias com CFR (MM 30d) a partir do início da vacinação, para a correlação com o progresso vacinal
+@grafo.no('cfr_periodo', 'inicio_vacinacao')
+def cfr_pos_vacinacao(cfr_periodo, inicio_vacinacao):
+    df_cfr = cfr_periodo[0]
+    return df_cfr[df_cfr['date'] >= inicio_vacinacao].dropna(subset=['cfr_mm30'])
+
+
+@grafo.no('cfr_pos_vacinacao', 'cfr_periodo')
+def fig_dispersao_cfr(df_corr, cfr_periodo):
+    rotulo_vacinacao = cfr_periodo[1]
+    # Scatter com linha de tendência
+    fig_scatter = go.Figure()
+    fig_scatter.add_trace(go.Scatter(
+        x=df_corr['vac_progress_pct'], y=df_corr['cfr_mm30'] * 100,
+        mode='markers', name='Observações',
+        marker=dict(color='#b794f6', size=6, line=dict(color='white', width=0.5))
+    ))
+    # Regressão linear simples
+    coef = np.polyfit(df_corr['vac_progress_pct'], df_corr['cfr_mm30'] * 100, 1)
+    x_fit = np.linspace(df_corr['vac_progress_pct'].min(), df_corr['vac_progress_pct'].max(), 50)
+    y_fit = coef[0]*x_fit + coef[1]
+    fig_scatter.add_trace(go.Scatter(
+        x=x_fit, y=y_fit,
+        mode='lines', name='Tendência Linear',
+        line=dict(color='#00CC96', width=2)
+    ))
+    fig_scatter.update_layout(
+        height=400,
+        plot_bgcolor='rgba(26, 26, 46, 0.75)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        xaxis=dict(title=rotulo_vacinacao),
+        yaxis=dict(title='CFR Média Móvel 30d (%)'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+    )
+    return fig_scatter
+
+
+@grafo.no('janelas')
+def fig_medias_6m(janelas):
+    """Média de mortes diárias nos 6 meses antes e depois do início da vacinação"""
+    media_antes, media_depois = janelas[180]['antes']['media_mortes'], janelas[180]['depois']['media_mortes']
+    reducao_percentual = reducao_pct(media_antes, media_depois)
+    fig_simples = go.Figure()
+
+    fig_simples.add_trace(go.Bar(
+        x=['6 Meses ANTES', '6 Meses DEPOIS'],
+        y=[media_antes, media_depois],
+        marker=dict(color=['#EF553B', '#00CC96']),
+        text=[f'{media_antes:.0f}', f'{media_depois:.0f}'],
+        textposition='auto'
+    ))
+
+    if reducao_percentual > 0:
+        fig_simples.add_annotation(
+            x=0.5,
+            y=max(media_antes, media_depois) * 0.7,
+            text=f"↓ REDUÇÃO DE {abs(reducao_percentual):.1f}% ↓",
+            showarrow=False,
+            font=dict(size=20, color='#00ff88'),
+            bgcolor='rgba(0,0,0,0.7)'
+        )
+
+    fig_simples.update_layout(
+        yaxis_title='Média de Mortes Diárias',
+        showlegend=False,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(26, 26, 46, 0.8)',
+        font=dict(color='white'),
+        height=500
+    )
+    return fig_simples
+
+
+@grafo.no('serie_local', 'inicio_vacinacao', 'periodo')
+def fig_antes_depois(serie_local, inicio_vacinacao, periodo):
+    """Mortes diárias dos 180 dias antes e depois do início da vacinação, sobrepostas (dia 0 = início)"""
+    fig_comparacao = go.Figure()
+
+    datas = serie_local['date']
+    df_6m = serie_local.loc[
+        (datas >= max(periodo[0], inicio_vacinacao - pd.Timedelta(days=180)))
+        & (datas <= min(periodo[1], inicio_vacinacao + pd.Timedelta(days=180))),
+        ['date', 'new_deaths']
+    ]
+
+    # Período ANTES (vermelho)
+    df_antes_plot = df_6m[df_6m['date'] < inicio_vacinacao].copy()
+    df_antes_plot['dias_relativos'] = (df_antes_plot['date'] - inicio_vacinacao).dt.days
+
+    fig_comparacao.add_trace(go.Scatter(
+        x=df_antes_plot['dias_relativos'],
+        y=df_antes_plot['new_deaths'],
+        mode='lines',
+        name='6 Meses ANTES',
+        line=dict(color='#EF553B', width=2),
+        fill='tozeroy',
+        fillcolor='rgba(239, 85, 59, 0.2)'
+    ))
+
+    # Período DEPOIS (verde)
+    df_depois_plot = df_6m[df_6m['date'] >= inicio_vacinacao].copy()
+    df_depois_plot['dias_relativos'] = (df_depois_plot['date'] - inicio_vacinacao).dt.days
+
+    fig_comparacao.add_trace(go.Scatter(
+        x=df_depois_plot['dias_relativos'],
+        y=df_depois_plot['new_deaths'],
+        mode='lines',
+        name='6 Meses DEPOIS',
+        line=dict(color='#00CC96', width=2),
+        fill='tozeroy',
+        fillcolor='rgba(0, 204, 150, 0.2)'
+    ))
+
+    fig_comparacao.update_layout(
+        height=400,
+        plot_bgcolor='rgb(17,17,17)',
+        paper_bgcolor='rgb(17,17,17)',
+        font=dict(color='white'),
+        xaxis=dict(
+            title='Dias (relativos ao início da vacinação)',
+            gridcolor='rgba(128,128,128,0.2)',
+            zeroline=True,
+            zerolinecolor='#FF9500',
+            zerolinewidth=2
+        ),
+        yaxis=dict(title='Mortes Diárias', gridcolor='rgba(128,128,128,0.2)'),
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
 
-df_filtrado = df_filtrado[
-    (df_filtrado['date'] >= start_date) & 
-    (df_filtrado['date'] <= end_date)
-].sort_values('date')
+    # Linha vertical no dia da vacinação (x=0 é o marco referência)
+    return marcar_evento(fig_comparacao, 0, "Vacinação Inicia")
+
+
+# Não depende do local nem do período: só muda com a versão dos dados (tabela informada na sua seção)
+@grafo.no('tabela_comparativa', 'principais')
+def tabela_principais(tabela_comparativa, principais):
+    return tabela_comparativa['dados'][
+        tabela_comparativa['dados']['location'].isin(principais)
+        & tabela_comparativa['dados']['Início Vacinação'].notna()
+    ]
+
+
+calculos = grafo.executar(
+    st.session_state.setdefault('grafo_pagina', {}),
+    local=selected_location_en,
+    nome_local=selected_location,
+    periodo=(start_date, end_date),
+    por_milhao=por_milhao,
+    tipos_eventos=tuple(tipos_eventos),
+    versao_dados=versao_dados,
+    datas_dados=(min_date, max_date),
+    principais=tuple(traducao_inversa.get(p, p) for p in lista_paises if p != 'Mundo'),
+    # Objetos entram pela versão: o backend muda com CONSULTAS_BACKEND, o estudo com a tabela de eventos
+    consultas=Versionado(consultas, (type(consultas).__name__, versao_dados)),
+    armazem=Versionado(armazem, id(armazem)),
+    estudo_eventos=Versionado(estudo_eventos, (versao_dados, versao_eventos))
+)
+df_filtrado = calculos['serie_periodo']
 
 if df_filtrado.empty:
     st.warning("⚠️ Não há dados disponíveis para o período/país selecionado.")
+    if captura_perfil is not None:
+        st.session_state['perfil_ultimo'] = captura_perfil.finalizar()
     st.stop()
 
-# KPIs
-def get_latest_valid_value(df, column):
-    valid_data = df[df[column].notna() & (df[column] > 0)]
-    if valid_data.empty:
-        return 0
-    return int(valid_data.iloc[-1][column])
+st.sidebar.caption(
+    f"📨 Notificação {df_filtrado['cadencia_notificacao'].iloc[0]} — despejos e revisões negativas redistribuídos"
+)
+st.sidebar.caption(f"🗂️ Snapshot dos dados: `{versao_dados[:12]}`")
+
+def exibir_grafico(fig):
+    """Renderiza a figura no modo (SVG/WebGL) escolhido, com payload compacto"""
+    fig = aplicar_modo_renderizacao(fig, modo_renderizacao)
+    st.plotly_chart(compactar_figura(fig), width='stretch')
 
+# KPIs
 st.markdown("""
 <h2 style='text-align: center; margin-bottom: 30px;'>
     📊 Indicadores Principais - <span style='color: #667eea;'>{}</span>
@@ -282,17 +867,24 @@ st.markdown("""
 total_cases_selected = get_latest_valid_value(df_filtrado, 'total_cases')
 total_deaths_selected = get_latest_valid_value(df_filtrado, 'total_deaths')
 total_vaccinated_selected = get_latest_valid_value(df_filtrado, 'people_vaccinated')
+populacao_conhecida = calculos['tem_populacao']
 
 col1, col2, col3 = st.columns(3)
 with col1:
     st.markdown("<div class='big-emoji' style='text-align: center;'>🦠</div>", unsafe_allow_html=True)
     st.metric("Total de Casos", f"{total_cases_selected:,}")
+    if populacao_conhecida:
+        st.caption(f"{get_latest_valid_value(df_filtrado, 'cases_per_million'):,} por milhão de habitantes")
 with col2:
     st.markdown("<div class='big-emoji' style='text-align: center;'>⚰️</div>", unsafe_allow_html=True)
     st.metric("Total de Mortes", f"{total_deaths_selected:,}")
+    if populacao_conhecida:
+        st.caption(f"{get_latest_valid_value(df_filtrado, 'deaths_per_million'):,} por milhão de habitantes")
 with col3:
     st.markdown("<div class='big-emoji' style='text-align: center;'>💉</div>", unsafe_allow_html=True)
     st.metric("Pessoas Vacinadas", f"{total_vaccinated_selected:,}")
+    if populacao_conhecida:
+        st.caption(f"{df_filtrado['vac_coverage_pct'].max():.1f}% da população (≥ 1 dose)")
 
 st.markdown("---")
 
@@ -303,37 +895,18 @@ st.markdown("""
 </h2>
 """, unsafe_allow_html=True)
 
-df_grafico1 = df_filtrado[['date', 'new_cases', 'new_deaths']].melt(
-    id_vars='date',
-    value_vars=['new_cases', 'new_deaths'],
-    var_name='Métrica',
-    value_name='Contagem'
-)
+# Rt ao lado da evolução de casos (estimado para todos os locais na carga dos dados)
+rt_todos = carregar_rt(df_completo, versao_dados, media_si, desvio_si)
+calculos.informar(rt=Versionado(rt_todos, (versao_dados, media_si, desvio_si)))
 
-df_grafico1['Métrica'] = df_grafico1['Métrica'].map({
-    'new_cases': 'Novos Casos',
-    'new_deaths': 'Novas Mortes'
-})
-
-fig1 = px.line(
-    df_grafico1,
-    x='date',
-    y='Contagem',
-    color='Métrica',
-    title=f'Novos Casos e Mortes Diárias - {selected_location}',
-    labels={'date': 'Data', 'Contagem': 'Quantidade'},
-    color_discrete_map={'Novos Casos': '#667eea', 'Novas Mortes': '#EF553B'}
-)
-
-fig1.update_layout(
-    hovermode='x unified', 
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(26, 26, 46, 0.8)',
-    font=dict(color='white'),
-    title_font=dict(size=20, color='#b794f6')
-)
-st.plotly_chart(fig1, width='stretch')
+col_fig1, col_rt = st.columns(2)
+with col_fig1:
+    exibir_grafico(calculos['fig_evolucao'])
+with col_rt:
+    if calculos['fig_rt'] is not None:
+        exibir_grafico(calculos['fig_rt'])
+    else:
+        st.info("ℹ️ Rt indisponível para este local.")
 
 # Gráfico 2: Vacinação vs Mortes
 st.markdown("""
@@ -342,138 +915,46 @@ st.markdown("""
 </h2>
 """, unsafe_allow_html=True)
 
-vaccination_start = df_filtrado[df_filtrado['people_vaccinated'] > 0]['date'].min()
-
-fig2 = go.Figure()
-
-fig2.add_trace(go.Scatter(
-    x=df_filtrado['date'],
-    y=df_filtrado['people_vaccinated'],
-    mode='lines',
-    name='Pessoas Vacinadas',
-    line=dict(color='#2ca02c', width=2),
-    yaxis='y'
-))
+vaccination_start = calculos['inicio_vacinacao']
 
-fig2.add_trace(go.Scatter(
-    x=df_filtrado['date'],
-    y=df_filtrado['total_deaths'],
-    mode='lines',
-    name='Total de Mortes',
-    line=dict(color='#d62728', width=2),
-    yaxis='y2'
-))
-
-fig2.update_layout(
-    title=f'Vacinação vs Mortalidade - {selected_location}',
-    xaxis=dict(title='Data', gridcolor='rgba(102, 126, 234, 0.2)'),
-    yaxis=dict(
-        title=dict(text='Pessoas Vacinadas', font=dict(color='#00CC96')),
-        tickfont=dict(color='#00CC96'),
-        gridcolor='rgba(102, 126, 234, 0.2)'
-    ),
-    yaxis2=dict(
-        title=dict(text='Total de Mortes', font=dict(color='#EF553B')),
-        tickfont=dict(color='#EF553B'),
-        overlaying='y',
-        side='right',
-        gridcolor='rgba(239, 85, 59, 0.2)'
-    ),
-    hovermode='x unified',
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    paper_bgcolor='rgba(0,0,0,0)',
-    plot_bgcolor='rgba(26, 26, 46, 0.8)',
-    font=dict(color='white'),
-    title_font=dict(size=20, color='#b794f6')
-)
-
-if pd.notna(vaccination_start):
-    fig2.add_shape(
-        type="line",
-        x0=vaccination_start, x1=vaccination_start,
-        y0=0, y1=1,
-        yref="paper",
-        line=dict(color="orange", width=2, dash="dash")
-    )
-    fig2.add_annotation(
-        x=vaccination_start,
-        y=1,
-        yref="paper",
-        text="Início da Vacinação",
-        showarrow=False,
-        yshift=10,
-        font=dict(color="orange", size=12)
-    )
-
-st.plotly_chart(fig2, width='stretch')
+exibir_grafico(calculos['fig_vacinacao'])
 
 # NOVO: Gráfico de Tendência de Mortes com Média Móvel
 st.markdown("---")
 st.subheader("📈 Tendência de Mortes Diárias (Média Móvel 7 dias)")
 
 if not df_filtrado.empty:
-    # Calcular média móvel de 7 dias
-    df_tendencia = df_filtrado.copy()
-    df_tendencia['media_movel_7d'] = df_tendencia['new_deaths'].rolling(window=7, center=True).mean()
-    
-    fig_tendencia = go.Figure()
-    
-    # Área de mortes diárias (transparente)
-    fig_tendencia.add_trace(go.Scatter(
-        x=df_tendencia['date'],
-        y=df_tendencia['new_deaths'],
-        mode='lines',
-        name='Mortes Diárias',
-        line=dict(color='rgba(239, 85, 59, 0.3)', width=1),
-        fill='tozeroy',
-        fillcolor='rgba(239, 85, 59, 0.1)'
-    ))
-    
-    # Linha de média móvel (destaque)
-    fig_tendencia.add_trace(go.Scatter(
-        x=df_tendencia['date'],
-        y=df_tendencia['media_movel_7d'],
-        mode='lines',
-        name='Média Móvel (7 dias)',
-        line=dict(color='#EF553B', width=3)
-    ))
-    
-    fig_tendencia.update_layout(
-        height=400,
-        plot_bgcolor='rgb(17,17,17)',
-        paper_bgcolor='rgb(17,17,17)',
-        font=dict(color='white'),
-        xaxis=dict(title='Data', gridcolor='rgba(128,128,128,0.2)'),
-        yaxis=dict(title='Mortes Diárias', gridcolor='rgba(128,128,128,0.2)'),
-        hovermode='x unified',
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    # Previsão a partir do último dia do período (ajustada para todos os locais na carga dos dados)
+    horizonte_previsao = st.select_slider(
+        "Horizonte da previsão (dias)",
+        options=[14, 21, HORIZONTE_MAXIMO],
+        value=14
+    )
+    # Origens possíveis: fim de cada ano do filtro ou a última data disponível
+    origens_previsao = tuple(min(pd.Timestamp(f'{ano}-12-31'), max_date) for ano in years_with_data)
+    previsoes = carregar_previsoes(df_completo, versao_dados, origens_previsao)
+    calculos.informar(
+        horizonte_previsao=horizonte_previsao,
+        previsoes=Versionado(previsoes, (versao_dados, origens_previsao))
     )
     
-    # Linha vertical da vacinação (usando shapes)
-    if pd.notna(vaccination_start):
-        fig_tendencia.add_shape(
-            type="line",
-            x0=vaccination_start, x1=vaccination_start,
-            y0=0, y1=1,
-            yref="paper",
-            line=dict(color='#FF9500', width=3, dash='solid')
-        )
-        fig_tendencia.add_annotation(
-            x=vaccination_start,
-            y=1,
-            yref="paper",
-            text="🟠 Início Vacinação",
-            showarrow=False,
-            yshift=10,
-            font=dict(color='#FF9500', size=12)
-        )
-    
-    st.plotly_chart(fig_tendencia, width='stretch')
+    exibir_grafico(calculos['fig_tendencia'])
     
     st.info("""
     💡 **Como interpretar:** A linha laranja mostra a tendência real (média de 7 dias).
     A linha vertical laranja marca quando a vacinação começou.
     """)
+    
+    previsoes_local = calculos['previsao_local']
+    if previsoes_local is not None:
+        casos_previstos = previsoes_local['new_cases']['previsao'].iloc[:horizonte_previsao].sum()
+        mortes_previstas = previsoes_local['new_deaths']['previsao'].iloc[:horizonte_previsao].sum()
+        col_prev1, col_prev2 = st.columns(2)
+        with col_prev1:
+            st.metric(f"🔮 Casos previstos ({horizonte_previsao} dias)", f"{int(casos_previstos):,}")
+        with col_prev2:
+            st.metric(f"🔮 Mortes previstas ({horizonte_previsao} dias)", f"{int(mortes_previstas):,}")
+        st.caption("Modelo log-linear com tendência amortecida sobre a média móvel das últimas 4 semanas.")
 
 st.markdown("---")
 
@@ -550,31 +1031,24 @@ if pd.notna(vaccination_start):
     st.success(f"🎯 **Início da Vacinação:** {vaccination_start.strftime('%d/%m/%Y')}")
     
     # Períodos de 3 MESES (mais realista que 6)
-    df_3m_before = df_filtrado[
-        (df_filtrado['date'] >= vaccination_start - pd.Timedelta(days=90)) & 
-        (df_filtrado['date'] < vaccination_start)
-    ]
-    df_3m_after = df_filtrado[
-        (df_filtrado['date'] >= vaccination_start) & 
-        (df_filtrado['date'] <= vaccination_start + pd.Timedelta(days=90))
-    ]
+    janelas_3m = calculos['janelas'][90]
     
-    if not df_3m_before.empty and not df_3m_after.empty:
+    if janelas_3m['antes']['dias'] and janelas_3m['depois']['dias']:
         # ANTES da vacinação
-        total_casos_antes = df_3m_before['new_cases'].sum()
-        total_mortes_antes = df_3m_before['new_deaths'].sum()
-        taxa_mortalidade_antes = (total_mortes_antes / total_casos_antes * 100) if total_casos_antes > 0 else 0
-        media_mortes_antes = df_3m_before['new_deaths'].mean()
+        total_casos_antes = janelas_3m['antes']['casos']
+        total_mortes_antes = janelas_3m['antes']['mortes']
+        taxa_mortalidade_antes = taxa_mortalidade(janelas_3m['antes'])
+        media_mortes_antes = janelas_3m['antes']['media_mortes']
         
         # DEPOIS da vacinação
-        total_casos_depois = df_3m_after['new_cases'].sum()
-        total_mortes_depois = df_3m_after['new_deaths'].sum()
-        taxa_mortalidade_depois = (total_mortes_depois / total_casos_depois * 100) if total_casos_depois > 0 else 0
-        media_mortes_depois = df_3m_after['new_deaths'].mean()
+        total_casos_depois = janelas_3m['depois']['casos']
+        total_mortes_depois = janelas_3m['depois']['mortes']
+        taxa_mortalidade_depois = taxa_mortalidade(janelas_3m['depois'])
+        media_mortes_depois = janelas_3m['depois']['media_mortes']
         
         # Calcular REDUÇÕES
-        reducao_taxa = ((taxa_mortalidade_antes - taxa_mortalidade_depois) / taxa_mortalidade_antes * 100) if taxa_mortalidade_antes > 0 else 0
-        reducao_media = ((media_mortes_antes - media_mortes_depois) / media_mortes_antes * 100) if media_mortes_antes > 0 else 0
+        reducao_taxa = reducao_pct(taxa_mortalidade_antes, taxa_mortalidade_depois)
+        reducao_media = reducao_pct(media_mortes_antes, media_mortes_depois)
         
         # VIDAS SALVAS = Se tivesse mantido a taxa anterior
         vidas_que_morreriam = total_casos_depois * (taxa_mortalidade_antes / 100)
@@ -648,53 +1122,7 @@ if pd.notna(vaccination_start):
         # GRÁFICO COMPARATIVO DE TAXAS
         st.subheader("📊 Comparação Visual: Taxa de Mortalidade")
         
-        fig_comp = go.Figure()
-        
-        fig_comp.add_trace(go.Bar(
-            x=['3 Meses ANTES<br>da Vacinação', '3 Meses DEPOIS<br>da Vacinação'],
-            y=[taxa_mortalidade_antes, taxa_mortalidade_depois],
-            marker=dict(
-                color=['#EF553B', '#00CC96'],
-                line=dict(color='white', width=2)
-            ),
-            text=[f'{taxa_mortalidade_antes:.2f}%', f'{taxa_mortalidade_depois:.2f}%'],
-            textposition='auto',
-            textfont=dict(size=18, color='white', family='Arial Black'),
-            hovertemplate='<b>%{x}</b><br>Taxa: %{y:.2f}%<extra></extra>'
-        ))
-        
-        if reducao_taxa > 0:
-            fig_comp.add_annotation(
-                x=0.5,
-                y=max(taxa_mortalidade_antes, taxa_mortalidade_depois) * 0.6,
-                text=f"↓ REDUÇÃO DE {abs(reducao_taxa):.1f}% ↓",
-                showarrow=False,
-                font=dict(size=24, color='#00ff88', family='Arial Black'),
-                bgcolor='rgba(0,0,0,0.8)',
-                borderpad=10
-            )
-        
-        fig_comp.update_layout(
-            height=500,
-            plot_bgcolor='rgba(26, 26, 46, 0.8)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white', size=14),
-            xaxis=dict(
-                title='',
-                tickfont=dict(size=14, color='white'),
-                showgrid=False
-            ),
-            yaxis=dict(
-                title='Taxa de Mortalidade (%)',
-                gridcolor='rgba(102, 126, 234, 0.2)',
-                tickfont=dict(size=12, color='white'),
-                title_font=dict(size=16, color='#b794f6')
-            ),
-            showlegend=False,
-            margin=dict(t=40, b=40, l=60, r=40)
-        )
-        
-        st.plotly_chart(fig_comp, width='stretch')
+        exibir_grafico(calculos['fig_taxas_3m'])
         
         st.markdown("---")
         
@@ -801,103 +1229,19 @@ st.markdown("---")
 # =============================================================
 st.subheader("🧬 Evolução da Taxa de Mortalidade vs Progresso da Vacinação")
 
-# Calcula CFR diária e média móvel de 30 dias + progresso relativo de vacinação
-if not df_filtrado.empty:
-    df_cfr = df_filtrado.copy()
-    # Evita divisão por zero atribuindo NaN quando new_cases == 0
-    df_cfr['cfr_diaria'] = np.where(df_cfr['new_cases'] > 0, df_cfr['new_deaths'] / df_cfr['new_cases'], np.nan)
-    df_cfr['cfr_mm30'] = df_cfr['cfr_diaria'].rolling(window=30, min_periods=7).mean()
-
-    # Progresso relativo da vacinação (não é cobertura real sem população; escala 0-100%)
-    max_vac = df_cfr['people_vaccinated'].max()
-    if max_vac > 0:
-        df_cfr['vac_progress_pct'] = df_cfr['people_vaccinated'] / max_vac * 100
-    else:
-        df_cfr['vac_progress_pct'] = 0
-
-    fig_cfr = go.Figure()
-
-    # Linha CFR média móvel
-    fig_cfr.add_trace(go.Scatter(
-        x=df_cfr['date'], y=df_cfr['cfr_mm30'] * 100,
-        mode='lines', name='CFR Média Móvel 30d (%)',
-        line=dict(color='#f093fb', width=3)
-    ))
-
-    # Linha de progresso vacinação (eixo secundário)
-    fig_cfr.add_trace(go.Scatter(
-        x=df_cfr['date'], y=df_cfr['vac_progress_pct'],
-        mode='lines', name='Progresso Vacinação (relativo %)',
-        line=dict(color='#667eea', width=2, dash='dash'),
-        yaxis='y2'
-    ))
 
-    fig_cfr.update_layout(
-        height=450,
-        plot_bgcolor='rgba(26, 26, 46, 0.75)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white'),
-        hovermode='x unified',
-        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
-        xaxis=dict(title='Data', gridcolor='rgba(128,128,128,0.15)'),
-        yaxis=dict(title='CFR (%)', gridcolor='rgba(128,128,128,0.2)'),
-        yaxis2=dict(title='Vacinação Relativa (%)', overlaying='y', side='right', showgrid=False)
-    )
 
-    # Linha vertical da vacinação (usando shapes)
-    if pd.notna(vaccination_start):
-        fig_cfr.add_shape(
-            type="line",
-            x0=vaccination_start, x1=vaccination_start,
-            y0=0, y1=1,
-            yref="paper",
-            line=dict(color='orange', width=2, dash='dot')
-        )
-        fig_cfr.add_annotation(
-            x=vaccination_start,
-            y=1,
-            yref="paper",
-            text='Início Vacinação',
-            showarrow=False,
-            yshift=10,
-            font=dict(color='orange', size=12)
-        )
-
-    st.plotly_chart(fig_cfr, width='stretch')
+if not df_filtrado.empty:
+    df_cfr, rotulo_vacinacao = calculos['cfr_periodo']
+    exibir_grafico(calculos['fig_cfr'])
 
     # Correlação pós-início vacinação
     if pd.notna(vaccination_start):
-        df_corr = df_cfr[df_cfr['date'] >= vaccination_start].copy()
-        df_corr = df_corr.dropna(subset=['cfr_mm30'])
+        df_corr = calculos['cfr_pos_vacinacao']
         if len(df_corr) > 10:
             corr_pearson = df_corr['cfr_mm30'].corr(df_corr['vac_progress_pct'])
-            st.info(f"🔗 Correlação (Pearson) entre CFR média móvel e progresso relativo da vacinação: **{corr_pearson:.2f}**")
-            # Scatter com linha de tendência
-            fig_scatter = go.Figure()
-            fig_scatter.add_trace(go.Scatter(
-                x=df_corr['vac_progress_pct'], y=df_corr['cfr_mm30'] * 100,
-                mode='markers', name='Observações',
-                marker=dict(color='#b794f6', size=6, line=dict(color='white', width=0.5))
-            ))
-            # Regressão linear simples
-            coef = np.polyfit(df_corr['vac_progress_pct'], df_corr['cfr_mm30'] * 100, 1)
-            x_fit = np.linspace(df_corr['vac_progress_pct'].min(), df_corr['vac_progress_pct'].max(), 50)
-            y_fit = coef[0]*x_fit + coef[1]
-            fig_scatter.add_trace(go.Scatter(
-                x=x_fit, y=y_fit,
-                mode='lines', name='Tendência Linear',
-                line=dict(color='#00CC96', width=2)
-            ))
-            fig_scatter.update_layout(
-                height=400,
-                plot_bgcolor='rgba(26, 26, 46, 0.75)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                xaxis=dict(title='Progresso Vacinação Relativo (%)'),
-                yaxis=dict(title='CFR Média Móvel 30d (%)'),
-                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
-            )
-            st.plotly_chart(fig_scatter, width='stretch')
+            st.info(f"🔗 Correlação (Pearson) entre CFR média móvel e {rotulo_vacinacao.lower()}: **{corr_pearson:.2f}**")
+            exibir_grafico(calculos['fig_dispersao_cfr'])
         else:
             st.warning('Dados insuficientes após início da vacinação para calcular correlação confiável.')
     else:
@@ -905,6 +1249,38 @@ if not df_filtrado.empty:
 
 st.markdown("---")
 
+# =============================================================
+# Matriz de correlação entre todas as métricas numéricas do OWID
+# =============================================================
+st.subheader("🧮 Matriz de Correlação entre Métricas")
+
+col_metodo, col_escopo = st.columns(2)
+with col_metodo:
+    metodo_correlacao = st.radio("Método", list(METODOS.keys()), horizontal=True)
+with col_escopo:
+    escopo_correlacao = st.radio("Escopo", [selected_location, 'Média entre países'], horizontal=True)
+
+correlacoes = carregar_correlacoes(df_completo, versao_dados, METODOS[metodo_correlacao])
+
+if escopo_correlacao == 'Média entre países':
+    codigos_iso = df_completo.drop_duplicates('location').set_index('location')['iso_code']
+    paises_iso = codigos_iso[codigos_iso.notna() & ~codigos_iso.astype(str).str.startswith('OWID_')].index
+    matriz_corr = matriz_media(correlacoes, paises_iso)
+    titulo_corr = f'Correlação de {metodo_correlacao} - média entre países (z de Fisher)'
+elif selected_location_en in correlacoes['locais']:
+    matriz_corr = matriz_local(correlacoes, selected_location_en)
+    titulo_corr = f'Correlação de {metodo_correlacao} - {selected_location}'
+else:
+    matriz_corr = None
+
+if matriz_corr is not None:
+    exibir_grafico(figura_matriz_correlacao(matriz_corr, titulo_corr))
+    st.caption("Cada par usa apenas os dias em que as duas métricas têm dado (mínimo de 10 dias); período completo da série.")
+else:
+    st.info("ℹ️ Matriz de correlação indisponível para este local.")
+
+st.markdown("---")
+
 # Comparação 6 meses
 st.markdown("""
 <h2 style='text-align: center; margin: 40px 0;'>
@@ -916,23 +1292,13 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 if pd.notna(vaccination_start):
-    df_6m_antes = df_filtrado[
-        (df_filtrado['date'] >= vaccination_start - pd.Timedelta(days=180)) & 
-        (df_filtrado['date'] < vaccination_start)
-    ]
-    df_6m_depois = df_filtrado[
-        (df_filtrado['date'] >= vaccination_start) & 
-        (df_filtrado['date'] <= vaccination_start + pd.Timedelta(days=180))
-    ]
+    janelas_6m = calculos['janelas'][180]
     
-    if not df_6m_antes.empty and not df_6m_depois.empty:
-        mortes_media_antes = df_6m_antes['new_deaths'].mean()
-        mortes_media_depois = df_6m_depois['new_deaths'].mean()
+    if janelas_6m['antes']['dias'] and janelas_6m['depois']['dias']:
+        mortes_media_antes = janelas_6m['antes']['media_mortes']
+        mortes_media_depois = janelas_6m['depois']['media_mortes']
         
-        if mortes_media_antes > 0:
-            reducao_percentual = ((mortes_media_antes - mortes_media_depois) / mortes_media_antes) * 100
-        else:
-            reducao_percentual = 0
+        reducao_percentual = reducao_pct(mortes_media_antes, mortes_media_depois)
         
         vidas_salvas = (mortes_media_antes - mortes_media_depois) * 180
         
@@ -957,106 +1323,12 @@ if pd.notna(vaccination_start):
                 st.metric("⚠️ Impacto", f"{abs(int(vidas_salvas)):,}", delta="Variantes")
         
         # Gráfico de barras
-        fig_simples = go.Figure()
-        
-        fig_simples.add_trace(go.Bar(
-            x=['6 Meses ANTES', '6 Meses DEPOIS'],
-            y=[mortes_media_antes, mortes_media_depois],
-            marker=dict(color=['#EF553B', '#00CC96']),
-            text=[f'{mortes_media_antes:.0f}', f'{mortes_media_depois:.0f}'],
-            textposition='auto'
-        ))
-        
-        if reducao_percentual > 0:
-            fig_simples.add_annotation(
-                x=0.5,
-                y=max(mortes_media_antes, mortes_media_depois) * 0.7,
-                text=f"↓ REDUÇÃO DE {abs(reducao_percentual):.1f}% ↓",
-                showarrow=False,
-                font=dict(size=20, color='#00ff88'),
-                bgcolor='rgba(0,0,0,0.7)'
-            )
-        
-        fig_simples.update_layout(
-            yaxis_title='Média de Mortes Diárias',
-            showlegend=False,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(26, 26, 46, 0.8)',
-            font=dict(color='white'),
-            height=500
-        )
-        
-        st.plotly_chart(fig_simples, width='stretch')
+        exibir_grafico(calculos['fig_medias_6m'])
         
         # NOVO: Gráfico de LINHA comparando os 2 períodos
         st.markdown("### 📊 Comparação Detalhada: Antes vs Depois")
         
-        fig_comparacao = go.Figure()
-        
-        # Período ANTES (vermelho)
-        df_antes_plot = df_6m_antes.copy()
-        df_antes_plot['dias_relativos'] = (df_antes_plot['date'] - vaccination_start).dt.days
-        
-        fig_comparacao.add_trace(go.Scatter(
-            x=df_antes_plot['dias_relativos'],
-            y=df_antes_plot['new_deaths'],
-            mode='lines',
-            name='6 Meses ANTES',
-            line=dict(color='#EF553B', width=2),
-            fill='tozeroy',
-            fillcolor='rgba(239, 85, 59, 0.2)'
-        ))
-        
-        # Período DEPOIS (verde)
-        df_depois_plot = df_6m_depois.copy()
-        df_depois_plot['dias_relativos'] = (df_depois_plot['date'] - vaccination_start).dt.days
-        
-        fig_comparacao.add_trace(go.Scatter(
-            x=df_depois_plot['dias_relativos'],
-            y=df_depois_plot['new_deaths'],
-            mode='lines',
-            name='6 Meses DEPOIS',
-            line=dict(color='#00CC96', width=2),
-            fill='tozeroy',
-            fillcolor='rgba(0, 204, 150, 0.2)'
-        ))
-        
-        fig_comparacao.update_layout(
-            height=400,
-            plot_bgcolor='rgb(17,17,17)',
-            paper_bgcolor='rgb(17,17,17)',
-            font=dict(color='white'),
-            xaxis=dict(
-                title='Dias (relativos ao início da vacinação)',
-                gridcolor='rgba(128,128,128,0.2)',
-                zeroline=True,
-                zerolinecolor='#FF9500',
-                zerolinewidth=2
-            ),
-            yaxis=dict(title='Mortes Diárias', gridcolor='rgba(128,128,128,0.2)'),
-            hovermode='x unified',
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
-        
-        # Linha vertical no dia da vacinação (x=0 é o marco referência)
-        fig_comparacao.add_shape(
-            type="line",
-            x0=0, x1=0,
-            y0=0, y1=1,
-            yref="paper",
-            line=dict(color='#FF9500', width=3, dash='solid')
-        )
-        fig_comparacao.add_annotation(
-            x=0,
-            y=1,
-            yref="paper",
-            text="Vacinação Inicia",
-            showarrow=False,
-            yshift=10,
-            font=dict(color='#FF9500', size=12)
-        )
-        
-        st.plotly_chart(fig_comparacao, width='stretch')
+        exibir_grafico(calculos['fig_antes_depois'])
         
         st.info("""
         📊 **Interpretação:** Este gráfico sobrepõe os dois períodos de 6 meses.
@@ -1079,6 +1351,199 @@ if pd.notna(vaccination_start):
 
 st.markdown("---")
 
+# ========================================
+# SEÇÃO: MAPA MUNDIAL ANIMADO
+# ========================================
+st.header("🗺️ Mapa Mundial")
+
+metrica_mapa = st.radio("Métrica do mapa", list(METRICAS_MAPA.keys()), horizontal=True)
+# Os quadros já chegam compactos (apenas z em float32), sem passar pelo modo de renderização
+st.plotly_chart(carregar_mapa(df_completo, versao_dados, metrica_mapa), width='stretch')
+st.caption("Use ▶ ou o controle deslizante para percorrer as semanas; a troca de quadro não recarrega a página.")
+
+st.markdown("---")
+
+# ========================================
+# SEÇÃO: SIMULAÇÃO CONTRAFACTUAL (CENÁRIOS)
+# ========================================
+# Abaixo do mapa, entre as seções comuns a todos os locais: a simulação (e o
+# sorteio Monte Carlo) usa todos os locais de uma vez, então depende dos dados de todos
+st.header("🧪 Simulação Contrafactual: E Se...?")
+
+st.markdown("""
+Em vez de uma estimativa pontual, esta simulação avalia **cenários alternativos** para todos os países
+e mede a incerteza com **Monte Carlo** (taxa de mortalidade anterior e contagem de mortes aleatórias).
+""")
+
+col_cenario, col_atraso, col_horizonte = st.columns(3)
+with col_cenario:
+    cenario_nome = st.selectbox("Cenário", list(CENARIOS.keys()))
+with col_atraso:
+    atraso_simulado = st.slider(
+        "Atraso da vacinação (dias)", min_value=ATRASOS[0], max_value=ATRASOS[-1], value=60,
+        step=ATRASOS[1] - ATRASOS[0],
+        disabled=CENARIOS[cenario_nome] != 'atraso'
+    )
+with col_horizonte:
+    horizonte_simulado = st.radio("Horizonte após o início (dias)", HORIZONTES, index=1, horizontal=True)
+
+resultado_contrafactual = carregar_contrafactual(
+    df_completo, versao_dados, CENARIOS[cenario_nome],
+    atraso_simulado if CENARIOS[cenario_nome] == 'atraso' else 0,
+    horizonte_simulado
+)
+
+if selected_location_en in resultado_contrafactual.index:
+    sim_local = resultado_contrafactual.loc[selected_location_en]
+    st.markdown(f"**{selected_location}**")
+    col_sim1, col_sim2, col_sim3 = st.columns(3)
+    with col_sim1:
+        st.metric("⚰️ Mortes Observadas", f"{int(sim_local['mortes_observadas']):,}")
+    with col_sim2:
+        st.metric("🧪 Mortes no Cenário", f"{int(sim_local['mortes_contrafactuais']):,}")
+    with col_sim3:
+        st.metric(
+            "💚 Vidas Salvas (média)",
+            f"{int(sim_local['vidas_salvas']):,}",
+            help=f"IC 95%: {int(sim_local['vidas_salvas_p2_5']):,} a {int(sim_local['vidas_salvas_p97_5']):,}"
+        )
+
+paises_simulados = resultado_contrafactual[
+    resultado_contrafactual.index.isin([traducao_inversa.get(p, p) for p in lista_paises if p != 'Mundo'])
+]
+if not paises_simulados.empty:
+    fig_contrafactual = figura_vidas_salvas(
+        paises_simulados, traducao_paises, f'Vidas Salvas por País - {cenario_nome}'
+    )
+    exibir_grafico(fig_contrafactual)
+
+st.markdown("---")
+
+# ========================================
+# SEÇÃO: COMPARAÇÃO ENTRE PAÍSES (SOBREPOSIÇÃO / PEQUENOS MÚLTIPLOS)
+# ========================================
+st.header("🌐 Comparação entre Países")
+
+paises_padrao = list(dict.fromkeys([selected_location, 'Brasil', 'Estados Unidos', 'Reino Unido']))
+paises_selecionados = st.multiselect(
+    "Selecione os países para comparar",
+    lista_paises,
+    default=[p for p in paises_padrao if p in lista_paises]
+)
+
+col_metrica, col_modo = st.columns(2)
+with col_metrica:
+    metricas_comparacao = {
+        'Mortes Diárias (Média Móvel 7d)': 'mortes_mm7',
+        'Mortes por Milhão (Média Móvel 7d)': 'mortes_pm_mm7',
+        'CFR (Média Móvel 30d, %)': 'cfr_mm30'
+    }
+    metrica_comparacao = st.radio("Métrica", list(metricas_comparacao.keys()), index=1, horizontal=True)
+with col_modo:
+    modo_comparacao = st.radio("Visualização", ['Sobreposição', 'Pequenos Múltiplos'], horizontal=True)
+
+if paises_selecionados:
+    # Fatia da matriz pré-calculada: nenhum filtro/cópia por país
+    matrizes_comparacao = carregar_matrizes_comparacao(df, versao_dados)
+    chave_matriz = metricas_comparacao[metrica_comparacao]
+    colunas_en = [traducao_inversa.get(p, p) for p in paises_selecionados]
+    matriz = matrizes_comparacao[chave_matriz]
+    matriz = matriz.loc[start_date:end_date, [c for c in colunas_en if c in matriz.columns]]
+
+    if matriz.columns.empty:
+        # Nenhum dos países escolhidos está nas matrizes (ex.: sem dados no snapshot atual)
+        st.info("ℹ️ Sem dados desta métrica para os países selecionados.")
+    elif modo_comparacao == 'Sobreposição':
+        exibir_grafico(figura_sobreposicao(matriz, traducao_paises, f'{metrica_comparacao} por País', metrica_comparacao))
+    else:
+        exibir_grafico(figura_pequenos_multiplos(matriz, traducao_paises, 'Comparação por País', metrica_comparacao))
+else:
+    st.info("ℹ️ Selecione ao menos um país para comparar.")
+
+st.markdown("---")
+
+# ========================================
+# SEÇÃO: COORTE ALINHADA AO INÍCIO DA VACINAÇÃO
+# ========================================
+st.header("📐 Dias Desde o Início da Vacinação: Todos os Países")
+
+coorte = carregar_coorte_vacinacao(df_completo, versao_dados)
+indice_coorte = coorte['indice']
+serie_destacada = indice_coorte[selected_location_en] if selected_location_en in indice_coorte.columns else None
+
+fig_coorte = figura_coorte(
+    coorte['faixas'],
+    serie_destacada,
+    selected_location,
+    'Mortes MM 7d (média pré-vacinação = 100)'
+)
+exibir_grafico(fig_coorte)
+
+st.info(f"""
+📊 **Interpretação:** Cada país foi alinhado ao **seu próprio** início da vacinação (dia 0).
+- 🔵 **Faixa azul:** metade central dos países com dados (P25–P75) e linha tracejada = mediana
+- 🟠 **Linha laranja:** {selected_location}
+- Valor 100 = média de mortes diárias nos 90 dias anteriores à vacinação
+""")
+
+st.markdown("---")
+
+# ========================================
+# SEÇÃO: ESTUDO DE EVENTOS
+# ========================================
+st.header("📅 Estudo de Eventos: Antes e Depois de Cada Marco")
+
+st.markdown("""
+Políticas, variantes e a cronologia do caso brasileiro (tabela `dados/eventos.csv`), além do início da
+vacinação de cada local, calculados para **todos os locais de uma vez**.
+""")
+
+ocorrencias_local = estudo_eventos['ocorrencias'][estudo_eventos['ocorrencias']['location'] == selected_location_en]
+rotulos_eventos = list(dict.fromkeys([ROTULO_VACINACAO, *ocorrencias_local.sort_values('date')['label']]))
+col_evento, col_janela_evento = st.columns([3, 1])
+with col_evento:
+    evento_escolhido = st.selectbox("Evento", rotulos_eventos)
+with col_janela_evento:
+    janela_evento = st.radio("Janela (dias)", JANELAS_EVENTOS, horizontal=True, key='janela_evento')
+
+curvas_evento = estudo_eventos['curvas'][evento_escolhido]
+tipo_evento = estudo_eventos['ocorrencias'].loc[estudo_eventos['ocorrencias']['label'] == evento_escolhido, 'tipo'].iloc[0]
+exibir_grafico(figura_coorte(
+    estudo_eventos['faixas'][evento_escolhido],
+    curvas_evento[selected_location_en] if selected_location_en in curvas_evento.columns else None,
+    selected_location,
+    'Mortes MM 7d (média pré-evento = 100)',
+    rotulo_evento=evento_escolhido,
+    tipo_evento=tipo_evento
+))
+
+variacoes = variacao_janelas(estudo_eventos['janelas'], selected_location_en, janela_evento)
+if variacoes.empty:
+    st.info(f"ℹ️ Nenhum evento registrado para {selected_location}.")
+else:
+    st.dataframe(
+        variacoes.assign(tipo=variacoes['tipo'].map(TIPOS_EVENTOS)),
+        column_config={
+            'date': st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
+            'label': "Evento",
+            'tipo': "Tipo",
+            'antes': st.column_config.NumberColumn(f"Mortes/dia ({janela_evento} d antes)", format="%.1f"),
+            'depois': st.column_config.NumberColumn(f"Mortes/dia ({janela_evento} d depois)", format="%.1f"),
+            'variacao_pct': st.column_config.NumberColumn("Variação", format="%+.1f%%")
+        },
+        hide_index=True,
+        width='stretch'
+    )
+    janelas_evento = estudo_eventos['janelas']
+    janelas_evento = janelas_evento[(janelas_evento['label'] == evento_escolhido)
+                                    & (janelas_evento['janela_dias'] == janela_evento)]
+    medias_evento = janelas_evento.pivot(index='location', columns='periodo', values='media_mortes')
+    variacao_mediana = ((medias_evento['depois'] / medias_evento['antes'].where(medias_evento['antes'] > 0) - 1) * 100).median()
+    st.caption(f"{evento_escolhido}: variação mediana entre os {len(medias_evento)} locais com o evento: "
+               f"**{variacao_mediana:+.1f}%** na média de mortes diárias ({janela_evento} dias antes × depois)")
+
+st.markdown("---")
+
 # ========================================
 # SEÇÃO COMPARATIVA: BRASIL vs OUTROS PAÍSES
 # ========================================
@@ -1089,76 +1554,57 @@ Esta seção compara o **início da vacinação** e a **taxa de mortalidade** en
 evidenciando o **impacto do atraso** no calendário vacinal brasileiro.
 """)
 
-# Calcular início da vacinação para cada país
-paises_analise = []
+# Indicadores de todos os locais, calculados uma vez por versão dos dados
+tabela_comparativa = carregar_tabela(df_completo, versao_dados, traducao_paises)
+calculos.informar(tabela_comparativa=Versionado(tabela_comparativa, versao_dados))
 
-for pais_pt in lista_paises:
-    if pais_pt == 'Mundo':
-        continue
-    
-    pais_en = traducao_inversa.get(pais_pt, pais_pt)
-    df_pais = df[df['location'] == pais_en].copy()
-    
-    if df_pais.empty:
-        continue
-    
-    vacinacao_inicio = df_pais[df_pais['people_vaccinated'] > 0]['date'].min()
-    
-    if pd.notna(vacinacao_inicio):
-        df_antes = df_pais[df_pais['date'] < vacinacao_inicio]
-        df_depois = df_pais[
-            (df_pais['date'] >= vacinacao_inicio) & 
-            (df_pais['date'] <= vacinacao_inicio + pd.Timedelta(days=180))
-        ]
-        
-        mortes_antes = df_antes['total_deaths'].max() if not df_antes.empty else 0
-        mortes_depois_inicio = df_depois['total_deaths'].iloc[0] if not df_depois.empty else mortes_antes
-        mortes_depois_fim = df_depois['total_deaths'].max() if not df_depois.empty else mortes_antes
-        
-        novas_mortes_pos_vac = mortes_depois_fim - mortes_depois_inicio
-        dias_pos_vac = len(df_depois)
-        taxa_mortalidade_pos_vac = novas_mortes_pos_vac / dias_pos_vac if dias_pos_vac > 0 else 0
-        
-        paises_analise.append({
-            'País': pais_pt,
-            'Início Vacinação': vacinacao_inicio,
-            'Mortes Antes': int(mortes_antes),
-            'Taxa Mortes/Dia (Pós-Vac)': round(taxa_mortalidade_pos_vac, 1),
-            'Total Mortes': int(df_pais['total_deaths'].max())
-        })
-
-df_comparativo = pd.DataFrame(paises_analise)
-
-if not df_comparativo.empty:
-    df_comparativo = df_comparativo.sort_values('Início Vacinação')
-    df_comparativo['Início Vacinação'] = df_comparativo['Início Vacinação'].dt.strftime('%d/%m/%Y')
-    
+paises_analise = calculos['tabela_principais']
+
+if not paises_analise.empty:
     st.subheader("📊 Tabela Comparativa: Início da Vacinação por País")
-    
-    def highlight_brazil(row):
-        if row['País'] == 'Brasil':
-            return ['background-color: #ffcccc'] * len(row)
-        return [''] * len(row)
-    
+
+    col_busca, col_ordem, col_sentido = st.columns([2, 2, 1])
+    with col_busca:
+        busca_tabela = st.text_input("Buscar local", "", placeholder="ex.: Brasil, Europe, Chile")
+    with col_ordem:
+        ordenar_por = st.selectbox("Ordenar por", COLUNAS_TABELA, index=COLUNAS_TABELA.index('Início Vacinação'))
+    with col_sentido:
+        crescente = st.radio("Sentido", ["Crescente", "Decrescente"], horizontal=False) == "Crescente"
+
+    col_filtro1, col_filtro2, col_tamanho = st.columns([2, 2, 1])
+    with col_filtro1:
+        somente_paises = st.checkbox("Somente países (sem agregados OWID)", value=True)
+    with col_filtro2:
+        somente_vacinados = st.checkbox("Somente locais com vacinação", value=True)
+    with col_tamanho:
+        tamanho_pagina = st.selectbox("Linhas por página", TAMANHOS_PAGINA, index=1)
+
+    mascara_tabela = filtrar(tabela_comparativa['dados'], busca_tabela, somente_paises, somente_vacinados)
+    total_paginas = max(1, -(-int(mascara_tabela.sum()) // tamanho_pagina))
+    pagina_atual = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1)
+
+    pagina, total_filtrado = pagina_tabela(
+        tabela_comparativa, ordenar_por, crescente, mascara_tabela, pagina_atual, tamanho_pagina
+    )
     st.dataframe(
-        df_comparativo.style.apply(highlight_brazil, axis=1),
+        estilizar_pagina(pagina, destacados=[selected_location_en]),
         width='stretch',
         hide_index=True
     )
-    
+    st.caption(f"{total_filtrado:,} locais após os filtros · Brasil em vermelho, local selecionado em lilás")
+
     # Análise do Brasil
     st.markdown("---")
     st.subheader("🇧🇷 O Caso do Brasil: Análise do Atraso Vacinal")
     
-    brasil_data = df_comparativo[df_comparativo['País'] == 'Brasil']
+    brasil_data = paises_analise[paises_analise['location'] == 'Brazil']
     
     if not brasil_data.empty:
-        brasil_inicio = pd.to_datetime(brasil_data['Início Vacinação'].iloc[0], format='%d/%m/%Y')
-        brasil_mortes_antes = brasil_data['Mortes Antes'].iloc[0]
+        brasil_inicio = brasil_data['Início Vacinação'].iloc[0]
+        brasil_mortes_antes = int(brasil_data['Mortes Antes'].iloc[0])
         brasil_taxa_pos = brasil_data['Taxa Mortes/Dia (Pós-Vac)'].iloc[0]
         
-        df_temp = pd.DataFrame(paises_analise)
-        paises_antes = df_temp[df_temp['Início Vacinação'] < brasil_inicio].sort_values('Início Vacinação')
+        paises_antes = paises_analise[paises_analise['Início Vacinação'] < brasil_inicio].sort_values('Início Vacinação')
         
         col1, col2, col3 = st.columns(3)
         
@@ -1270,20 +1716,14 @@ st.markdown("---")
 # Impacto específico no Brasil
 st.subheader("🇧🇷 O Caso Brasileiro: Negacionismo Governamental")
 
-st.warning("""
+# Datas da cronologia vêm da tabela de eventos (tipo 'cronologia'), a mesma marcada nos gráficos
+st.warning(f"""
 ### ⚠️ Cronologia do Negacionismo no Brasil
 
-**2020:**
-- 🚫 Março: Presidente chama COVID de "gripezinha"
-- 🚫 Julho-Dezembro: Governo recusa 70 milhões de doses da Pfizer
-- 🚫 Outubro: "Quem é de direita toma cloroquina"
-
-**2021:**
-- 🚫 Janeiro: Atraso de 2+ meses no início da vacinação
-- 🚫 Março-Abril: Colapso hospitalar em Manaus
-- ⚰️ Resultado: 400+ mil mortes evitáveis segundo estudos
+{cronologia_markdown(tabela_eventos, 'Brazil')}
 
 **Consequências Mensuráveis:**
+- ⚰️ Resultado: 400+ mil mortes evitáveis segundo estudos
 - 📊 Brasil teve uma das maiores taxas de mortalidade per capita
 - ⏰ Atraso vacinal custou milhares de vidas (veja tabela abaixo)
 - 🦠 Negligência favoreceu surgimento de variantes (Gamma/P.1)
@@ -1396,3 +1836,29 @@ st.markdown("---")
 st.caption("�📊 **Fonte:** Our World in Data (OWID)")
 st.caption("🛠️ **Tecnologias:** Streamlit, Pandas e Plotly")
 st.caption("📅 **Última atualização:** " + df['date'].max().strftime('%d/%m/%Y'))
+
+# Instrumentação do grafo de cálculos: o que este rerun executou e o que reaproveitou da sessão
+with st.sidebar.expander("🔁 Recomputação nesta execução"):
+    st.caption(calculos.resumo())
+
+# Perfil sob demanda: encerra a amostragem deste rerun e mostra a última captura da sessão
+if captura_perfil is not None:
+    st.session_state['perfil_ultimo'] = captura_perfil.finalizar()
+if 'perfil_ultimo' in st.session_state:
+    perfil_ultimo = st.session_state['perfil_ultimo']
+    with st.sidebar.expander("⏱️ Perfil da Execução", expanded=captura_perfil is not None):
+        st.caption(
+            f"Captura `{perfil_ultimo['nome']}`: {perfil_ultimo['duracao_s']:.2f} s, "
+            f"{perfil_ultimo['amostras']} amostras · pandas: {perfil_ultimo['ms_pandas']:,.0f} ms"
+        )
+        with open(perfil_ultimo['speedscope'], 'rb') as arquivo:
+            st.download_button("Flame graph (speedscope JSON)", arquivo.read(),
+                               file_name=os.path.basename(perfil_ultimo['speedscope']),
+                               mime='application/json', on_click='ignore', width='stretch')
+        with open(perfil_ultimo['pandas'], 'rb') as arquivo:
+            st.download_button("Resumo das chamadas ao pandas (CSV)", arquivo.read(),
+                               file_name=os.path.basename(perfil_ultimo['pandas']),
+                               mime='text/csv', on_click='ignore', width='stretch')
+        st.caption(f"Abra o JSON em [speedscope]({URL_SPEEDSCOPE}). Arquivos em `{os.path.dirname(perfil_ultimo['speedscope'])}`")
+        if perfil_ultimo['chamadas_pandas']:
+            st.dataframe(pd.DataFrame(perfil_ultimo['chamadas_pandas']).head(10), hide_index=True)
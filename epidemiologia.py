@@ -0,0 +1,98 @@
+"""Estimativa vetorizada do número de reprodução efetivo (Rt) para todos os locais
+
+Implementa o método de Cori et al. (2013): a incidência é modelada pela equação de
+renovação I_t ~ Poisson(R_t · Λ_t), com Λ_t = Σ_s w_s · I_{t-s}, em que w é o
+intervalo serial discretizado. Com priori Gamma(a, b) para R_t, constante numa
+janela de τ dias, a posteriori também é Gamma e tem forma fechada.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+# Intervalo serial da COVID-19 (dias), Nishiura et al. (2020)
+MEDIA_INTERVALO_SERIAL = 4.7
+DESVIO_INTERVALO_SERIAL = 2.9
+
+# Valores oferecidos no painel (passo de 0,1 dia): o Rt de todos os locais é cacheado por par (média, desvio)
+GRADE_MEDIA_SI = tuple(round(decimos / 10, 1) for decimos in range(10, 151))
+GRADE_DESVIO_SI = tuple(round(decimos / 10, 1) for decimos in range(5, 101))
+
+# Priori Gamma(forma, escala) recomendada pelo EpiEstim
+PRIORI_FORMA = 1.0
+PRIORI_ESCALA = 5.0
+
+# Mínimo de casos na janela para a estimativa ser exibida
+MIN_CASOS_JANELA = 12
+
+Z_95 = 1.959964
+
+
+def intervalo_serial_discreto(media=MEDIA_INTERVALO_SERIAL, desvio=DESVIO_INTERVALO_SERIAL, max_dias=None):
+    """Pesos w_s (s = 0..S) do intervalo serial gama discretizado, com w_0 = 0"""
+    forma = (media / desvio) ** 2
+    escala = desvio ** 2 / media
+    if max_dias is None:
+        max_dias = int(math.ceil(media + 5 * desvio))
+
+    # Integra a densidade gama em cada intervalo [s - 0.5, s + 0.5]
+    passo = 0.01
+    t = np.arange(passo / 2, max_dias + 0.5, passo)
+    log_pdf = (forma - 1) * np.log(t) - t / escala - math.lgamma(forma) - forma * math.log(escala)
+    massa = np.exp(log_pdf) * passo
+
+    dias = np.rint(t).astype(int)
+    pesos = np.bincount(dias, weights=massa, minlength=max_dias + 1)[:max_dias + 1]
+    pesos[0] = 0.0
+    return pesos / pesos.sum()
+
+
+def infectividade(incidencia, pesos):
+    """Λ_t = Σ_s w_s · I_{t-s} para todas as colunas, via convolução por FFT"""
+    n_dias = incidencia.shape[0]
+    n = n_dias + len(pesos)
+    espectro = np.fft.rfft(incidencia, n=n, axis=0) * np.fft.rfft(pesos, n=n)[:, None]
+    return np.clip(np.fft.irfft(espectro, n=n, axis=0)[:n_dias], 0, None)
+
+
+def soma_janela(valores, janela):
+    """Soma móvel dos últimos `janela` dias ao longo do eixo 0 (NaN no início)"""
+    acumulada = np.cumsum(valores, axis=0)
+    somas = np.full_like(acumulada, np.nan)
+    if len(acumulada) < janela:
+        return somas
+    somas[janela - 1] = acumulada[janela - 1]
+    somas[janela:] = acumulada[janela:] - acumulada[:-janela]
+    return somas
+
+
+def quantil_gama(forma, escala, z):
+    """Quantil aproximado da Gamma pela transformação de Wilson–Hilferty"""
+    forma = np.maximum(forma, 1e-9)
+    return forma * escala * np.maximum(1 - 1 / (9 * forma) + z / (3 * np.sqrt(forma)), 0) ** 3
+
+
+def estimar_rt(incidencia, media_si=MEDIA_INTERVALO_SERIAL, desvio_si=DESVIO_INTERVALO_SERIAL, janela=7):
+    """Rt médio e intervalo de credibilidade de 95% para cada coluna de uma matriz data × local.
+
+    `incidencia` é um DataFrame de novos casos diários (NaN e negativos viram 0).
+    Retorna um dicionário de DataFrames com as chaves 'rt', 'rt_inf' e 'rt_sup'.
+    """
+    casos = np.clip(np.nan_to_num(incidencia.to_numpy(dtype='float64')), 0, None)
+    pesos = intervalo_serial_discreto(media_si, desvio_si)
+
+    casos_janela = soma_janela(casos, janela)
+    lambda_janela = soma_janela(infectividade(casos, pesos), janela)
+
+    forma = PRIORI_FORMA + casos_janela
+    escala = 1 / (1 / PRIORI_ESCALA + lambda_janela)
+    confiavel = (casos_janela >= MIN_CASOS_JANELA) & (lambda_janela > 0)
+
+    def como_quadro(valores):
+        return pd.DataFrame(np.where(confiavel, valores, np.nan), index=incidencia.index, columns=incidencia.columns)
+
+    return {
+        'rt': como_quadro(forma * escala),
+        'rt_inf': como_quadro(quantil_gama(forma, escala, -Z_95)),
+        'rt_sup': como_quadro(quantil_gama(forma, escala, Z_95))
+    }
@@ -0,0 +1,197 @@
+"""Estudo de eventos: tabela de eventos datados e efeitos antes/depois em todos os locais
+
+Os eventos vêm de `dados/eventos.csv` (date, data_fim, location, label, tipo):
+políticas, a cronologia do caso brasileiro, variantes. `location` vazio marca
+um evento global, que vale para todos os locais; `data_fim` (opcional) marca
+eventos que duram um intervalo. O início da vacinação de cada local (primeira
+data com people_vaccinated > 0) entra como mais um evento, derivado dos dados.
+
+calcular_estudo_eventos faz, para todas as ocorrências (evento × local) de uma
+vez, sobre as matrizes data × local:
+
+- janelas antes/depois: [data - dias, data) e [data, data + dias], com somas
+  por diferença de somas acumuladas (nenhum laço por evento ou por local);
+- curvas de resposta: mortes (MM 7d) alinhadas à data do evento (dia 0), como
+  índice em que a média dos 90 dias anteriores vale 100, e a mediana/P25–P75
+  entre países de cada evento.
+"""
+import hashlib
+import io
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from analise import alinhar_eventos, faixas_entre_locais, inicio_vacinacao_por_local, pivotar
+
+_LOGGER = logging.getLogger(__name__)
+
+ARQUIVO_EVENTOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'eventos.csv')
+COLUNAS_EVENTOS = ['date', 'data_fim', 'location', 'label', 'tipo']
+
+ROTULO_VACINACAO = 'Início da Vacinação'
+TIPOS_EVENTOS = {
+    'vacinacao': 'Início da vacinação',
+    'politica': 'Políticas',
+    'variante': 'Variantes',
+    'cronologia': 'Cronologia'
+}
+JANELAS_EVENTOS = (90, 180)
+
+MESES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho', 'Agosto',
+         'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+
+def ler_eventos(caminho=ARQUIVO_EVENTOS):
+    """(tabela, versao): eventos do CSV e o hash do conteúdo, que entra na chave dos caches"""
+    with open(caminho, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    tabela = pd.read_csv(io.BytesIO(conteudo), parse_dates=['date', 'data_fim'])
+    faltando = [coluna for coluna in COLUNAS_EVENTOS if coluna not in tabela.columns]
+    if faltando:
+        raise ValueError(f"Tabela de eventos sem as colunas: {', '.join(faltando)}")
+    desconhecidos = set(tabela['tipo']) - set(TIPOS_EVENTOS)
+    if desconhecidos:
+        raise ValueError(f"Tipo(s) de evento desconhecido(s): {', '.join(sorted(desconhecidos))}")
+    if tabela['date'].isna().any():
+        raise ValueError("Evento sem data na tabela de eventos")
+    return tabela[COLUNAS_EVENTOS], hashlib.sha256(conteudo).hexdigest()[:16]
+
+
+def expandir_eventos(tabela, locais, inicios_vacinacao):
+    """Uma linha por ocorrência (evento × local), em ordem de local e data.
+
+    Os eventos globais são replicados para todos os `locais`; o início da
+    vacinação de cada local (NaT: sem vacinação) é acrescentado como evento.
+    """
+    locais = pd.Index(locais, name='location')
+    proprios = tabela[tabela['location'].isin(locais)]
+    globais = tabela[tabela['location'].isna()].drop(columns='location').merge(
+        locais.to_frame(index=False), how='cross'
+    )
+    inicios = inicios_vacinacao.dropna()
+    vacinacao = pd.DataFrame({
+        'date': inicios.to_numpy(), 'data_fim': pd.NaT, 'location': inicios.index,
+        'label': ROTULO_VACINACAO, 'tipo': 'vacinacao'
+    })
+    ocorrencias = pd.concat([proprios, globais[COLUNAS_EVENTOS], vacinacao], ignore_index=True)
+    # Mesmo rótulo duas vezes no mesmo local: fica a primeira (a linha do local vence a global)
+    repetidas = ocorrencias.duplicated(['label', 'location'])
+    if repetidas.any():
+        exemplos = ', '.join(f'{linha.label!r} em {linha.location!r}' for linha in ocorrencias[repetidas].head(3).itertuples())
+        _LOGGER.warning("%s ocorrência(s) de evento repetida(s) descartada(s): %s", int(repetidas.sum()), exemplos)
+        ocorrencias = ocorrencias[~repetidas]
+    return ocorrencias.sort_values(['location', 'date', 'label'], ignore_index=True)
+
+
+def _somas_janela(acumulado, colunas, inicio, fim):
+    """Somas das linhas [inicio, fim] (inclusive) de cada coluna, pelas somas acumuladas; 0 se vazia"""
+    n_dias = acumulado.shape[0] - 1
+    inicio, fim = np.clip(inicio, 0, n_dias), np.clip(fim + 1, 0, n_dias)
+    return np.where(fim > inicio, acumulado[fim, colunas] - acumulado[inicio, colunas], 0.0)
+
+
+def janelas_eventos(matrizes, ocorrencias, janelas=JANELAS_EVENTOS):
+    """Casos, mortes e média diária de mortes antes/depois de todas as ocorrências, em formato longo.
+
+    Mesmas janelas de resumo_janelas_por_local (consultas.py): 'antes' é
+    [data - dias, data) e 'depois' é [data, data + dias]; `dias` conta os dias
+    com linha nos dados e a média de mortes ignora os dias sem valor.
+    """
+    mortes = matrizes['new_deaths']
+    acumulados = {}
+    for nome, valores in [('dias', matrizes['presente'].notna()), ('casos', matrizes['new_cases'].fillna(0)),
+                          ('mortes', mortes.fillna(0)), ('dias_mortes', mortes.notna())]:
+        acumulado = np.zeros((len(mortes) + 1, mortes.shape[1]))
+        np.cumsum(valores.to_numpy(dtype='float64'), axis=0, out=acumulado[1:])
+        acumulados[nome] = acumulado
+
+    colunas = mortes.columns.get_indexer(ocorrencias['location'])
+    posicao = ((ocorrencias['date'] - mortes.index[0]).dt.days).to_numpy()
+    partes = []
+    for dias in janelas:
+        for periodo, inicio, fim in [('antes', posicao - dias, posicao - 1), ('depois', posicao, posicao + dias)]:
+            somas = {nome: _somas_janela(acumulado, colunas, inicio, fim) for nome, acumulado in acumulados.items()}
+            with np.errstate(invalid='ignore', divide='ignore'):
+                media = np.where(somas['dias_mortes'] > 0, somas['mortes'] / somas['dias_mortes'], np.nan)
+            partes.append(pd.DataFrame({
+                'location': ocorrencias['location'], 'label': ocorrencias['label'], 'tipo': ocorrencias['tipo'],
+                'date': ocorrencias['date'], 'janela_dias': dias, 'periodo': periodo,
+                'dias': somas['dias'].astype('int64'), 'casos': somas['casos'], 'mortes': somas['mortes'],
+                'media_mortes': media
+            }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def calcular_estudo_eventos(df, tabela, janelas=JANELAS_EVENTOS, dias_antes=180, dias_depois=365, dias_base=90):
+    """Janelas antes/depois e curvas alinhadas de todos os eventos da `tabela` em todos os locais de `df`.
+
+    Retorna um dict com:
+    - 'ocorrencias': uma linha por evento × local (expandir_eventos);
+    - 'janelas': estatísticas antes/depois em formato longo (janelas_eventos);
+    - 'curvas': mortes (MM 7d) alinhadas ao dia 0 como índice (pré-evento = 100),
+      colunas (label, location);
+    - 'faixas': {label: mediana e P25–P75 entre países};
+    - 'inicios': início da vacinação de cada local.
+    """
+    matrizes = pivotar(df.assign(presente=1.0), ['new_cases', 'new_deaths', 'people_vaccinated', 'presente'])
+    inicios = inicio_vacinacao_por_local(matrizes['people_vaccinated'])
+    ocorrencias = expandir_eventos(tabela, matrizes['new_deaths'].columns, inicios)
+
+    mortes_mm7 = matrizes['new_deaths'].rolling(window=7, center=True).mean()
+    alinhadas = alinhar_eventos(mortes_mm7, ocorrencias['location'], ocorrencias['date'], dias_antes, dias_depois)
+    base = alinhadas.loc[-dias_base:-1].mean()
+    curvas = alinhadas / base.where(base > 0) * 100
+    curvas.columns = pd.MultiIndex.from_frame(ocorrencias[['label', 'location']])
+
+    codigos = df.drop_duplicates('location').set_index('location')['iso_code']
+    paises = codigos[codigos.notna() & ~codigos.astype(str).str.startswith('OWID_')].index
+
+    return {
+        'ocorrencias': ocorrencias,
+        'janelas': janelas_eventos(matrizes, ocorrencias, janelas),
+        'curvas': curvas,
+        'faixas': {rotulo: faixas_entre_locais(curvas[rotulo], paises) for rotulo in ocorrencias['label'].unique()},
+        'inicios': inicios
+    }
+
+
+def eventos_no_periodo(ocorrencias, local, inicio, fim, tipos=None):
+    """Ocorrências de `local` que tocam o período [inicio, fim] (as de intervalo, se qualquer parte cair nele)"""
+    eventos = ocorrencias[ocorrencias['location'] == local]
+    if tipos is not None:
+        eventos = eventos[eventos['tipo'].isin(list(tipos))]
+    fim_evento = eventos['data_fim'].fillna(eventos['date'])
+    return eventos[(eventos['date'] <= fim) & (fim_evento >= inicio)].reset_index(drop=True)
+
+
+def variacao_janelas(janelas, local, dias):
+    """Média diária de mortes antes/depois de cada evento de `local` na janela de `dias`, com a variação %"""
+    selecao = janelas[(janelas['location'] == local) & (janelas['janela_dias'] == dias)]
+    tabela = selecao.pivot(index=['date', 'label', 'tipo'], columns='periodo', values='media_mortes')
+    tabela = tabela.reindex(columns=['antes', 'depois'])
+    tabela['variacao_pct'] = (tabela['depois'] / tabela['antes'].where(tabela['antes'] > 0) - 1) * 100
+    return tabela.reset_index()
+
+
+def _quando(evento):
+    """Mês (ou meses, para eventos de intervalo) do evento, por extenso"""
+    inicio = MESES[evento['date'].month - 1]
+    if pd.isna(evento['data_fim']) or (evento['data_fim'].year, evento['data_fim'].month) == (evento['date'].year, evento['date'].month):
+        return inicio
+    fim = MESES[evento['data_fim'].month - 1]
+    if evento['data_fim'].year != evento['date'].year:
+        return f"{inicio} de {evento['date'].year} a {fim} de {evento['data_fim'].year}"
+    return f'{inicio}-{fim}'
+
+
+def cronologia_markdown(tabela, local, tipo='cronologia', marcador='🚫'):
+    """Lista em Markdown dos eventos `tipo` de `local`, agrupados por ano"""
+    eventos = tabela[(tabela['location'] == local) & (tabela['tipo'] == tipo)].sort_values('date')
+    linhas = []
+    for ano, do_ano in eventos.groupby(eventos['date'].dt.year, sort=True):
+        linhas.append(f'**{ano}:**')
+        linhas.extend(f"- {marcador} {_quando(evento)}: {evento['label']}" for _, evento in do_ano.iterrows())
+        linhas.append('')
+    return '\n'.join(linhas).strip()
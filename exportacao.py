@@ -0,0 +1,187 @@
+"""Exportação em fluxo dos dados por trás dos gráficos (CSV ou Parquet)
+
+Cada linha exportada é a do snapshot (todas as colunas de df_filtrado) mais
+as colunas derivadas da página:
+
+- media_movel_7d: média móvel centrada de 7 dias de new_deaths
+- cfr_diaria / cfr_mm30: CFR diária e sua média móvel de 30 dias
+- vac_progress_pct: cobertura vacinal (ou progresso relativo, sem população)
+
+O Parquet do snapshot é lido em lotes (pyarrow.dataset, com o filtro de local
+resolvido pelas estatísticas dos grupos de linhas). Como o arquivo vem
+ordenado por local e data, as linhas de um local chegam juntas: cada local é
+completado, recebe as colunas derivadas (sobre a série completa, como na
+página), é recortado no período e emitido. A memória fica limitada a um lote
+mais a série de um local, mesmo em "todos os locais, todas as datas"; a saída
+é produzida como um gerador de blocos de bytes, que a API envia conforme são
+gerados.
+
+O botão de download da página entrega o arquivo inteiro de uma vez (o
+Streamlit não envia downloads em fluxo), então lá a seleção é limitada a
+LIMITE_LOCAIS_PAGINA locais; exportações maiores, até "todos os locais", vão
+pela rota /v1/exportar da API (API_URL: endereço público da API, padrão
+http://localhost:8502).
+"""
+import os
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from consultas import metricas_derivadas, progresso_vacinacao
+from snapshots import ARQUIVO_DADOS, DIRETORIO_SNAPSHOTS, LINHAS_POR_GRUPO
+
+COLUNAS_DERIVADAS = ['media_movel_7d', 'cfr_diaria', 'cfr_mm30', 'vac_progress_pct']
+FORMATOS = {'csv': 'text/csv; charset=utf-8', 'parquet': 'application/vnd.apache.parquet'}
+LIMITE_LOCAIS_PAGINA = 10
+API_URL = os.environ.get('API_URL', 'http://localhost:8502')
+
+
+def caminho_snapshot(versao_dados, diretorio=DIRETORIO_SNAPSHOTS):
+    return os.path.join(diretorio, versao_dados, ARQUIVO_DADOS)
+
+
+def com_derivadas(serie, inicio=None, fim=None):
+    """Série completa de um local com as colunas derivadas, recortada em [inicio, fim]"""
+    serie = serie.reset_index(drop=True)
+    metricas = metricas_derivadas(serie)
+    serie['media_movel_7d'] = metricas['new_deaths_mm7']
+    serie['cfr_diaria'] = metricas['cfr_diaria']
+    serie['cfr_mm30'] = metricas['cfr_mm30']
+    tem_populacao = serie['population'].notna().any()
+    if inicio is not None or fim is not None:
+        datas = serie['date']
+        serie = serie[(datas >= (inicio if inicio is not None else datas.min()))
+                      & (datas <= (fim if fim is not None else datas.max()))].reset_index(drop=True)
+    # Como na página: relativo ao máximo do período exportado quando falta a população
+    serie['vac_progress_pct'] = progresso_vacinacao(serie, tem_populacao)[0].astype('float64')
+    return serie
+
+
+def esquema_exportacao(caminho):
+    """Esquema Arrow da saída: colunas do snapshot mais as derivadas (float64)"""
+    esquema = ds.dataset(caminho, format='parquet').schema.remove_metadata()
+    for coluna in COLUNAS_DERIVADAS:
+        esquema = esquema.append(pa.field(coluna, pa.float64()))
+    return esquema
+
+
+def quadros_por_local(caminho, locais=None, inicio=None, fim=None, linhas_por_lote=LINHAS_POR_GRUPO):
+    """Gera um DataFrame por local (com as colunas derivadas), na ordem do arquivo"""
+    filtro = ds.field('location').isin(sorted(locais)) if locais else None
+    # Sem pre_buffer o leitor não traz o arquivo inteiro de uma vez: um grupo de linhas por lote
+    formato = ds.ParquetFileFormat(default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=False))
+    dataset = ds.dataset(caminho, format=formato)
+    atual, pedacos, emitidos = None, [], set()
+    for lote in dataset.to_batches(filter=filtro, batch_size=linhas_por_lote, batch_readahead=1,
+                                   fragment_readahead=1, use_threads=False):
+        if lote.num_rows == 0:
+            continue
+        quadro = lote.to_pandas()
+        nomes = quadro['location'].to_numpy(dtype=object)
+        # Fronteiras entre locais dentro do lote (as linhas de cada local são contíguas)
+        cortes = [0, *(np.flatnonzero(nomes[1:] != nomes[:-1]) + 1), len(quadro)]
+        for comeco, final in zip(cortes[:-1], cortes[1:]):
+            if nomes[comeco] != atual:
+                if pedacos:
+                    yield com_derivadas(pd.concat(pedacos, ignore_index=True), inicio, fim)
+                if nomes[comeco] in emitidos:
+                    raise RuntimeError(f"Snapshot fora de ordem: linhas de {nomes[comeco]!r} não são contíguas")
+                atual, pedacos = nomes[comeco], []
+                emitidos.add(atual)
+            pedacos.append(quadro.iloc[comeco:final])
+    if pedacos:
+        yield com_derivadas(pd.concat(pedacos, ignore_index=True), inicio, fim)
+
+
+def blocos_csv(quadros, esquema):
+    """Bytes do CSV, um bloco por local (o cabeçalho sai mesmo sem linhas)"""
+    yield (','.join(esquema.names) + '\n').encode()
+    for quadro in quadros:
+        if len(quadro):
+            yield quadro[esquema.names].to_csv(index=False, header=False, date_format='%Y-%m-%d').encode()
+
+
+class _Coletor:
+    """Destino de escrita que só acumula os bytes até o próximo `esvaziar()`"""
+
+    closed = False
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def esvaziar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def blocos_parquet(quadros, esquema, linhas_por_grupo=LINHAS_POR_GRUPO):
+    """Bytes do Parquet: um grupo de linhas a cada `linhas_por_grupo`, emitido assim que é escrito"""
+    coletor = _Coletor()
+    escritor = pq.ParquetWriter(pa.PythonFile(coletor, mode='w'), esquema)
+    pendentes, linhas = [], 0
+
+    def escrever():
+        tabela = pa.Table.from_pandas(pd.concat(pendentes, ignore_index=True), schema=esquema, preserve_index=False)
+        escritor.write_table(tabela, row_group_size=linhas_por_grupo)
+
+    for quadro in quadros:
+        pendentes.append(quadro[esquema.names])
+        linhas += len(quadro)
+        if linhas >= linhas_por_grupo:
+            escrever()
+            pendentes, linhas = [], 0
+            yield coletor.esvaziar()
+    if linhas:
+        escrever()
+    escritor.close()
+    yield coletor.esvaziar()
+
+
+def gerar_exportacao(versao_dados, formato='csv', locais=None, inicio=None, fim=None, diretorio=DIRETORIO_SNAPSHOTS):
+    """Gerador de blocos de bytes da exportação de `locais` (None: todos) em [inicio, fim]"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato!r} (use {' ou '.join(FORMATOS)})")
+    caminho = caminho_snapshot(versao_dados, diretorio)
+    esquema = esquema_exportacao(caminho)
+    quadros = quadros_por_local(caminho, locais, inicio, fim)
+    return blocos_csv(quadros, esquema) if formato == 'csv' else blocos_parquet(quadros, esquema)
+
+
+def nome_arquivo(locais, inicio, fim, formato):
+    """Nome sugerido para o download, ex.: covid_brazil_2021-2022.csv"""
+    if not locais:
+        parte_locais = 'todos'
+    elif len(locais) <= 3:
+        parte_locais = '_'.join(local.lower().replace(' ', '-') for local in sorted(locais))
+    else:
+        parte_locais = f'{len(locais)}-locais'
+    periodo = f'{pd.Timestamp(inicio).year}-{pd.Timestamp(fim).year}' if inicio is not None and fim is not None else 'completo'
+    return f'covid_{parte_locais}_{periodo}.{formato}'
+
+
+def url_exportacao(locais=None, inicio=None, fim=None, formato='csv', base=API_URL):
+    """Endereço de /v1/exportar na API para os mesmos parâmetros (locais None: todos)"""
+    parametros = [('local', local) for local in locais or []] + [('formato', formato)]
+    parametros += [(nome, f'{pd.Timestamp(data):%Y-%m-%d}') for nome, data in [('inicio', inicio), ('fim', fim)]
+                   if data is not None]
+    return f"{base.rstrip('/')}/v1/exportar?{urlencode(parametros)}"
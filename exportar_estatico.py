@@ -0,0 +1,377 @@
+"""Exportação estática do dashboard: uma página HTML por local, pronta para CDN
+
+Cada local do seletor é renderizado pelo próprio dashboard.py (executado pelo
+AppTest do Streamlit, sem servidor), na visão padrão: período completo e
+opções iniciais. KPIs, textos, alertas e tabelas viram HTML; cada figura vira
+um arquivo JSON compacto (o mesmo payload que a página envia ao navegador),
+carregado pelo plotly.js quando entra na tela. Servir o resultado não executa
+Python nenhum:
+
+    estatico/
+        index.html            redireciona para a página do local padrão
+        <local>.html          página completa de cada local
+        dados/<hash>.json     figuras, endereçadas pelo conteúdo (figuras iguais são gravadas uma vez)
+        fragmentos/           HTML já renderizado de cada local e das seções comuns
+        manifesto.json        chaves usadas na reconstrução incremental
+
+As seções a partir do mapa mundial (mapa, simulação contrafactual,
+comparação entre países, coorte, tabela comparativa e textos finais) não
+dependem só do local escolhido: são renderizadas uma vez, a partir do local
+padrão, e repetidas em todas as páginas (os destaques do local nelas são os
+da visão padrão). Por isso qualquer seção calculada sobre todos os locais
+precisa ficar abaixo do mapa no dashboard: acima dele, a chave de cada local
+cobre só as linhas do próprio local. A reconstrução é incremental: um local só é renderizado de novo se
+as linhas dele no snapshot, o código do dashboard ou os dados empacotados em
+dados/ (tabela de eventos, população) mudaram, e as seções comuns, se o
+snapshot, o código ou dados/ mudaram. As páginas em si são só a junção
+dos fragmentos, refeitas sempre. A renderização é distribuída entre
+processos (um AppTest com caches próprios por processo). Exporta o snapshot
+atual do diretório de trabalho (ou de SNAPSHOTS_DIRETORIO), o mesmo que o
+dashboard usaria.
+
+Uso:
+    python exportar_estatico.py [--saida estatico] [--processos N] [--tudo]
+"""
+import argparse
+import glob
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from cache_compartilhado import hash_codigo
+from cache_dados import TRADUCAO_PAISES, lista_locais_pt
+from snapshots import carregar_snapshot, hash_conteudo, ler_manifesto, ler_ponteiro
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+# Dados empacotados que a página lê além do snapshot (marcos dos gráficos, população)
+DIRETORIO_EMPACOTADOS = os.path.join(RAIZ, 'dados')
+DIRETORIO_SAIDA = 'estatico'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+LOCAL_PADRAO = 'Mundo'
+ROTULO_LOCAL = "Selecione o País/Região"
+# Primeiro cabeçalho das seções que não dependem do local escolhido
+INICIO_SECOES_COMUNS = "🗺️ Mapa Mundial"
+TEMPO_LIMITE_RENDERIZACAO = 900
+
+PLOTLY_JS = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+MARKED_JS = 'https://cdn.jsdelivr.net/npm/marked@12.0.2/marked.min.js'
+
+PAGINA = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Dashboard COVID-19 - {titulo}</title>
+<style>
+body {{ margin: 0; font-family: "Source Sans Pro", system-ui, sans-serif; color: #fafafa;
+       background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%); background-attachment: fixed; }}
+nav {{ position: fixed; top: 0; bottom: 0; left: 0; width: 220px; overflow-y: auto; padding: 16px;
+      background: rgba(15, 15, 35, 0.9); box-sizing: border-box; }}
+nav a {{ display: block; padding: 4px 8px; color: #c9c9e8; text-decoration: none; border-radius: 6px; }}
+nav a.atual, nav a:hover {{ background: #667eea; color: #fff; }}
+nav small {{ display: block; margin-top: 16px; color: #888; }}
+main {{ margin-left: 220px; padding: 24px 48px; max-width: 1300px; }}
+.colunas {{ display: flex; gap: 16px; flex-wrap: wrap; }}
+.coluna {{ flex: 1 1 0; min-width: 200px; }}
+.metrica {{ padding: 8px 0; }}
+.metrica .rotulo {{ font-size: 0.9rem; color: #c9c9e8; }}
+.metrica .valor {{ font-size: 2rem; }}
+.metrica .delta.green {{ color: #21c354; }} .metrica .delta.red {{ color: #ff4b4b; }} .metrica .delta.gray {{ color: #aaa; }}
+.caption {{ font-size: 0.85rem; color: #aaa; }}
+.alerta {{ padding: 12px 16px; border-radius: 8px; margin: 8px 0; }}
+.alerta.info {{ background: rgba(28, 131, 225, 0.15); }} .alerta.success {{ background: rgba(33, 195, 84, 0.15); }}
+.alerta.warning {{ background: rgba(255, 193, 7, 0.15); }} .alerta.error {{ background: rgba(255, 75, 75, 0.15); }}
+.grafico {{ min-height: 450px; }}
+table.tabela {{ border-collapse: collapse; width: 100%; font-size: 0.9rem; }}
+table.tabela th, table.tabela td {{ padding: 4px 8px; border-bottom: 1px solid #333; text-align: right; }}
+details {{ margin: 8px 0; }}
+</style>
+</head>
+<body>
+<nav>
+<strong>🔍 País/Região</strong>
+{navegacao}
+<small>Snapshot {versao} · gerado em {gerado_em}</small>
+</nav>
+<main>
+{conteudo}
+</main>
+<script src="{marked_js}"></script>
+<script src="{plotly_js}"></script>
+<script>
+document.querySelectorAll('[data-md]').forEach(function (div) {{ div.innerHTML = marked.parse(div.dataset.md); }});
+var observador = new IntersectionObserver(function (entradas) {{
+  entradas.forEach(function (entrada) {{
+    if (!entrada.isIntersecting) return;
+    var div = entrada.target;
+    observador.unobserve(div);
+    fetch(div.dataset.src).then(function (r) {{ return r.json(); }}).then(function (figura) {{
+      var config = Object.assign({{}}, figura.config, {{responsive: true}});
+      Plotly.newPlot(div, figura.spec.data, figura.spec.layout || {{}}, config).then(function () {{
+        if (figura.spec.frames) Plotly.addFrames(div, figura.spec.frames);
+      }});
+    }});
+  }});
+}}, {{rootMargin: '400px'}});
+document.querySelectorAll('.grafico[data-src]').forEach(function (div) {{ observador.observe(div); }});
+</script>
+</body>
+</html>
+"""
+
+
+def slug(nome):
+    """Nome de arquivo do local: 'Coreia do Sul' -> 'coreia-do-sul'"""
+    sem_acento = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '-', sem_acento.lower()).strip('-')
+
+
+def chave_codigo_e_dados():
+    """SHA-256 do código da página e dos módulos que ela usa (qualquer .py da raiz) e de cada arquivo em dados/"""
+    resumo = hashlib.sha256(hash_codigo(RAIZ).encode())
+    for caminho in sorted(glob.glob(os.path.join(DIRETORIO_EMPACOTADOS, '**', '*'), recursive=True)):
+        if os.path.isfile(caminho):
+            with open(caminho, 'rb') as arquivo:
+                resumo.update(os.path.relpath(caminho, RAIZ).encode() + arquivo.read())
+    return resumo.hexdigest()
+
+
+def chaves_locais(df, locais_en, codigo, manifesto):
+    """Chave de cada local: código + linhas do local + período dos dados (que define o padrão do filtro de anos)"""
+    chaves = {}
+    periodo = f"{manifesto['data_inicial']}:{manifesto['data_final']}"
+    for local, linhas in df[df['location'].isin(locais_en)].groupby('location', observed=True):
+        chaves[local] = hashlib.sha256(f'{codigo}:{periodo}:{hash_conteudo(linhas)}'.encode()).hexdigest()
+    return chaves
+
+
+# ========================================
+# Renderização (processos de trabalho)
+# ========================================
+
+_app = None
+
+
+def _iniciar_trabalhador():
+    global _app
+    from streamlit.testing.v1 import AppTest
+
+    # Sem servidor, o Streamlit avisa a cada cache e a cada thread; só erros interessam aqui
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    _app = AppTest.from_file(os.path.join(RAIZ, 'dashboard.py'), default_timeout=TEMPO_LIMITE_RENDERIZACAO)
+    _executar(_app.run)
+
+
+def _executar(execucao):
+    # O AppTest troca o módulo __main__ pelo script; as próximas tarefas precisam do original para desserializar
+    principal = sys.modules['__main__']
+    try:
+        execucao()
+    finally:
+        sys.modules['__main__'] = principal
+
+
+def _markdown(texto, classe='md'):
+    """Markdown convertido no navegador (marked.js), com o HTML embutido preservado como no Streamlit"""
+    return f'<div class="{classe}" data-md="{html.escape(texto, quote=True)}"></div>\n'
+
+
+def _tabela(df):
+    df = df.copy()
+    for coluna in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = df[coluna].dt.strftime('%d/%m/%Y')
+    return df.to_html(index=False, na_rep='—', classes='tabela', border=0, float_format=lambda valor: f'{valor:,.1f}')
+
+
+def _html(no, figuras):
+    """HTML de um nó da árvore do AppTest; figuras vão para `figuras` (hash -> JSON)"""
+    tipo = getattr(no, 'type', None)
+    proto = getattr(no, 'proto', None)
+    if tipo in ('flex_container', 'vertical', 'horizontal', 'column', 'expandable') or tipo is None:
+        filhos = ''.join(_html(filho, figuras) for filho in no.children.values())
+        if tipo == 'column':
+            return f'<div class="coluna">{filhos}</div>'
+        if tipo == 'expandable':
+            return f'<details><summary>{html.escape(proto.expandable.label)}</summary>{filhos}</details>'
+        if tipo == 'flex_container' and any(getattr(filho, 'type', None) == 'column' for filho in no.children.values()):
+            return f'<div class="colunas">{filhos}</div>'
+        return f'<div>{filhos}</div>'
+    if tipo == 'markdown':
+        return _markdown(proto.body)
+    if tipo == 'caption':
+        return _markdown(proto.body, 'md caption')
+    if tipo in ('header', 'subheader', 'title'):
+        return f'<{proto.tag}>{html.escape(proto.body)}</{proto.tag}>\n'
+    if tipo in ('info', 'success', 'warning', 'error'):
+        icone = f'{proto.icon} ' if proto.icon else ''
+        return _markdown(icone + proto.body, f'alerta {tipo}')
+    if tipo == 'metric':
+        delta = f'<div class="delta {proto.MetricColor.Name(proto.color).lower()}">{html.escape(proto.delta)}</div>' if proto.delta else ''
+        return (f'<div class="metrica"><div class="rotulo">{html.escape(proto.label)}</div>'
+                f'<div class="valor">{html.escape(proto.body)}</div>{delta}</div>')
+    if tipo == 'plotly_chart':
+        conteudo = f'{{"spec":{proto.spec},"config":{proto.config or "{}"}}}'
+        chave = hashlib.sha256(conteudo.encode()).hexdigest()[:24]
+        figuras[chave] = conteudo
+        return f'<div class="grafico" data-src="dados/{chave}.json"></div>\n'
+    if tipo in ('dataframe', 'arrow_data_frame', 'table'):
+        return _tabela(no.value)
+    # Widgets e demais elementos interativos não têm sentido na página estática
+    return ''
+
+
+def renderizar_local(nome):
+    """Renderiza a página de `nome`; retorna (nome, {'local' | 'comum': (HTML, figuras)})"""
+    _executar(next(widget for widget in _app.sidebar.selectbox if widget.label == ROTULO_LOCAL).select(nome).run)
+    if _app.exception:
+        raise RuntimeError(f"Falha ao renderizar {nome}: {_app.exception[0].message}")
+
+    partes = {'local': ([], {}), 'comum': ([], {})}
+    html_partes, figuras = partes['local']
+    for no in _app.main.children.values():
+        if getattr(no, 'type', None) == 'header' and no.proto.body == INICIO_SECOES_COMUNS:
+            html_partes, figuras = partes['comum']
+        html_partes.append(_html(no, figuras))
+    return nome, {parte: (''.join(trechos), figuras) for parte, (trechos, figuras) in partes.items()}
+
+
+# ========================================
+# Montagem
+# ========================================
+
+def _ler_manifesto(saida):
+    try:
+        with open(os.path.join(saida, ARQUIVO_MANIFESTO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {'chave_comum': None, 'locais': {}}
+
+
+def _gravar(caminho, texto):
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(texto)
+    os.replace(temporario, caminho)
+
+
+def _ler(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return arquivo.read()
+
+
+def exportar(saida=DIRETORIO_SAIDA, processos=None, tudo=False):
+    """Gera (ou atualiza) o site estático em `saida` a partir do snapshot atual; retorna um resumo"""
+    inicio = time.perf_counter()
+    ponteiro = ler_ponteiro()
+    if ponteiro is None:
+        raise FileNotFoundError("Não há snapshot atual; abra o dashboard uma vez para criar o primeiro")
+    versao = ponteiro['hash']
+    manifesto_dados = ler_manifesto(versao)
+    df = carregar_snapshot(versao)
+
+    nomes = lista_locais_pt(df['location'].unique())
+    locais_en = {nome_pt: local for local, nome_pt in TRADUCAO_PAISES.items() if nome_pt in nomes}
+    codigo = chave_codigo_e_dados()
+    chaves = chaves_locais(df, list(locais_en.values()), codigo, manifesto_dados)
+    chave_comum = hashlib.sha256(f'{codigo}:{versao}'.encode()).hexdigest()
+    del df
+
+    os.makedirs(os.path.join(saida, 'dados'), exist_ok=True)
+    os.makedirs(os.path.join(saida, 'fragmentos'), exist_ok=True)
+    anterior = _ler_manifesto(saida)
+    comum_html = os.path.join(saida, 'fragmentos', '_comum.html')
+
+    def fragmento(nome):
+        return os.path.join(saida, 'fragmentos', f'{slug(nome)}.html')
+
+    pendentes = [nome for nome in nomes if tudo or not os.path.exists(fragmento(nome))
+                 or anterior['locais'].get(nome, {}).get('chave') != chaves[locais_en[nome]]]
+    refazer_comum = tudo or anterior['chave_comum'] != chave_comum or not os.path.exists(comum_html)
+    if refazer_comum and LOCAL_PADRAO not in pendentes:
+        pendentes.insert(0, LOCAL_PADRAO)
+
+    if pendentes:
+        # Cada processo abre a página uma vez (a visão padrão) e depois só troca o local
+        with ProcessPoolExecutor(max_workers=min(processos or os.cpu_count() or 1, len(pendentes)),
+                                 initializer=_iniciar_trabalhador) as executor:
+            for nome, partes in executor.map(renderizar_local, pendentes):
+                gravar = [(fragmento(nome), *partes['local'])]
+                if nome == LOCAL_PADRAO and refazer_comum:
+                    gravar.append((comum_html, *partes['comum']))
+                for caminho_html, conteudo_html, figuras in gravar:
+                    for chave, conteudo in figuras.items():
+                        caminho = os.path.join(saida, 'dados', f'{chave}.json')
+                        if not os.path.exists(caminho):
+                            _gravar(caminho, conteudo)
+                    _gravar(caminho_html, conteudo_html)
+                print(f"  renderizado: {nome}", flush=True)
+        # A página renderiza o snapshot atual; se ele foi trocado no meio, as chaves não valem para o que foi gerado
+        if ler_ponteiro()['hash'] != versao:
+            raise RuntimeError("O snapshot atual mudou durante a exportação; execute de novo")
+
+    # Páginas: junção dos fragmentos (barata, refeita para todos os locais)
+    gerado_em = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    comum = _ler(comum_html)
+    ATUAL = ' class="atual"'
+    for nome in nomes:
+        navegacao = '\n'.join(
+            f'<a href="{slug(outro)}.html"{ATUAL if outro == nome else ""}>{html.escape(outro)}</a>' for outro in nomes
+        )
+        _gravar(os.path.join(saida, f'{slug(nome)}.html'), PAGINA.format(
+            titulo=html.escape(nome), navegacao=navegacao, versao=versao[:12], gerado_em=gerado_em,
+            conteudo=_ler(fragmento(nome)) + comum, marked_js=MARKED_JS, plotly_js=PLOTLY_JS
+        ))
+    _gravar(os.path.join(saida, 'index.html'),
+            f'<!DOCTYPE html><meta charset="utf-8"><meta http-equiv="refresh" content="0; url={slug(LOCAL_PADRAO)}.html">')
+
+    # Figuras que nenhuma página usa mais
+    usadas = set()
+    for caminho in glob.glob(os.path.join(saida, 'fragmentos', '*.html')):
+        usadas.update(re.findall(r'data-src="dados/([0-9a-f]+)\.json"', _ler(caminho)))
+    removidas = 0
+    for caminho in glob.glob(os.path.join(saida, 'dados', '*.json')):
+        if os.path.basename(caminho)[:-5] not in usadas:
+            os.remove(caminho)
+            removidas += 1
+
+    _gravar(os.path.join(saida, ARQUIVO_MANIFESTO), json.dumps({
+        'versao_dados': versao,
+        'chave_comum': chave_comum,
+        'gerado_em': gerado_em,
+        'locais': {nome: {'arquivo': f'{slug(nome)}.html', 'chave': chaves[locais_en[nome]]} for nome in nomes}
+    }, ensure_ascii=False, indent=1))
+
+    return {'locais': len(nomes), 'renderizados': pendentes, 'comum_refeito': refazer_comum,
+            'figuras': len(usadas), 'figuras_removidas': removidas, 'segundos': time.perf_counter() - inicio}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--saida', default=DIRETORIO_SAIDA, help="diretório do site estático")
+    parser.add_argument('--processos', type=int, help="processos de renderização (padrão: número de CPUs)")
+    parser.add_argument('--tudo', action='store_true', help="renderiza todos os locais, ignorando o manifesto")
+    argumentos = parser.parse_args()
+    try:
+        resumo = exportar(argumentos.saida, argumentos.processos, argumentos.tudo)
+    except FileNotFoundError as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        return 1
+    print(f"{resumo['locais']} páginas em {argumentos.saida}/ ({len(resumo['renderizados'])} locais renderizados"
+          f"{', seções comuns refeitas' if resumo['comum_refeito'] else ''}; {resumo['figuras']} figuras, "
+          f"{resumo['figuras_removidas']} removidas) em {resumo['segundos']:.1f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
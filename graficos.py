@@ -0,0 +1,322 @@
+"""Funções de montagem e renderização dos gráficos Plotly do dashboard"""
+import logging
+import math
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+_LOGGER = logging.getLogger(__name__)
+
+# Acima deste total de pontos em uma figura, as linhas passam a ser desenhadas em WebGL
+LIMIAR_WEBGL = 5000
+
+# Cor e traço da marcação de cada tipo de evento (eventos.py)
+ESTILOS_EVENTOS = {
+    'vacinacao': dict(color='#FF9500', dash='dash'),
+    'politica': dict(color='#4fc3f7', dash='dot'),
+    'variante': dict(color='#f093fb', dash='dot'),
+    'cronologia': dict(color='#EF553B', dash='dashdot')
+}
+
+# Propriedades do go.Scatter sem equivalente no go.Scattergl e a troca feita na conversão (None: removida).
+# Preenchimentos (fill='tozeroy', 'tonexty', ...) e linhas em degrau (line.shape='hv', ...) existem nos dois
+# e passam sem troca; qualquer outra propriedade sem equivalente mantém o traço em SVG.
+EQUIVALENTES_WEBGL = {
+    'line.shape': lambda forma: 'linear' if forma == 'spline' else forma,
+    'line.smoothing': None,  # só vale para line.shape='spline'
+    'line.simplify': None,  # o WebGL desenha todos os pontos
+    'cliponaxis': None  # o WebGL sempre recorta na área do eixo
+}
+
+MODOS_RENDERIZACAO = {
+    'Automático': 'auto',
+    'SVG': 'svg',
+    'WebGL': 'webgl'
+}
+
+
+def contar_pontos(fig):
+    """Soma a quantidade de pontos de todos os traços de linha da figura"""
+    total = 0
+    for trace in fig.data:
+        if trace.type in ('scatter', 'scattergl') and trace.y is not None:
+            total += len(trace.y)
+    return total
+
+
+def _para_webgl(trace):
+    """go.Scattergl equivalente ao go.Scatter `trace`, ou o próprio `trace` se não houver equivalente"""
+    props = trace.to_plotly_json()
+    props.pop('type', None)
+    for caminho, trocar in EQUIVALENTES_WEBGL.items():
+        *pais, nome = caminho.split('.')
+        alvo = props
+        for pai in pais:
+            alvo = alvo.get(pai) if isinstance(alvo, dict) else None
+        if isinstance(alvo, dict) and nome in alvo:
+            valor = alvo.pop(nome)
+            if trocar is not None:
+                alvo[nome] = trocar(valor)
+    try:
+        return go.Scattergl(props)
+    except ValueError as erro:
+        _LOGGER.warning("Traço %r mantido em SVG, sem equivalente em WebGL: %s", trace.name, str(erro).splitlines()[0])
+        return trace
+
+
+def aplicar_modo_renderizacao(fig, modo='auto', limiar=LIMIAR_WEBGL):
+    """Troca go.Scatter (SVG) por go.Scattergl (WebGL) conforme o modo escolhido.
+
+    No modo 'auto' a troca só acontece quando a figura passa de `limiar` pontos;
+    abaixo disso a própria figura é devolvida, sem cópia. Shapes e anotações
+    (ex.: linha de início da vacinação) ficam no layout e são preservados. As
+    diferenças conhecidas entre os dois tipos estão em EQUIVALENTES_WEBGL; um
+    traço com outra propriedade sem equivalente fica em SVG (com aviso no log).
+    """
+    if modo == 'svg' or (modo == 'auto' and contar_pontos(fig) <= limiar):
+        return fig
+
+    traces = [_para_webgl(trace) if trace.type == 'scatter' else trace for trace in fig.data]
+    return go.Figure(data=traces, layout=fig.layout, frames=fig.frames)
+
+
+def _layout_escuro(fig, **kwargs):
+    """Aplica o tema escuro padrão do dashboard"""
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(26, 26, 46, 0.8)',
+        font=dict(color='white'),
+        title_font=dict(size=20, color='#b794f6'),
+        **kwargs
+    )
+    return fig
+
+
+def marcar_evento(fig, x, texto, tipo='vacinacao', x_fim=None, nivel=0):
+    """Linha vertical em `x` (ou faixa até `x_fim`) com o rótulo no topo; `nivel` desce o rótulo para não sobrepor"""
+    estilo = ESTILOS_EVENTOS[tipo]
+    if x_fim is None:
+        fig.add_shape(
+            type="line",
+            x0=x, x1=x,
+            y0=0, y1=1,
+            yref="paper",
+            line=dict(color=estilo['color'], width=2, dash=estilo['dash'])
+        )
+    else:
+        fig.add_shape(
+            type="rect",
+            x0=x, x1=x_fim,
+            y0=0, y1=1,
+            yref="paper",
+            line=dict(width=0),
+            fillcolor=estilo['color'],
+            opacity=0.12,
+            layer='below'
+        )
+    fig.add_annotation(
+        x=x,
+        y=1,
+        yref="paper",
+        text=texto,
+        showarrow=False,
+        xanchor='center' if x_fim is None else 'left',
+        yshift=10 - 18 * nivel,
+        font=dict(color=estilo['color'], size=12)
+    )
+    return fig
+
+
+def marcar_eventos(fig, eventos):
+    """Marca cada evento de `eventos` (colunas date, data_fim, label, tipo), alternando a altura dos rótulos.
+
+    Eventos na mesma data (ex.: variantes Alfa e Beta) recebem sempre alturas
+    diferentes, mesmo que a alternância os colocasse no mesmo nível.
+    """
+    niveis_por_data = {}
+    for posicao, evento in enumerate(eventos.itertuples()):
+        ocupados = niveis_por_data.setdefault(evento.date, set())
+        nivel = posicao % 3
+        while nivel in ocupados:
+            nivel += 1
+        ocupados.add(nivel)
+        x_fim = evento.data_fim if pd.notna(evento.data_fim) else None
+        marcar_evento(fig, evento.date, evento.label, evento.tipo, x_fim, nivel=nivel)
+    return fig
+
+
+def figura_sobreposicao(matriz, nomes, titulo, titulo_y):
+    """Uma linha por país (coluna da matriz) no mesmo eixo"""
+    fig = go.Figure()
+    for coluna in matriz.columns:
+        fig.add_trace(go.Scatter(
+            x=matriz.index,
+            y=matriz[coluna],
+            mode='lines',
+            name=nomes.get(coluna, coluna),
+            line=dict(width=2)
+        ))
+
+    return _layout_escuro(
+        fig,
+        title=titulo,
+        height=500,
+        hovermode='x unified',
+        xaxis=dict(title='Data', gridcolor='rgba(102, 126, 234, 0.2)'),
+        yaxis=dict(title=titulo_y, gridcolor='rgba(102, 126, 234, 0.2)'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def figura_pequenos_multiplos(matriz, nomes, titulo, titulo_y, colunas=4):
+    """Um painel por país (coluna da matriz), com eixo X compartilhado"""
+    n_paises = len(matriz.columns)
+    colunas = min(colunas, n_paises)
+    linhas = math.ceil(n_paises / colunas)
+
+    fig = make_subplots(
+        rows=linhas, cols=colunas,
+        shared_xaxes=True,
+        subplot_titles=[nomes.get(c, c) for c in matriz.columns],
+        vertical_spacing=min(0.08, 0.3 / linhas)
+    )
+    for i, coluna in enumerate(matriz.columns):
+        fig.add_trace(go.Scatter(
+            x=matriz.index,
+            y=matriz[coluna],
+            mode='lines',
+            name=nomes.get(coluna, coluna),
+            line=dict(color='#EF553B', width=2),
+            fill='tozeroy',
+            fillcolor='rgba(239, 85, 59, 0.1)',
+            showlegend=False
+        ), row=i // colunas + 1, col=i % colunas + 1)
+
+    fig.update_xaxes(gridcolor='rgba(128,128,128,0.2)')
+    fig.update_yaxes(gridcolor='rgba(128,128,128,0.2)')
+    fig.update_annotations(font=dict(color='#b794f6', size=13))
+
+    return _layout_escuro(fig, title=f'{titulo} ({titulo_y})', height=max(300, 220 * linhas))
+
+
+def figura_coorte(faixas, serie_destacada, nome_destacado, titulo_y, rotulo_evento='Início da Vacinação',
+                  tipo_evento='vacinacao'):
+    """Mediana e faixa P25–P75 entre países, com o país selecionado em destaque"""
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=faixas.index, y=faixas['p75'],
+        mode='lines', line=dict(width=0),
+        hoverinfo='skip', showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=faixas.index, y=faixas['p25'],
+        mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor='rgba(102, 126, 234, 0.25)',
+        name='Intervalo Interquartil (P25–P75)'
+    ))
+    fig.add_trace(go.Scatter(
+        x=faixas.index, y=faixas['mediana'],
+        mode='lines', name='Mediana dos Países',
+        line=dict(color='#667eea', width=2, dash='dash')
+    ))
+    if serie_destacada is not None:
+        fig.add_trace(go.Scatter(
+            x=serie_destacada.index, y=serie_destacada,
+            mode='lines', name=nome_destacado,
+            line=dict(color='#FF9500', width=3)
+        ))
+
+    marcar_evento(fig, 0, f'Dia 0 = {rotulo_evento}', tipo_evento)
+
+    return _layout_escuro(
+        fig,
+        height=450,
+        hovermode='x unified',
+        xaxis=dict(title=f'Dias relativos ao evento ({rotulo_evento})', gridcolor='rgba(128,128,128,0.2)'),
+        yaxis=dict(title=titulo_y, gridcolor='rgba(128,128,128,0.2)'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def figura_rt(rt, rt_inf, rt_sup, titulo):
+    """Rt estimado com intervalo de credibilidade de 95% e linha de referência R = 1"""
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=rt_sup.index, y=rt_sup,
+        mode='lines', line=dict(width=0),
+        hoverinfo='skip', showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=rt_inf.index, y=rt_inf,
+        mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor='rgba(240, 147, 251, 0.2)',
+        name='IC 95%'
+    ))
+    fig.add_trace(go.Scatter(
+        x=rt.index, y=rt,
+        mode='lines', name='Rt',
+        line=dict(color='#f093fb', width=2)
+    ))
+
+    fig.add_hline(y=1, line=dict(color='#00CC96', width=2, dash='dash'))
+
+    return _layout_escuro(
+        fig,
+        title=titulo,
+        hovermode='x unified',
+        xaxis=dict(title='Data', gridcolor='rgba(102, 126, 234, 0.2)'),
+        yaxis=dict(title='Rt', gridcolor='rgba(102, 126, 234, 0.2)', rangemode='tozero'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def figura_vidas_salvas(resultado, nomes, titulo):
+    """Barras de vidas salvas por país com intervalo de 95% da simulação"""
+    resultado = resultado.sort_values('vidas_salvas')
+    fig = go.Figure(go.Bar(
+        x=resultado['vidas_salvas'],
+        y=[nomes.get(local, local) for local in resultado.index],
+        orientation='h',
+        marker=dict(color=['#00CC96' if v > 0 else '#EF553B' for v in resultado['vidas_salvas']]),
+        error_x=dict(
+            type='data',
+            symmetric=False,
+            array=resultado['vidas_salvas_p97_5'] - resultado['vidas_salvas'],
+            arrayminus=resultado['vidas_salvas'] - resultado['vidas_salvas_p2_5'],
+            color='white'
+        ),
+        hovertemplate='<b>%{y}</b><br>Vidas salvas: %{x:,.0f}<extra></extra>'
+    ))
+
+    return _layout_escuro(
+        fig,
+        title=titulo,
+        height=max(400, 28 * len(resultado)),
+        xaxis=dict(title='Vidas Salvas (estimativa, IC 95%)', gridcolor='rgba(102, 126, 234, 0.2)'),
+        yaxis=dict(title=''),
+        showlegend=False
+    )
+
+
+def figura_matriz_correlacao(matriz, titulo):
+    """Heatmap de uma matriz de correlação (escala divergente centrada em zero)"""
+    fig = go.Figure(go.Heatmap(
+        z=matriz.to_numpy(),
+        x=list(matriz.columns),
+        y=list(matriz.index),
+        colorscale='RdBu',
+        zmin=-1, zmax=1, zmid=0,
+        colorbar=dict(title='r'),
+        hovertemplate='%{y} × %{x}<br>r = %{z:.2f}<extra></extra>'
+    ))
+
+    return _layout_escuro(
+        fig,
+        title=titulo,
+        height=max(450, 18 * len(matriz)),
+        xaxis=dict(tickangle=-45, showgrid=False),
+        yaxis=dict(autorange='reversed', showgrid=False)
+    )
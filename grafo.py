@@ -0,0 +1,169 @@
+"""Grafo de dependências dos cálculos da página, com recomputação incremental por sessão
+
+Cada nó declara de quais entradas (valores dos widgets, versão dos dados) ou
+de quais outros nós depende. A assinatura de um nó resume as assinaturas das
+dependências e o código da própria função; a cada rerun, um nó só é executado
+de novo se a assinatura mudou desde a última execução na sessão. Trocar só o
+período, por exemplo, não refaz o recorte do local nem o que é calculado
+sobre a série completa dele.
+
+O código de um nó entra na assinatura, mas não o das funções que ele chama:
+a `versao` do grafo (ex.: cache_compartilhado.hash_codigo, o hash de todos os
+.py da raiz) entra na assinatura de todos os nós, e qualquer mudança no código
+do projeto invalida a memória da sessão.
+
+A avaliação é preguiçosa: um nó só roda quando (e se) a página pede o valor.
+Tudo o que um nó lê precisa chegar como dependência declarada: a assinatura
+não enxerga variáveis globais, então um nó que leia uma global que não seja
+módulo, função, classe ou CONSTANTE é recusado na primeira avaliação. Objetos
+grandes ou sem repr estável (backend de consultas, resultados em cache) entram
+como Versionado(valor, versao): a assinatura usa só a versão. Entradas que só
+existem no meio da página (widgets, cargas feitas mais abaixo) são passadas
+com `informar` antes de o primeiro nó que depende delas ser pedido.
+
+    grafo = Grafo(versao=hash_codigo())
+
+    @grafo.no('local', 'versao_dados')
+    def serie_local(local, versao_dados): ...
+
+    @grafo.no('serie_local', 'periodo')
+    def serie_periodo(serie_local, periodo): ...
+
+    calculos = grafo.executar(st.session_state.setdefault('grafo_pagina', {}), local=..., periodo=..., versao_dados=...)
+    calculos['serie_periodo']
+    calculos.informar(horizonte=st.select_slider(...))
+    calculos.executados      # [(nó, segundos)] que rodaram neste rerun
+"""
+import builtins
+import hashlib
+import time
+import types
+
+
+class Versionado:
+    """Entrada cujo valor não entra na assinatura: só `versao` (ex.: hash dos dados de origem)"""
+
+    def __init__(self, valor, versao):
+        self.valor = valor
+        self.versao = versao
+
+
+def _objetos_codigo(codigo):
+    """`codigo` e os objetos de código aninhados nele (lambdas, funções internas)"""
+    yield codigo
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            yield from _objetos_codigo(constante)
+
+
+def _codigo(funcao):
+    """Resumo do código de `funcao` (bytecode e constantes, incluindo lambdas internas)"""
+    resumo = hashlib.sha1()
+    for codigo in _objetos_codigo(funcao.__code__):
+        constantes = [valor for valor in codigo.co_consts if not isinstance(valor, types.CodeType)]
+        resumo.update(codigo.co_code + repr(constantes).encode())
+    return resumo.hexdigest()
+
+
+def _globais_mutaveis(funcao):
+    """Globais lidas por `funcao` que poderiam mudar sem mudar a assinatura do nó"""
+    if funcao.__closure__:
+        return sorted(funcao.__code__.co_freevars)
+    nomes = {nome for codigo in _objetos_codigo(funcao.__code__) for nome in codigo.co_names}
+    suspeitas = []
+    for nome in nomes:
+        if nome not in funcao.__globals__ or nome.isupper():
+            continue  # atributo, builtin ou constante
+        valor = funcao.__globals__[nome]
+        if not isinstance(valor, (types.ModuleType, types.FunctionType, types.BuiltinFunctionType, type)):
+            suspeitas.append(nome)
+    return sorted(nome for nome in suspeitas if not hasattr(builtins, nome))
+
+
+class Grafo:
+    """Nós registrados com @grafo.no(*dependencias); o nome do nó é o nome da função.
+
+    `versao` (ex.: hash do código do projeto) entra na assinatura de todos os nós.
+    """
+
+    def __init__(self, versao=''):
+        self.nos = {}
+        self.versao = versao
+
+    def no(self, *dependencias):
+        def registrar(funcao):
+            self.nos[funcao.__name__] = (funcao, dependencias)
+            return funcao
+        return registrar
+
+    def executar(self, memoria, **entradas):
+        """Avaliação dos nós para `entradas`, reaproveitando os valores guardados em `memoria`
+
+        `memoria` é um dict da sessão (ex.: st.session_state) que guarda, por nó,
+        a assinatura e o valor da última execução.
+        """
+        return Execucao(self, memoria, entradas)
+
+
+class Execucao:
+    """Valores dos nós num rerun; registra o que foi executado e o que foi reaproveitado"""
+
+    def __init__(self, grafo, memoria, entradas):
+        self.grafo = grafo
+        self.memoria = memoria
+        self.entradas = entradas
+        self.executados = []
+        self.reaproveitados = []
+        self._assinaturas = {}
+        self._valores = {}
+
+    def informar(self, **entradas):
+        """Acrescenta entradas que só existem mais abaixo na página (widgets, cargas tardias)"""
+        repetidas = [nome for nome in entradas if nome in self.entradas or nome in self.grafo.nos]
+        if repetidas:
+            raise ValueError(f"Entrada já definida ou com nome de nó: {', '.join(repetidas)}")
+        self.entradas.update(entradas)
+
+    def assinatura(self, nome):
+        if nome in self.entradas:
+            valor = self.entradas[nome]
+            identidade = ('versao', valor.versao) if isinstance(valor, Versionado) else valor
+            return hashlib.sha1(repr((nome, identidade)).encode()).hexdigest()
+        if nome not in self._assinaturas:
+            if nome not in self.grafo.nos:
+                raise KeyError(f"'{nome}' não é nó nem entrada informada (falta um calculos.informar?)")
+            funcao, dependencias = self.grafo.nos[nome]
+            globais = _globais_mutaveis(funcao)
+            if globais:
+                raise ValueError(f"O nó '{nome}' lê {', '.join(globais)} sem declarar como dependência")
+            partes = [nome, self.grafo.versao, _codigo(funcao), *(self.assinatura(dependencia) for dependencia in dependencias)]
+            self._assinaturas[nome] = hashlib.sha1(repr(partes).encode()).hexdigest()
+        return self._assinaturas[nome]
+
+    def __getitem__(self, nome):
+        if nome in self.entradas:
+            valor = self.entradas[nome]
+            return valor.valor if isinstance(valor, Versionado) else valor
+        if nome in self._valores:
+            return self._valores[nome]
+
+        assinatura = self.assinatura(nome)
+        guardado = self.memoria.get(nome)
+        if guardado is not None and guardado[0] == assinatura:
+            valor = guardado[1]
+            self.reaproveitados.append(nome)
+        else:
+            funcao, dependencias = self.grafo.nos[nome]
+            argumentos = [self[dependencia] for dependencia in dependencias]
+            inicio = time.perf_counter()
+            valor = funcao(*argumentos)
+            self.executados.append((nome, time.perf_counter() - inicio))
+            self.memoria[nome] = (assinatura, valor)
+        self._valores[nome] = valor
+        return valor
+
+    def resumo(self):
+        """Texto com os nós executados (e o tempo de cada) e os reaproveitados neste rerun"""
+        executados = ', '.join(f'{nome} ({segundos * 1000:.0f} ms)' for nome, segundos in self.executados)
+        return (f"Executados: {executados or 'nenhum'}  \n"
+                f"Reaproveitados: {', '.join(self.reaproveitados) or 'nenhum'}")
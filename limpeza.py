@@ -0,0 +1,113 @@
+"""Limpeza de artefatos de notificação em new_cases / new_deaths
+
+Duas correções, vetorizadas sobre a matriz (data × local) e que preservam o
+total notificado de cada local:
+
+1. Revisões negativas: a série acumulada é substituída pelo seu mínimo dali em
+   diante, de modo que uma correção negativa é descontada dos dias anteriores
+   (mais recentes primeiro) em vez de gerar um dia negativo.
+2. Notificações acumuladas: um relato precedido por dias zerados (fins de
+   semana, envio semanal) é dividido igualmente entre esses dias e o dia do
+   relato, até um limite de dias que depende da cadência detectada no local.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Maior número de dias (incluindo o do relato) sobre o qual um relato é redistribuído
+LIMITE_DIAS_DIARIA = 4
+LIMITE_DIAS_SEMANAL = 14
+
+COLUNAS_LIMPEZA = ['new_cases', 'new_deaths']
+
+
+def detectar_cadencia(matriz):
+    """Classifica cada local como 'diária', 'semanal' ou 'irregular' pela mediana de dias entre relatos"""
+    valores = matriz.to_numpy(dtype='float64')
+    relatos = np.nan_to_num(valores) != 0
+    posicoes_dia = np.arange(len(valores))[:, None]
+
+    # Mediana do intervalo entre relatos consecutivos, coluna a coluna sem laço:
+    # o intervalo de cada relato é a distância até o relato anterior na mesma coluna
+    ultimo_relato = np.where(relatos, posicoes_dia, -1)
+    ultimo_relato = np.maximum.accumulate(ultimo_relato, axis=0)
+    anterior = np.vstack([np.full((1, valores.shape[1]), -1), ultimo_relato[:-1]])
+    intervalos = np.where(relatos & (anterior >= 0), posicoes_dia - anterior, np.nan)
+
+    with warnings.catch_warnings():
+        # Locais sem nenhum relato geram colunas inteiras de NaN
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        mediana = np.nanmedian(intervalos, axis=0)
+
+    cadencia = np.select([mediana <= 1.5, (mediana >= 6) & (mediana <= 8)], ['diária', 'semanal'], 'irregular')
+    return pd.Series(np.where(np.isnan(mediana), 'sem dados', cadencia), index=matriz.columns)
+
+
+def corrigir_negativos(valores):
+    """Remove valores negativos mantendo o total: acumulado vira o mínimo dos acumulados seguintes"""
+    observado = ~np.isnan(valores)
+    acumulado = np.cumsum(np.nan_to_num(valores), axis=0)
+    acumulado = np.maximum(np.minimum.accumulate(acumulado[::-1], axis=0)[::-1], 0)
+
+    # Dias sem observação repetem o acumulado do último dia observado, para que
+    # nenhuma parte do total seja atribuída a eles
+    posicoes = np.where(observado, np.arange(len(valores))[:, None], -1)
+    posicoes = np.maximum.accumulate(posicoes, axis=0)
+    colunas = np.arange(valores.shape[1])[None, :]
+    acumulado = np.where(posicoes >= 0, acumulado[np.maximum(posicoes, 0), colunas], 0)
+
+    corrigido = np.diff(acumulado, axis=0, prepend=0)
+    return np.where(observado, corrigido, np.nan)
+
+
+def redistribuir_acumulados(valores, limites):
+    """Divide cada relato igualmente entre ele e os dias zerados que o precedem (até `limites` dias por coluna)"""
+    n_dias, n_locais = valores.shape
+    observado = ~np.isnan(valores)
+    relatos = np.nan_to_num(valores) != 0
+
+    # Grupo de cada dia = quantidade de relatos antes dele: dias zerados ficam no grupo do próximo relato
+    grupo = np.cumsum(relatos, axis=0) - relatos
+    grupo = grupo + np.arange(n_locais)[None, :] * (n_dias + 1)
+
+    grupos_observados = grupo[observado]
+    tamanho = np.bincount(grupos_observados, minlength=n_locais * (n_dias + 1))
+    total = np.bincount(grupos_observados, weights=valores[observado], minlength=n_locais * (n_dias + 1))
+
+    tamanho_dia = tamanho[grupo]
+    redistribuir = observado & (tamanho_dia > 1) & (tamanho_dia <= limites[None, :])
+    # Grupos sem relato (zeros finais) têm total zero e permanecem zerados
+    return np.where(redistribuir, total[grupo] / np.maximum(tamanho_dia, 1), valores)
+
+
+def limpar_matriz(matriz, cadencia=None):
+    """Aplica as duas correções a uma matriz data × local (linhas diárias contíguas)"""
+    if cadencia is None:
+        cadencia = detectar_cadencia(matriz)
+    limites = np.where(cadencia.to_numpy() == 'diária', LIMITE_DIAS_DIARIA, LIMITE_DIAS_SEMANAL)
+
+    valores = corrigir_negativos(matriz.to_numpy(dtype='float64'))
+    valores = redistribuir_acumulados(valores, limites)
+    return pd.DataFrame(valores, index=matriz.index, columns=matriz.columns)
+
+
+def limpar_notificacoes(df, colunas=COLUNAS_LIMPEZA):
+    """Etapa de ingestão: corrige negativos e redistribui acumulados em todas as colunas, para todos os locais.
+
+    Retorna uma cópia de `df` com as colunas limpas e a cadência detectada por
+    local (com base em new_cases).
+    """
+    df = df.copy()
+    larga = df.pivot(index='date', columns='location', values=colunas).sort_index().asfreq('D')
+
+    linhas = (df['date'] - larga.index[0]).dt.days.to_numpy()
+    cadencia = None
+    for coluna in colunas:
+        matriz = larga[coluna]
+        if cadencia is None:
+            cadencia = detectar_cadencia(matriz)
+        limpa = limpar_matriz(matriz, cadencia).to_numpy()
+        df[coluna] = limpa[linhas, matriz.columns.get_indexer(df['location'])]
+
+    return df, cadencia
@@ -0,0 +1,90 @@
+"""Mapa coroplético mundial com quadros de animação semanais pré-calculados
+
+Os quadros saem de uma única matriz (semana × iso_code). A figura guarda a lista
+de países uma única vez no traço base; cada quadro carrega só o vetor `z`,
+codificado como typed array float32.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from serializacao import codificar_typed_array
+
+METRICAS_MAPA = {
+    'Mortes por Milhão': ('deaths_per_million', 'Reds'),
+    'Cobertura Vacinal (%)': ('vac_coverage_pct', 'Greens')
+}
+
+
+def codigos_paises(df):
+    """Linhas de países (ISO 3166 de 3 letras), sem agregados OWID_"""
+    codigos = df['iso_code'].astype(str)
+    return df[(codigos.str.len() == 3) & ~codigos.str.startswith('OWID')]
+
+
+def matriz_semanal(df, coluna, inicio='2020-01-01', fim='2023-12-31'):
+    """Matriz (semana × iso_code) com o último valor de cada semana, propagado em semanas sem dado"""
+    paises = codigos_paises(df)
+    paises = paises[(paises['date'] >= inicio) & (paises['date'] <= fim)]
+    diaria = paises.pivot_table(index='date', columns='iso_code', values=coluna, aggfunc='last')
+    return diaria.resample('W-SUN').last().ffill()
+
+
+def montar_mapa(matriz, titulo, escala_cores):
+    """Figura coroplética animada: traço base + um quadro (apenas z) por semana"""
+    codigos = list(matriz.columns)
+    valores = matriz.to_numpy(dtype='float64')
+    rotulos = [data.strftime('%d/%m/%Y') for data in matriz.index]
+
+    finitos = valores[np.isfinite(valores)]
+    zmax = float(np.percentile(finitos, 99)) if finitos.size else 1.0
+
+    fig = go.Figure(
+        data=[go.Choropleth(
+            locations=codigos,
+            z=codificar_typed_array(valores[-1].astype('float32')),
+            zmin=0, zmax=zmax,
+            colorscale=escala_cores,
+            marker_line_color='rgba(255,255,255,0.3)',
+            colorbar=dict(title=''),
+            hovertemplate='%{location}: %{z:,.1f}<extra></extra>'
+        )],
+        frames=[
+            go.Frame(name=rotulo, data=[go.Choropleth(z=codificar_typed_array(linha.astype('float32')))])
+            for rotulo, linha in zip(rotulos, valores)
+        ]
+    )
+
+    fig.update_layout(
+        title=titulo,
+        height=550,
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        title_font=dict(size=20, color='#b794f6'),
+        geo=dict(bgcolor='rgba(0,0,0,0)', showframe=False, projection_type='natural earth',
+                 showcoastlines=False, landcolor='#2a2a4a', showland=True),
+        margin=dict(t=60, b=0, l=0, r=0),
+        updatemenus=[dict(
+            type='buttons', showactive=False, x=0.05, y=0.05, xanchor='right', yanchor='top',
+            buttons=[
+                dict(label='▶', method='animate',
+                     args=[None, dict(frame=dict(duration=120, redraw=True), fromcurrent=True, transition=dict(duration=0))]),
+                dict(label='⏸', method='animate',
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode='immediate')])
+            ]
+        )],
+        sliders=[dict(
+            active=len(rotulos) - 1,
+            x=0.05, len=0.95, y=0, pad=dict(t=30),
+            currentvalue=dict(prefix='Semana: ', font=dict(color='white')),
+            steps=[dict(method='animate', label=rotulo,
+                        args=[[rotulo], dict(mode='immediate', frame=dict(duration=0, redraw=True), transition=dict(duration=0))])
+                   for rotulo in rotulos]
+        )]
+    )
+    return fig
+
+
+def calcular_mapa(df, metrica):
+    """Figura animada de uma métrica de METRICAS_MAPA (rótulo exibido → coluna e escala de cores)"""
+    coluna, escala_cores = METRICAS_MAPA[metrica]
+    return montar_mapa(matriz_semanal(df, coluna), f'{metrica} por País (2020–2023)', escala_cores)
@@ -0,0 +1,225 @@
+"""Captura de perfil sob demanda de um rerun do dashboard (amostragem, sem dependências)
+
+Para investigar uma visão lenta em produção, abra a página com
+`?profile=1&token=<PERFIL_TOKEN>` (mais os parâmetros da visão). O rerun
+dessa requisição é amostrado por uma thread que lê a pilha da thread do
+script (sys._current_frames) a cada intervalo; ao final, grava em
+PERFIL_DIRETORIO:
+
+- <nome>.speedscope.json: perfil amostrado no formato do speedscope
+  (https://www.speedscope.app), que também desenha o flame graph;
+- <nome>.pandas.csv: resumo das chamadas ao pandas (ponto de entrada no
+  pandas, linha do projeto que o chamou, amostras e tempo estimado).
+
+A barra lateral mostra o resumo e os links para baixar os arquivos. Os
+parâmetros `profile` e `token` saem da URL em seguida, e os reruns seguintes
+rodam sem perfil. Desligado (sem `profile` na URL ou sem PERFIL_TOKEN
+configurado), o custo é uma consulta ao dicionário de parâmetros: nenhuma
+thread é criada e nada é importado.
+
+Configuração por variáveis de ambiente:
+
+- PERFIL_TOKEN: token exigido em `token` (padrão: vazio, captura desligada)
+- PERFIL_DIRETORIO: onde gravar os perfis (padrão: perfis)
+- PERFIL_INTERVALO_MS: intervalo entre amostras (padrão: 5)
+- PERFIL_DURACAO_MAXIMA_S: encerra a captura se o rerun não terminar antes (padrão: 120)
+"""
+import csv
+import functools
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+_LOGGER = logging.getLogger(__name__)
+
+RAIZ_PROJETO = os.path.dirname(os.path.abspath(__file__))
+INTERVALO_MS = 5
+DURACAO_MAXIMA_S = 120
+NOME_THREAD = 'perfil-amostragem'
+URL_SPEEDSCOPE = 'https://www.speedscope.app'
+
+
+def _pacote_pandas():
+    import pandas
+    return os.path.dirname(os.path.abspath(pandas.__file__)) + os.sep
+
+
+class Captura:
+    """Amostragem da pilha de uma thread até `finalizar()` (ou até a duração máxima)"""
+
+    def __init__(self, diretorio, intervalo_s=INTERVALO_MS / 1000, duracao_maxima_s=DURACAO_MAXIMA_S,
+                 descricao='dashboard.py', alvo=None):
+        self.diretorio = diretorio
+        self.intervalo_s = intervalo_s
+        self.duracao_maxima_s = duracao_maxima_s
+        self.descricao = descricao
+        self.alvo = alvo if alvo is not None else threading.get_ident()
+        self.nome = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.resultado = None
+        self._amostras = Counter()  # pilha (raiz -> folha) -> amostras
+        self._ms = Counter()  # pilha -> tempo entre amostras, em ms
+        self._parar = threading.Event()
+        self._trava = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._duracao = None
+        self._thread = threading.Thread(target=self._amostrar, name=NOME_THREAD, daemon=True)
+        self._thread.start()
+
+    def _amostrar(self):
+        limite = self._inicio + self.duracao_maxima_s
+        anterior = self._inicio
+        while not self._parar.wait(self.intervalo_s):
+            agora = time.perf_counter()
+            quadro = sys._current_frames().get(self.alvo)
+            if quadro is None:
+                break
+            pilha = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                pilha.append((codigo.co_qualname, codigo.co_filename, codigo.co_firstlineno, quadro.f_lineno))
+                quadro = quadro.f_back
+            # Peso pelo tempo real desde a amostra anterior: com o GIL ocupado, o intervalo se estica
+            pilha = tuple(reversed(pilha))
+            self._amostras[pilha] += 1
+            self._ms[pilha] += (agora - anterior) * 1000
+            anterior = agora
+            if agora >= limite:
+                _LOGGER.warning("Captura de perfil %s passou de %s s; encerrando", self.nome, self.duracao_maxima_s)
+                break
+        self._duracao = time.perf_counter() - self._inicio
+        if not self._parar.is_set():
+            # O rerun não chamou finalizar (exceção, st.stop ou estouro do tempo): grava o que foi amostrado
+            self._gravar_uma_vez()
+
+    def finalizar(self):
+        """Para a amostragem e grava os arquivos (uma vez); retorna o resumo da captura"""
+        self._parar.set()
+        self._thread.join()
+        return self._gravar_uma_vez()
+
+    def _gravar_uma_vez(self):
+        with self._trava:
+            if self.resultado is None:
+                self.resultado = self._gravar()
+            return self.resultado
+
+    def _gravar(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        base = os.path.join(self.diretorio, self.nome)
+        amostras = sum(self._amostras.values())
+        with open(f'{base}.speedscope.json', 'w', encoding='utf-8') as arquivo:
+            json.dump(self.speedscope(), arquivo)
+        chamadas = self.resumo_pandas()
+        with open(f'{base}.pandas.csv', 'w', encoding='utf-8', newline='') as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(['chamada', 'origem', 'amostras', 'ms', 'pct'])
+            escritor.writerows([linha[coluna] for coluna in ('chamada', 'origem', 'amostras', 'ms', 'pct')]
+                               for linha in chamadas)
+        _LOGGER.info("Perfil gravado em %s.* (%s amostras, %.2f s)", base, amostras, self._duracao)
+        return {
+            'nome': self.nome,
+            'speedscope': f'{base}.speedscope.json',
+            'pandas': f'{base}.pandas.csv',
+            'duracao_s': self._duracao,
+            'amostras': amostras,
+            'ms_pandas': sum(linha['ms'] for linha in chamadas),
+            'chamadas_pandas': chamadas
+        }
+
+    def speedscope(self):
+        """Perfil no formato de arquivo do speedscope (tipo 'sampled', pesos em ms)"""
+        quadros, indices = [], {}
+        amostras, pesos = [], []
+        for pilha, ms in self._ms.items():
+            caminho = []
+            for nome, arquivo, primeira_linha, _ in pilha:
+                chave = (nome, arquivo, primeira_linha)
+                if chave not in indices:
+                    indices[chave] = len(quadros)
+                    quadros.append({'name': nome, 'file': arquivo, 'line': primeira_linha})
+                caminho.append(indices[chave])
+            amostras.append(caminho)
+            pesos.append(round(ms, 3))
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f'{self.descricao} ({self.nome})',
+            'exporter': 'perfil.py',
+            'activeProfileIndex': 0,
+            'shared': {'frames': quadros},
+            'profiles': [{
+                'type': 'sampled',
+                'name': self.descricao,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(pesos),
+                'samples': amostras,
+                'weights': pesos
+            }]
+        }
+
+    def resumo_pandas(self):
+        """Tempo por ponto de entrada no pandas e pela linha do projeto que o chamou, do maior para o menor"""
+        pacote = _pacote_pandas()
+        total = sum(self._ms.values())
+        contagens, tempos = Counter(), Counter()
+        for pilha, ms in self._ms.items():
+            origem = '?'
+            for nome, arquivo, _, linha in pilha:
+                if arquivo.startswith(pacote):
+                    contagens[(f'pandas.{nome}', origem)] += self._amostras[pilha]
+                    tempos[(f'pandas.{nome}', origem)] += ms
+                    break
+                if arquivo.startswith(RAIZ_PROJETO):
+                    origem = f'{os.path.relpath(arquivo, RAIZ_PROJETO)}:{linha}'
+        return [
+            {'chamada': chamada, 'origem': origem, 'amostras': contagens[(chamada, origem)],
+             'ms': round(ms, 1), 'pct': round(ms / total * 100, 1)}
+            for (chamada, origem), ms in tempos.most_common()
+        ]
+
+
+class Perfilador:
+    """Decide, pelos parâmetros da URL, se o rerun deve ser amostrado"""
+
+    def __init__(self, token, diretorio='perfis', intervalo_s=INTERVALO_MS / 1000, duracao_maxima_s=DURACAO_MAXIMA_S):
+        self.token = token
+        self.diretorio = diretorio
+        self.intervalo_s = intervalo_s
+        self.duracao_maxima_s = duracao_maxima_s
+
+    def capturar(self, parametros):
+        """Captura iniciada se `parametros` pedem perfil com o token certo; senão None"""
+        if parametros.get('profile') not in ('1', 'true', 'sim'):
+            return None
+        if not hmac.compare_digest(str(parametros.get('token', '')).encode(), self.token.encode()):
+            _LOGGER.warning("Pedido de perfil com token inválido; ignorado")
+            return None
+        return Captura(self.diretorio, self.intervalo_s, self.duracao_maxima_s)
+
+
+@functools.lru_cache(maxsize=None)
+def perfilador_configurado():
+    """Perfilador do processo, configurado pelas variáveis de ambiente (None sem PERFIL_TOKEN)"""
+    token = os.environ.get('PERFIL_TOKEN')
+    if not token:
+        return None
+    return Perfilador(
+        token,
+        os.environ.get('PERFIL_DIRETORIO', 'perfis'),
+        float(os.environ.get('PERFIL_INTERVALO_MS', INTERVALO_MS)) / 1000,
+        float(os.environ.get('PERFIL_DURACAO_MAXIMA_S', DURACAO_MAXIMA_S))
+    )
+
+
+def captura_pedida(parametros):
+    """Captura do rerun atual, se pedida na URL e permitida pela configuração; senão None"""
+    if 'profile' not in parametros:
+        return None
+    perfilador = perfilador_configurado()
+    return perfilador.capturar(parametros) if perfilador is not None else None
@@ -0,0 +1,52 @@
+"""População por local e métricas normalizadas, calculadas na carga dos dados"""
+import os
+
+import pandas as pd
+
+# Tabela empacotada com o projeto (UN WPP 2022, via OWID): funciona sem rede
+ARQUIVO_POPULACAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'populacao.csv')
+
+# Colunas derivadas adicionadas por adicionar_metricas_per_capita
+COLUNAS_PER_CAPITA = [
+    'cases_per_million',
+    'deaths_per_million',
+    'new_cases_per_million',
+    'new_deaths_per_million',
+    'vac_coverage_pct',
+    'deaths_per_100k_since_vac'
+]
+
+
+def carregar_populacao(df):
+    """População de cada local: coluna `population` do OWID, completada pela tabela empacotada"""
+    empacotada = pd.read_csv(ARQUIVO_POPULACAO).set_index('location')['population']
+    if 'population' in df.columns:
+        do_owid = df.dropna(subset=['population']).groupby('location')['population'].last()
+        return do_owid.combine_first(empacotada)
+    return empacotada
+
+
+def adicionar_metricas_per_capita(df, populacao):
+    """Adiciona as colunas normalizadas pela população em uma única junção vetorizada.
+
+    - cases_per_million / deaths_per_million: acumulados por milhão de habitantes
+    - new_cases_per_million / new_deaths_per_million: diários por milhão
+    - vac_coverage_pct: pessoas vacinadas (≥ 1 dose) em % da população
+    - deaths_per_100k_since_vac: mortes por 100 mil desde o início da vacinação do local
+    """
+    pop = df['location'].map(populacao).where(lambda p: p > 0)
+
+    df['population'] = pop
+    df['cases_per_million'] = df['total_cases'] / pop * 1e6
+    df['deaths_per_million'] = df['total_deaths'] / pop * 1e6
+    df['new_cases_per_million'] = df['new_cases'] / pop * 1e6
+    df['new_deaths_per_million'] = df['new_deaths'] / pop * 1e6
+    df['vac_coverage_pct'] = (df['people_vaccinated'] / pop * 100).clip(upper=100)
+
+    # Mortes acumuladas no primeiro dia com vacinação de cada local
+    inicio_vac = df['date'].where(df['people_vaccinated'] > 0).groupby(df['location']).transform('min')
+    mortes_no_inicio = df['total_deaths'].where(df['date'] == inicio_vac).groupby(df['location']).transform('max')
+    df['deaths_per_100k_since_vac'] = (
+        (df['total_deaths'] - mortes_no_inicio).clip(lower=0) / pop * 1e5
+    ).where(df['date'] >= inicio_vac)
+    return df
@@ -0,0 +1,57 @@
+"""Pré-cálculo da simulação contrafactual no cache compartilhado, fora do servidor
+
+Simula, para o snapshot atual, toda a grade de cenários que a página oferece
+(cenário × atraso × horizonte, contrafactual.grade_cenarios), com os blocos de
+Monte Carlo em paralelo no pool de processos de contrafactual.py, e grava cada
+resultado no cache compartilhado (CACHE_COMPARTILHADO) pela própria
+`carregar_contrafactual`: a chave é a mesma que a página consulta. Dentro do
+servidor a simulação roda sem pool; com o pré-cálculo, as réplicas só leem o
+resultado. Cenários já presentes no cache não são simulados de novo.
+
+Uso (após cada nova versão dos dados, ex.: num cron ao lado do deploy):
+    CACHE_COMPARTILHADO=disco CACHE_DIRETORIO=/mnt/cache python precalcular_contrafactual.py [--processos N]
+"""
+import argparse
+import logging
+import sys
+import time
+
+from cache_compartilhado import backend_configurado
+from cache_dados import carregar_contrafactual
+from contrafactual import grade_cenarios
+from snapshots import carregar_snapshot, ler_ponteiro
+
+
+def precalcular(df_completo, versao_dados, processos=None):
+    """Simula (ou encontra no cache) cada cenário da grade; retorna {(cenário, atraso, horizonte): segundos}"""
+    tempos = {}
+    for cenario, atraso, horizonte in grade_cenarios():
+        inicio = time.perf_counter()
+        carregar_contrafactual(df_completo, versao_dados, cenario, atraso, horizonte, _processos=processos)
+        tempos[(cenario, atraso, horizonte)] = time.perf_counter() - inicio
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--processos', type=int, help="processos do pool de simulação (padrão: número de CPUs)")
+    argumentos = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s: %(message)s')
+
+    if backend_configurado() is None:
+        print("Erro: defina CACHE_COMPARTILHADO (disco ou redis); sem ele o resultado não chega à página",
+              file=sys.stderr)
+        return 1
+    ponteiro = ler_ponteiro()
+    if ponteiro is None:
+        print("Erro: não há snapshot atual; abra o dashboard uma vez para criar o primeiro", file=sys.stderr)
+        return 1
+
+    tempos = precalcular(carregar_snapshot(ponteiro['hash']), ponteiro['hash'], argumentos.processos)
+    print(f"{len(tempos)} cenários do snapshot {ponteiro['hash'][:12]} no cache compartilhado "
+          f"em {sum(tempos.values()):.1f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Previsão de curto prazo de casos e mortes, ajustada em lote para todos os locais
+
+Modelo log-linear com tendência amortecida sobre a média móvel (7 dias, não
+centrada) das últimas semanas: log(1 + y_t) = a + b·t. As projeções usam o
+crescimento b amortecido por φ a cada dia, e a faixa de 95% vem da variância
+de predição da regressão. Todos os locais são ajustados de uma vez com as
+fórmulas fechadas de mínimos quadrados sobre a matriz (dias × locais).
+"""
+import numpy as np
+import pandas as pd
+
+HORIZONTE_MAXIMO = 28
+JANELA_AJUSTE = 28
+AMORTECIMENTO = 0.95
+MIN_DIAS_AJUSTE = 14
+
+Z_95 = 1.959964
+
+
+def ajustar_log_linear(janela):
+    """Ajusta a + b·t em cada coluna de `janela` (dias × locais), ignorando NaN"""
+    n_dias = janela.shape[0]
+    t = np.arange(n_dias, dtype='float64')[:, None]
+    observado = np.isfinite(janela)
+    y = np.where(observado, janela, 0.0)
+
+    n = observado.sum(axis=0).astype('float64')
+    soma_t = (t * observado).sum(axis=0)
+    soma_y = y.sum(axis=0)
+    soma_tt = (t ** 2 * observado).sum(axis=0)
+    soma_ty = (t * y).sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sxx = soma_tt - soma_t ** 2 / n
+        b = (soma_ty - soma_t * soma_y / n) / sxx
+        a = (soma_y - b * soma_t) / n
+        residuos = np.where(observado, janela - (a + b * t), 0.0)
+        variancia = (residuos ** 2).sum(axis=0) / (n - 2)
+
+    valido = (n >= MIN_DIAS_AJUSTE) & (sxx > 0)
+    return {
+        'a': np.where(valido, a, np.nan),
+        'b': np.where(valido, b, np.nan),
+        'variancia': np.where(valido, variancia, np.nan),
+        'n': n,
+        't_medio': soma_t / np.maximum(n, 1),
+        'sxx': sxx
+    }
+
+
+def projetar(ajuste, ultimo_t, horizonte=HORIZONTE_MAXIMO, amortecimento=AMORTECIMENTO):
+    """Previsão e faixa de 95% (em escala original) para h = 1..horizonte"""
+    h = np.arange(1, horizonte + 1, dtype='float64')[:, None]
+    crescimento = np.cumsum(amortecimento ** h, axis=0) * ajuste['b']
+    log_previsto = ajuste['a'] + ajuste['b'] * ultimo_t + crescimento
+
+    t_futuro = ultimo_t + h
+    with np.errstate(divide='ignore', invalid='ignore'):
+        erro = np.sqrt(ajuste['variancia'] * (1 + 1 / ajuste['n'] + (t_futuro - ajuste['t_medio']) ** 2 / ajuste['sxx']))
+
+    def escala_original(valores):
+        return np.clip(np.expm1(valores), 0, None)
+
+    return {
+        'previsao': escala_original(log_previsto),
+        'inf': escala_original(log_previsto - Z_95 * erro),
+        'sup': escala_original(log_previsto + Z_95 * erro)
+    }
+
+
+def prever(matriz, origens, horizonte=HORIZONTE_MAXIMO, janela_ajuste=JANELA_AJUSTE, amortecimento=AMORTECIMENTO):
+    """Previsões para todos os locais de uma matriz diária (data × local), a partir de cada origem.
+
+    Retorna {origem: {'previsao', 'inf', 'sup'}}, cada um um DataFrame com as
+    `horizonte` datas seguintes à origem nas linhas e os locais nas colunas.
+    """
+    media_movel = matriz.rolling(window=7, min_periods=4).mean()
+    log_media = np.log1p(media_movel.clip(lower=0)).to_numpy(dtype='float64')
+
+    previsoes = {}
+    for origem in origens:
+        fim = media_movel.index.searchsorted(pd.Timestamp(origem), side='right')
+        if fim == 0:
+            continue
+        janela = log_media[max(0, fim - janela_ajuste):fim]
+
+        ajuste = ajustar_log_linear(janela)
+        projecao = projetar(ajuste, janela.shape[0] - 1, horizonte, amortecimento)
+
+        datas_futuras = pd.date_range(media_movel.index[fim - 1] + pd.Timedelta(days=1), periods=horizonte, freq='D')
+        previsoes[pd.Timestamp(origem)] = {
+            chave: pd.DataFrame(valores, index=datas_futuras, columns=matriz.columns)
+            for chave, valores in projecao.items()
+        }
+
+    return previsoes
@@ -0,0 +1,114 @@
+"""Serialização compacta das figuras Plotly enviadas ao navegador
+
+Séries numéricas viram typed arrays em base64 (float32 quando a perda é
+desprezível) e eixos de datas viram epochs em milissegundos. Eixos diários
+regulares são reduzidos a `x0`/`dx`, então traços que compartilham o mesmo
+eixo de datas não repetem a lista de datas na figura.
+"""
+import base64
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Erro relativo máximo aceito ao reduzir float64 para float32
+TOLERANCIA_FLOAT32 = 1e-6
+
+# Códigos de dtype aceitos pelo Plotly.js para typed arrays
+DTYPES_PLOTLY = {
+    np.dtype('float64'): 'f8',
+    np.dtype('float32'): 'f4',
+    np.dtype('int32'): 'i4',
+    np.dtype('uint32'): 'u4',
+    np.dtype('int16'): 'i2',
+    np.dtype('uint16'): 'u2',
+    np.dtype('int8'): 'i1',
+    np.dtype('uint8'): 'u1'
+}
+
+
+def codificar_typed_array(valores):
+    """Converte um array NumPy para o formato {dtype, bdata} do Plotly.js"""
+    valores = np.ascontiguousarray(valores)
+    return {
+        'dtype': DTYPES_PLOTLY[valores.dtype],
+        'bdata': base64.b64encode(valores.tobytes()).decode('ascii')
+    }
+
+
+def reduzir_precisao(valores):
+    """Retorna float32 quando a conversão não perde precisão relevante"""
+    valores = np.asarray(valores, dtype='float64')
+    reduzidos = valores.astype('float32')
+    if np.allclose(reduzidos, valores, rtol=TOLERANCIA_FLOAT32, atol=0, equal_nan=True):
+        return reduzidos
+    return valores
+
+
+def como_datas(valores):
+    """Retorna um DatetimeIndex se os valores forem datas, senão None"""
+    arr = np.asarray(valores)
+    if arr.dtype.kind == 'M':
+        return pd.DatetimeIndex(arr)
+    if arr.dtype.kind == 'O' and len(arr) and isinstance(arr[0], (datetime, date, np.datetime64)):
+        try:
+            return pd.DatetimeIndex(arr)
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def como_numeros(valores):
+    """Retorna um array float64 se os valores forem numéricos, senão None"""
+    arr = np.asarray(valores)
+    if arr.dtype.kind in 'iufb':
+        return arr.astype('float64')
+    return None
+
+
+def _compactar_eixo_datas(trace, datas):
+    """Troca uma lista de datas por x0/dx (se regular) ou epochs em ms"""
+    epochs_ms = datas.as_unit('ms').asi8
+    passos = np.diff(epochs_ms)
+    if len(epochs_ms) > 1 and not datas.hasnans and (passos == passos[0]).all():
+        trace.x = None
+        trace.x0 = datas[0].isoformat()
+        trace.dx = int(passos[0])
+    else:
+        epochs_ms = np.where(datas.isna(), np.nan, epochs_ms.astype('float64'))
+        trace.x = codificar_typed_array(epochs_ms)
+
+
+def compactar_figura(fig):
+    """Retorna uma cópia da figura com os dados dos traços em formato compacto"""
+    fig = go.Figure(fig)
+    eixos_datas = set()
+
+    for trace in fig.data:
+        if 'x' in trace and trace.x is not None:
+            datas = como_datas(trace.x)
+            if datas is not None:
+                _compactar_eixo_datas(trace, datas)
+                eixos_datas.add(getattr(trace, 'xaxis', None) or 'x')
+            else:
+                numeros = como_numeros(trace.x)
+                if numeros is not None:
+                    trace.x = codificar_typed_array(reduzir_precisao(numeros))
+
+        if 'y' in trace and trace.y is not None:
+            numeros = como_numeros(trace.y)
+            if numeros is not None:
+                trace.y = codificar_typed_array(reduzir_precisao(numeros))
+
+    # Os epochs só são lidos como datas se o eixo declarar type='date'
+    for eixo in eixos_datas:
+        nome_layout = 'xaxis' if eixo == 'x' else f'xaxis{eixo[1:]}'
+        fig.layout[nome_layout].type = 'date'
+
+    return fig
+
+
+def tamanho_payload(fig):
+    """Tamanho em bytes do JSON da figura, como enviado ao navegador"""
+    return len(fig.to_json().encode('utf-8'))
@@ -0,0 +1,256 @@
+"""Snapshots versionados dos dados processados, endereçados pelo conteúdo
+
+Cada snapshot é o DataFrame já processado (limpeza + métricas por habitante),
+gravado em Parquet num diretório com o nome do seu hash de conteúdo:
+
+    snapshots/
+        <hash>/dados.parquet
+        <hash>/manifest.json   origem, horário da busca, contagens, intervalo de datas por local
+        ATUAL                  ponteiro JSON {"hash", "apontado_em", "fixado"}
+        historico.jsonl        uma linha por troca do ponteiro
+
+O ponteiro é trocado de forma atômica (arquivo temporário + os.replace), então
+leitores sempre veem um snapshot completo. Reverter é só apontar de volta para
+um hash anterior; um ponteiro revertido fica "fixado" e não é movido pelas
+atualizações automáticas até ser liberado. O hash é a versão dos dados usada em
+todos os caches do dashboard.
+
+Uso na linha de comando:
+    python snapshots.py listar
+    python snapshots.py atual
+    python snapshots.py reverter [hash]    (sem hash: volta ao snapshot anterior)
+    python snapshots.py liberar            (volta a aceitar atualizações automáticas)
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import pandas as pd
+
+DIRETORIO_SNAPSHOTS = os.environ.get('SNAPSHOTS_DIRETORIO', 'snapshots')
+ARQUIVO_DADOS = 'dados.parquet'
+ARQUIVO_MANIFESTO = 'manifest.json'
+ARQUIVO_PONTEIRO = 'ATUAL'
+ARQUIVO_HISTORICO = 'historico.jsonl'
+# Grupos de linhas pequenos: como o arquivo vem ordenado por local e data, as estatísticas de
+# cada grupo permitem a leitores como o DuckDB pular quase todo o arquivo ao filtrar um local
+LINHAS_POR_GRUPO = 16_384
+
+COLUNAS_OBRIGATORIAS = ['location', 'iso_code', 'date', 'new_cases', 'new_deaths', 'total_deaths', 'people_vaccinated']
+
+
+class SnapshotInvalido(ValueError):
+    """Dados recém-buscados que não devem substituir o snapshot atual"""
+
+
+def _agora():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _gravar_atomico(caminho, texto):
+    """Grava `texto` em `caminho` sem que leitores vejam um arquivo pela metade"""
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(texto)
+    os.replace(temporario, caminho)
+
+
+def hash_conteudo(df):
+    """SHA-256 das colunas, tipos e valores (linha a linha, vetorizado) do DataFrame"""
+    resumo = hashlib.sha256()
+    resumo.update(json.dumps([[str(coluna), str(tipo)] for coluna, tipo in df.dtypes.items()]).encode())
+    resumo.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return resumo.hexdigest()
+
+
+def validar(df, atual=None):
+    """Recusa dados vazios, sem as colunas usadas pelo dashboard ou que andariam para trás no tempo"""
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in df.columns]
+    if faltando:
+        raise SnapshotInvalido(f"Colunas ausentes: {', '.join(faltando)}")
+    if df.empty or df['location'].nunique() == 0:
+        raise SnapshotInvalido("Nenhuma linha de dados")
+    if atual is not None and df['date'].max() < pd.Timestamp(atual['data_final']):
+        raise SnapshotInvalido(
+            f"Última data ({df['date'].max():%Y-%m-%d}) anterior à do snapshot atual ({atual['data_final']})"
+        )
+
+
+def montar_manifesto(df, hash_dados, origem, buscado_em):
+    """Metadados do snapshot: origem, horários, contagens e intervalo de datas de cada local"""
+    por_local = df.groupby('location', observed=True)['date'].agg(['min', 'max', 'size'])
+    return {
+        'hash': hash_dados,
+        'origem': origem,
+        'buscado_em': buscado_em,
+        'criado_em': _agora(),
+        'linhas': int(len(df)),
+        'colunas': [str(coluna) for coluna in df.columns],
+        'locais': int(len(por_local)),
+        'data_inicial': f"{df['date'].min():%Y-%m-%d}",
+        'data_final': f"{df['date'].max():%Y-%m-%d}",
+        'intervalos_por_local': {
+            str(local): {'inicio': f"{linha['min']:%Y-%m-%d}", 'fim': f"{linha['max']:%Y-%m-%d}", 'linhas': int(linha['size'])}
+            for local, linha in por_local.iterrows()
+        }
+    }
+
+
+def criar_snapshot(df, origem, buscado_em=None, diretorio=DIRETORIO_SNAPSHOTS):
+    """Grava o snapshot (se ainda não existir) e retorna seu manifesto; não mexe no ponteiro"""
+    hash_dados = hash_conteudo(df)
+    destino = os.path.join(diretorio, hash_dados)
+    if os.path.exists(os.path.join(destino, ARQUIVO_MANIFESTO)):
+        return ler_manifesto(hash_dados, diretorio)
+
+    os.makedirs(diretorio, exist_ok=True)
+    manifesto = montar_manifesto(df, hash_dados, origem, buscado_em or _agora())
+
+    # Monta num diretório temporário ao lado e renomeia: o snapshot aparece completo ou não aparece
+    temporario = tempfile.mkdtemp(prefix=f'.{hash_dados[:12]}-', dir=diretorio)
+    try:
+        df.to_parquet(os.path.join(temporario, ARQUIVO_DADOS), index=False, row_group_size=LINHAS_POR_GRUPO)
+        manifesto['bytes'] = os.path.getsize(os.path.join(temporario, ARQUIVO_DADOS))
+        with open(os.path.join(temporario, ARQUIVO_MANIFESTO), 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, indent=1)
+        os.rename(temporario, destino)
+    except OSError:
+        shutil.rmtree(temporario, ignore_errors=True)
+        # Outro processo pode ter criado o mesmo snapshot (mesmo conteúdo) ao mesmo tempo
+        if not os.path.exists(os.path.join(destino, ARQUIVO_MANIFESTO)):
+            raise
+    return manifesto
+
+
+def ler_manifesto(hash_dados, diretorio=DIRETORIO_SNAPSHOTS):
+    with open(os.path.join(diretorio, hash_dados, ARQUIVO_MANIFESTO), encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def carregar_snapshot(hash_dados, diretorio=DIRETORIO_SNAPSHOTS):
+    """DataFrame processado de um snapshot"""
+    return pd.read_parquet(os.path.join(diretorio, hash_dados, ARQUIVO_DADOS))
+
+
+def ler_ponteiro(diretorio=DIRETORIO_SNAPSHOTS):
+    """Conteúdo do ponteiro ATUAL ({'hash', 'apontado_em', 'fixado'}) ou None se não houver snapshot"""
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_PONTEIRO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return None
+
+
+def apontar(hash_dados, fixado=False, motivo='atualizacao', diretorio=DIRETORIO_SNAPSHOTS):
+    """Troca o ponteiro ATUAL para `hash_dados` (atomicamente) e registra no histórico"""
+    if not os.path.exists(os.path.join(diretorio, hash_dados, ARQUIVO_MANIFESTO)):
+        raise FileNotFoundError(f"Snapshot inexistente: {hash_dados}")
+    ponteiro = {'hash': hash_dados, 'apontado_em': _agora(), 'fixado': fixado}
+    _gravar_atomico(os.path.join(diretorio, ARQUIVO_PONTEIRO), json.dumps(ponteiro))
+    # Reescrito inteiro (é pequeno) em vez de anexado: uma queda no meio não deixa linha pela metade
+    linhas = [json.dumps(troca) for troca in historico(diretorio)] + [json.dumps({**ponteiro, 'motivo': motivo})]
+    _gravar_atomico(os.path.join(diretorio, ARQUIVO_HISTORICO), '\n'.join(linhas) + '\n')
+    return ponteiro
+
+
+def historico(diretorio=DIRETORIO_SNAPSHOTS):
+    """Trocas do ponteiro, da mais antiga para a mais recente (linhas ilegíveis são ignoradas)"""
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_HISTORICO), encoding='utf-8') as arquivo:
+            linhas = [linha for linha in arquivo if linha.strip()]
+    except FileNotFoundError:
+        return []
+    trocas = []
+    for linha in linhas:
+        try:
+            trocas.append(json.loads(linha))
+        except json.JSONDecodeError:
+            # Histórico gravado por versões antigas, por anexação: a última linha pode ter ficado pela metade
+            continue
+    return trocas
+
+
+def publicacoes(diretorio=DIRETORIO_SNAPSHOTS):
+    """Pilha dos snapshots publicados que continuam válidos, do mais antigo ao atual.
+
+    Cada atualização empilha seu hash; uma reversão desempilha até o snapshot
+    de destino, descartando os que foram deixados para trás. Assim reversões
+    seguidas andam para trás (A→B→C, reverter → B, reverter → A) em vez de
+    voltar ao snapshot do qual se fugiu.
+    """
+    pilha = []
+    for troca in historico(diretorio):
+        if troca.get('motivo') == 'reversao' and troca['hash'] in pilha:
+            del pilha[pilha.index(troca['hash']) + 1:]
+        elif not pilha or pilha[-1] != troca['hash']:
+            pilha.append(troca['hash'])
+    return pilha
+
+
+def listar_snapshots(diretorio=DIRETORIO_SNAPSHOTS):
+    """Manifestos de todos os snapshots, do mais recente para o mais antigo"""
+    if not os.path.isdir(diretorio):
+        return []
+    manifestos = [ler_manifesto(nome, diretorio) for nome in os.listdir(diretorio)
+                  if os.path.exists(os.path.join(diretorio, nome, ARQUIVO_MANIFESTO))]
+    return sorted(manifestos, key=lambda manifesto: manifesto['criado_em'], reverse=True)
+
+
+def reverter(hash_dados=None, diretorio=DIRETORIO_SNAPSHOTS):
+    """Aponta para `hash_dados` (ou para o snapshot anterior ao atual no histórico) e fixa o ponteiro"""
+    if hash_dados is None:
+        atual = ler_ponteiro(diretorio)
+        pilha = publicacoes(diretorio)
+        if atual is not None and atual['hash'] in pilha:
+            del pilha[pilha.index(atual['hash']):]
+        if not pilha:
+            raise FileNotFoundError("Nenhum snapshot anterior no histórico")
+        hash_dados = pilha[-1]
+    elif len(hash_dados) < 64:
+        candidatos = [manifesto['hash'] for manifesto in listar_snapshots(diretorio) if manifesto['hash'].startswith(hash_dados)]
+        if len(candidatos) != 1:
+            raise FileNotFoundError(f"Prefixo '{hash_dados}' corresponde a {len(candidatos)} snapshots")
+        hash_dados = candidatos[0]
+    return apontar(hash_dados, fixado=True, motivo='reversao', diretorio=diretorio)
+
+
+def liberar(diretorio=DIRETORIO_SNAPSHOTS):
+    """Remove a fixação do ponteiro atual, permitindo novas atualizações automáticas"""
+    atual = ler_ponteiro(diretorio)
+    if atual is None:
+        raise FileNotFoundError("Não há snapshot atual")
+    return apontar(atual['hash'], fixado=False, motivo='liberacao', diretorio=diretorio)
+
+
+def _main(argumentos):
+    comando = argumentos[0] if argumentos else 'listar'
+    if comando == 'listar':
+        atual = ler_ponteiro() or {}
+        for manifesto in listar_snapshots():
+            marca = '*' if manifesto['hash'] == atual.get('hash') else ' '
+            print(f"{marca} {manifesto['hash'][:12]}  criado {manifesto['criado_em']}  "
+                  f"{manifesto['linhas']:>9,} linhas  {manifesto['locais']:>4} locais  até {manifesto['data_final']}  "
+                  f"({manifesto['origem']})")
+    elif comando == 'atual':
+        print(json.dumps(ler_ponteiro(), indent=1))
+    elif comando == 'reverter':
+        ponteiro = reverter(argumentos[1] if len(argumentos) > 1 else None)
+        print(f"ATUAL -> {ponteiro['hash'][:12]} (fixado; use 'liberar' para voltar às atualizações automáticas)")
+    elif comando == 'liberar':
+        print(f"ATUAL -> {liberar()['hash'][:12]} (atualizações automáticas liberadas)")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(_main(sys.argv[1:]))
+    except FileNotFoundError as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,121 @@
+"""Tabela comparativa de todos os locais, com ordenação, filtro e paginação no servidor
+
+`calcular_tabela` monta a tabela inteira de uma vez a partir das matrizes
+(data × local) e pré-calcula a ordem das linhas para cada coluna e sentido.
+A cada interação, `pagina_tabela` apenas combina uma máscara de filtro com a
+ordem pronta e fatia a página, então o custo por interação depende do tamanho
+da página e não do número de locais.
+"""
+import numpy as np
+import pandas as pd
+
+from analise import alinhar_por_evento, inicio_vacinacao_por_local, pivotar
+
+DIAS_POS_VACINACAO = 180
+TAMANHOS_PAGINA = [10, 25, 50, 100]
+
+COLUNAS_TABELA = [
+    'País', 'Início Vacinação', 'Mortes Antes', 'Taxa Mortes/Dia (Pós-Vac)', 'Total Mortes',
+    'Mortes/Milhão', 'Mortes/100 mil (180d Pós-Vac)', 'Cobertura Vacinal (%)'
+]
+
+CORES_DESTAQUE = {
+    'Brazil': 'background-color: #ffcccc; color: #1a1a2e',
+    'selecionado': 'background-color: #e0d4ff; color: #1a1a2e'
+}
+
+
+def calcular_tabela(df, traducao_paises=None, dias_pos=DIAS_POS_VACINACAO):
+    """Indicadores de vacinação e mortalidade de todos os locais, sem laço por local.
+
+    Retorna {'dados', 'ordens'}: `dados` tem as colunas de COLUNAS_TABELA mais
+    'location' e 'agregado' (entidades OWID_); `ordens` mapeia (coluna, crescente)
+    para as posições das linhas ordenadas, com NaN sempre no fim.
+    """
+    colunas = ['total_deaths', 'people_vaccinated', 'deaths_per_million',
+               'deaths_per_100k_since_vac', 'vac_coverage_pct']
+    matrizes = pivotar(df, colunas)
+    locais = matrizes['total_deaths'].columns
+    inicios = inicio_vacinacao_por_local(matrizes['people_vaccinated'])
+
+    # Mortes acumuladas até a véspera do início da vacinação
+    mortes = matrizes['total_deaths'].to_numpy(dtype='float64')
+    antes = matrizes['total_deaths'].index.to_numpy()[:, None] < inicios.to_numpy()[None, :]
+    with np.errstate(invalid='ignore'):
+        mortes_antes = np.fmax.reduce(np.where(antes, mortes, np.nan), axis=0)
+
+    # Janela [início, início + dias_pos]: dias com linha no arquivo e mortes acumuladas nela
+    janela = alinhar_por_evento(matrizes['total_deaths'], inicios, 0, dias_pos).to_numpy()
+    dias_janela = np.isfinite(janela).sum(axis=0)
+    primeira = np.take_along_axis(janela, np.isfinite(janela).argmax(axis=0)[None, :], axis=0)[0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        novas_mortes = np.fmax.reduce(janela, axis=0) - primeira
+        taxa_pos = np.where(dias_janela > 0, novas_mortes / dias_janela, 0.0)
+    por_100k_pos = np.fmax.reduce(
+        alinhar_por_evento(matrizes['deaths_per_100k_since_vac'], inicios, 0, dias_pos).to_numpy(), axis=0
+    )
+
+    vacinou = pd.notna(inicios).to_numpy()
+    codigos = df.drop_duplicates('location').set_index('location')['iso_code'].reindex(locais).astype(str)
+    nomes = locais.map(lambda local: (traducao_paises or {}).get(local, local))
+
+    dados = pd.DataFrame({
+        'País': nomes,
+        'Início Vacinação': inicios.to_numpy(),
+        'Mortes Antes': np.where(vacinou, np.nan_to_num(mortes_antes), np.nan),
+        'Taxa Mortes/Dia (Pós-Vac)': np.where(vacinou, np.round(taxa_pos, 1), np.nan),
+        'Total Mortes': np.fmax.reduce(mortes, axis=0),
+        'Mortes/Milhão': np.round(matrizes['deaths_per_million'].max().to_numpy(), 1),
+        'Mortes/100 mil (180d Pós-Vac)': np.round(por_100k_pos, 1),
+        'Cobertura Vacinal (%)': np.round(matrizes['vac_coverage_pct'].max().to_numpy(), 1),
+        'location': locais,
+        'agregado': codigos.str.startswith('OWID_').to_numpy()
+    })
+
+    ordens = {}
+    for coluna in COLUNAS_TABELA:
+        for crescente in (True, False):
+            ordenada = dados[coluna].sort_values(ascending=crescente, na_position='last', kind='stable')
+            ordens[(coluna, crescente)] = dados.index.get_indexer(ordenada.index)
+
+    return {'dados': dados, 'ordens': ordens}
+
+
+def filtrar(dados, busca='', somente_paises=False, somente_vacinados=False):
+    """Máscara booleana das linhas que passam pelos filtros (busca por nome sem diferenciar maiúsculas)"""
+    mascara = np.ones(len(dados), dtype=bool)
+    if busca:
+        mascara &= (dados['País'].str.contains(busca, case=False, regex=False)
+                    | dados['location'].str.contains(busca, case=False, regex=False)).to_numpy()
+    if somente_paises:
+        mascara &= ~dados['agregado'].to_numpy()
+    if somente_vacinados:
+        mascara &= dados['Início Vacinação'].notna().to_numpy()
+    return mascara
+
+
+def pagina_tabela(tabela, ordenar_por='Início Vacinação', crescente=True, mascara=None, pagina=1, tamanho_pagina=25):
+    """Linhas da página pedida, já ordenadas, e o total de linhas após o filtro"""
+    ordem = tabela['ordens'][(ordenar_por, crescente)]
+    if mascara is not None:
+        ordem = ordem[mascara[ordem]]
+    inicio = (pagina - 1) * tamanho_pagina
+    return tabela['dados'].iloc[ordem[inicio:inicio + tamanho_pagina]], len(ordem)
+
+
+def estilizar_pagina(pagina, destacados=()):
+    """Styler da página com o destaque calculado de uma vez para a página inteira"""
+    locais = pagina['location'].to_numpy()
+    estilos = np.where(locais == 'Brazil', CORES_DESTAQUE['Brazil'],
+                       np.where(np.isin(locais, list(destacados)), CORES_DESTAQUE['selecionado'], ''))
+
+    exibida = pagina[COLUNAS_TABELA].copy()
+    exibida['Início Vacinação'] = exibida['Início Vacinação'].dt.strftime('%d/%m/%Y')
+    matriz_estilos = pd.DataFrame(np.repeat(estilos[:, None], len(COLUNAS_TABELA), axis=1),
+                                  index=exibida.index, columns=exibida.columns)
+
+    return exibida.style.apply(lambda _: matriz_estilos, axis=None).format(
+        {'Mortes Antes': '{:,.0f}', 'Total Mortes': '{:,.0f}', 'Taxa Mortes/Dia (Pós-Vac)': '{:.1f}',
+         'Mortes/Milhão': '{:,.1f}', 'Mortes/100 mil (180d Pós-Vac)': '{:.1f}', 'Cobertura Vacinal (%)': '{:.1f}'},
+        na_rep='—'
+    )